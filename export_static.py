@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import argparse
+
+def export_static(output_dir=None, data_dir=None, processes=None, compress=True, verbose=False):
+    """
+    Export the web UI and JSON API to static files for a static file server or CDN
+
+    Args:
+        output_dir (str): Directory to export to (default: data/static)
+        data_dir (str): Data directory to read the dataset from (default: data)
+        processes (int): Number of render processes (default: one per CPU)
+        compress (bool): Whether to write precompressed .gz/.br siblings
+        verbose (bool): Whether to show verbose debug output
+
+    Returns:
+        int: Exit code - 0 on success, 1 on failure
+    """
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        from scripts.download_scryfall_data import setup_logging
+        from web.static_export import export_static_site
+    except ImportError as e:
+        print(f"Error importing Flask app: {e}")
+        print("Make sure you have installed Flask and other requirements:")
+        print("pip install -r requirements.txt")
+        return 1
+
+    setup_logging(verbose)
+    try:
+        result = export_static_site(output_dir, data_dir, processes, compress)
+    except (OSError, RuntimeError) as e:
+        print(f"Static export failed: {e}")
+        return 1
+    print(f"Exported {result['routes']} routes ({result['files']} files) to {result['output_dir']} "
+          f"in {result['duration']:.1f}s")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the MTG Inventory Manager Web UI to static files")
+    parser.add_argument('--output', '-o', help='Directory to export to (default: data/static)')
+    parser.add_argument('--data-dir', help='Data directory to read Secret Lair data from (default: data)')
+    parser.add_argument('--processes', '-p', type=int, help='Number of render processes (default: one per CPU)')
+    parser.add_argument('--no-compress', action='store_true', help='Do not write precompressed .gz/.br files')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Enable verbose debug output')
+
+    args = parser.parse_args()
+    sys.exit(export_static(args.output, args.data_dir, args.processes, not args.no_compress, args.verbose))
@@ -5,14 +5,24 @@ import sys
 import argparse
 import errno # Added for EADDRINUSE
 
-def run_web_ui(host='127.0.0.1', port=5000, debug=False):
+def run_web_ui(host='127.0.0.1', port=5000, debug=False, workers=None, threads=4, keepalive=5, timeout=30,
+               cache_size=None, cache_dir=None):
     """
     Start the web UI server, trying alternative ports if the default is in use.
     
+    With ``workers`` the app is served by the multi-process production server
+    instead of Flask's development server.
+    
     Args:
         host (str): Host to bind to
         port (int): Initial port to try
         debug (bool): Whether to run in debug mode
+        workers (int): Number of production server worker processes
+        threads (int): Number of request threads per production worker
+        keepalive (int): Seconds the production server keeps idle connections open
+        timeout (int): Seconds before the production server restarts a silent worker
+        cache_size (int): Memory budget of the rendered response cache in MB (0 disables it)
+        cache_dir (str): Directory persisting the response cache across restarts
     
     Returns:
         int: Exit code - 0 on success, 1 on failure (import errors, port conflicts, etc.)
@@ -21,6 +31,22 @@ def run_web_ui(host='127.0.0.1', port=5000, debug=False):
     web_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'web')
     sys.path.append(web_dir)
     
+    # The app reads its response cache settings when it is imported, here or in the production server
+    if cache_size is not None:
+        os.environ['RESPONSE_CACHE_MAX_BYTES'] = str(cache_size * 1024 * 1024)
+    if cache_dir:
+        os.environ['RESPONSE_CACHE_DIR'] = os.path.abspath(cache_dir)
+    
+    if workers:
+        try:
+            from web.server import run_production_server
+        except ImportError as e:
+            print(f"Error importing Flask app: {e}")
+            print("Make sure you have installed Flask and other requirements:")
+            print("pip install -r requirements.txt")
+            return 1
+        return run_production_server(host, port, workers, threads, keepalive, timeout)
+    
     try:
         from web.app import app
     except ImportError as e:
@@ -64,6 +90,16 @@ if __name__ == "__main__":
     parser.add_argument('--host', default='127.0.0.1', help='Host to bind to')
     parser.add_argument('--port', type=int, default=5000, help='Port to bind to')
     parser.add_argument('--debug', action='store_true', help='Run in debug mode')
+    parser.add_argument('--workers', type=int, help='Serve with the production server and this many worker processes')
+    parser.add_argument('--threads', type=int, default=4, help='Request threads per production worker (default: 4)')
+    parser.add_argument('--keepalive', type=int, default=5,
+                        help='Seconds to keep idle connections open in production mode (default: 5)')
+    parser.add_argument('--timeout', type=int, default=30,
+                        help='Seconds before a silent production worker is restarted (default: 30)')
+    parser.add_argument('--cache-size', type=int,
+                        help='Memory budget of the rendered response cache in MB (default: 64, 0 disables it)')
+    parser.add_argument('--cache-dir', help='Directory to persist the rendered response cache in across restarts')
     
     args = parser.parse_args()
-    sys.exit(run_web_ui(args.host, args.port, args.debug))
+    sys.exit(run_web_ui(args.host, args.port, args.debug, args.workers, args.threads, args.keepalive, args.timeout,
+                        args.cache_size, args.cache_dir))
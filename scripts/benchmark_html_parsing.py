@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import timeit
+import argparse
+from bs4 import BeautifulSoup
+
+# Add the project root to the path so the module also works when run directly
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts import scrape_secret_lairs
+from scripts.scrape_secret_lairs import parse_secret_lair_table, HTML_BACKENDS
+
+# Saved copy of the Drop Series page used when no other file is given
+DEFAULT_FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests', 'fixtures',
+                               'secret_lair_drop_series.html')
+
+def parse_whole_page(html):
+    """The original approach: build a tree of the whole page with html.parser, then search it"""
+    soup = BeautifulSoup(html, 'html.parser')
+    rows = soup.find_all('table', class_='wikitable')[0].find_all('tr')[1:]
+    return [row.find_all('td') for row in rows]
+
+def available_backends():
+    """Get the HTML backends that can run in this environment"""
+    return [backend for backend in HTML_BACKENDS if backend != 'lxml' or scrape_secret_lairs.lxml is not None]
+
+def benchmark_backends(html, backends=None, repeat=5):
+    """
+    Time the wikitable extraction with each backend, against a whole-page parse
+    
+    Args:
+        html (str): The page's HTML
+        backends (list): Backends to compare, defaults to all available ones
+        repeat (int): Number of timed runs per backend; the fastest one is reported
+        
+    Returns:
+        list: One dict per backend with backend, seconds and drops, the baseline first
+    """
+    candidates = [("whole page (html.parser)", parse_whole_page)]
+    for backend in backends or available_backends():
+        candidates.append((backend, lambda html, backend=backend: parse_secret_lair_table(html, backend)))
+    
+    results = []
+    for name, parse in candidates:
+        drops = parse(html)
+        seconds = min(timeit.repeat(lambda: parse(html), number=1, repeat=repeat))
+        results.append({"backend": name, "seconds": seconds, "drops": len(drops or [])})
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compare HTML backends on a saved copy of the Secret Lair wiki page')
+    parser.add_argument('path', nargs='?', default=DEFAULT_FIXTURE, help='HTML file to parse (default: test fixture)')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of timed runs per backend')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+    
+    with open(args.path, 'r', encoding='utf-8') as f:
+        html = f.read()
+    
+    results = benchmark_backends(html, repeat=args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            print(f"{result['backend']:<26} {result['seconds'] * 1000:8.1f} ms  ({result['drops']} drops)")
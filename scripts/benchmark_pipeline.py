@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import platform
+import argparse
+import tempfile
+import threading
+import tracemalloc
+import subprocess
+from html import escape
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+# Add the project root to the path so the module also works when run directly
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts import scrape_secret_lairs
+from scripts.card_index import CardIndex
+from scripts.compression import open_binary
+from scripts.scrape_secret_lairs import (
+    SCRYFALL_CARD_FIELDS,
+    card_range_predicate,
+    find_matching_cards,
+    load_scryfall_data,
+    parse_card_number_range,
+    save_to_json
+)
+
+# Version of the results format, bumped when it changes incompatibly
+RESULTS_VERSION = 1
+
+# Set codes of the filler cards that surround the Secret Lair cards in a bulk file
+FILLER_SET_CODES = ('lea', 'mh3', 'blb', 'dsk', 'fdn', 'otj', 'mkm', 'lci', 'woe', 'ltr', 'one', 'dmu')
+
+_WORDS = ('angel', 'bolt', 'dragon', 'elf', 'forest', 'goblin', 'hydra', 'island', 'knight', 'lotus',
+          'mountain', 'plains', 'ring', 'saga', 'sliver', 'swamp', 'wurm', 'zombie')
+
+def generate_drops(drop_count, seed=0):
+    """
+    Generate Secret Lair drops with the card number formats found on the wiki
+
+    Drops list consecutive SLD collector numbers as ranges, lists or single
+    numbers; some also list a ★ variant or an SLP promo.
+
+    Args:
+        drop_count (int): Number of drops
+        seed (int): Random seed, so the same arguments give the same drops
+
+    Returns:
+        list: Drops with drop_number, name and card_numbers
+    """
+    rng = random.Random(seed)
+    drops = []
+    next_number = 1
+    for drop_number in range(1, drop_count + 1):
+        size = rng.randint(1, 8)
+        first, last = next_number, next_number + size - 1
+        next_number += size
+
+        style = rng.random()
+        if style < 0.5 and size > 1:
+            entries = [f"SLD-{first} - SLD-{last}"]
+        elif style < 0.8:
+            entries = [f"SLD-{number}" for number in range(first, last + 1)]
+        else:
+            entries = [f"{first:03d} - {last:03d}"]
+        if rng.random() < 0.1:
+            entries.append(f"SLD-{first}★")
+        if rng.random() < 0.05:
+            entries.append(f"SLP-{drop_number}")
+
+        drops.append({
+            "drop_number": str(drop_number),
+            "name": " ".join(rng.choice(_WORDS).title() for _ in range(rng.randint(1, 4))),
+            "card_numbers": ", ".join(entries)
+        })
+    return drops
+
+def generate_drop_series_html(drops):
+    """Render drops as a MediaWiki-style Drop Series page with a sortable wikitable"""
+    rows = []
+    for drop in drops:
+        rows.append(
+            "<tr>\n"
+            f"<td>{escape(drop['drop_number'])}</td>\n"
+            f"<td><a href=\"/page/Secret_Lair/{escape(drop['name'].replace(' ', '_'))}\">{escape(drop['name'])}</a></td>\n"
+            f"<td>{escape(drop['card_numbers'])}</td>\n"
+            "<td><span class=\"date\">2024-01-01</span></td>\n"
+            "</tr>"
+        )
+    return (
+        "<!DOCTYPE html>\n<html lang=\"en\">\n<head><meta charset=\"UTF-8\"/>"
+        "<title>Secret Lair/Drop Series - MTG Wiki</title></head>\n<body>\n"
+        "<div id=\"mw-content-text\">\n<table class=\"wikitable sortable\">\n<tbody><tr>\n"
+        "<th>Drop #</th>\n<th>Name</th>\n<th>Cards</th>\n<th>Release date</th>\n</tr>\n"
+        + "\n".join(rows)
+        + "\n</tbody></table>\n</div>\n</body>\n</html>\n"
+    )
+
+def _synthetic_card(rng, set_code, collector_number, name):
+    card_id = f"{rng.getrandbits(128):032x}"
+    card_id = f"{card_id[:8]}-{card_id[8:12]}-{card_id[12:16]}-{card_id[16:20]}-{card_id[20:]}"
+    price = rng.random() * 50
+    return {
+        "object": "card",
+        "id": card_id,
+        "lang": "en",
+        "name": name,
+        "released_at": "2024-01-01",
+        "uri": f"https://api.scryfall.com/cards/{card_id}",
+        "layout": "normal",
+        "image_uris": {
+            "small": f"https://cards.scryfall.io/small/front/{card_id[0]}/{card_id[1]}/{card_id}.jpg",
+            "normal": f"https://cards.scryfall.io/normal/front/{card_id[0]}/{card_id[1]}/{card_id}.jpg",
+            "large": f"https://cards.scryfall.io/large/front/{card_id[0]}/{card_id[1]}/{card_id}.jpg"
+        },
+        "mana_cost": "{2}{G}",
+        "type_line": "Creature — Elf",
+        "oracle_text": "When this creature enters, draw a card.",
+        "set": set_code,
+        "collector_number": collector_number,
+        "rarity": rng.choice(("common", "uncommon", "rare", "mythic")),
+        "prices": {
+            "usd": f"{price:.2f}",
+            "usd_foil": f"{price * 1.5:.2f}" if rng.random() < 0.8 else None,
+            "eur": f"{price * 0.9:.2f}" if rng.random() < 0.7 else None,
+            "eur_foil": None,
+            "tix": None
+        }
+    }
+
+def write_scryfall_file(filepath, card_count, drops, seed=0, compression='gzip'):
+    """
+    Write a synthetic Scryfall bulk data file containing every card listed by the drops
+
+    The drops' cards (plus some unlisted SLD variants) are shuffled in among
+    filler cards from other sets, the way Secret Lair cards appear in all_cards.
+
+    Args:
+        filepath (str): Path of the file to write
+        card_count (int): Total number of cards; never fewer than the drops list
+        drops (list): Drops from generate_drops
+        seed (int): Random seed
+        compression (str): "gzip", "zstd" or None
+
+    Returns:
+        int: Number of cards written
+    """
+    rng = random.Random(seed)
+    listed = []
+    for drop in drops:
+        card_range = parse_card_number_range(drop["card_numbers"])
+        for set_code, numbers in card_range['sets'].items():
+            for number in numbers:
+                listed.append((set_code.lower(), str(number), drop["name"]))
+                if rng.random() < 0.05:
+                    listed.append((set_code.lower(), f"{number}a", drop["name"]))
+        for set_code, collector_numbers in card_range['variants'].items():
+            listed.extend((set_code.lower(), collector_number, drop["name"]) for collector_number in collector_numbers)
+
+    # Positions of the listed cards among all cards, chosen without building the full list
+    total = max(card_count, len(listed))
+    positions = dict(zip(sorted(rng.sample(range(total), len(listed))), listed))
+
+    with io.TextIOWrapper(open_binary(filepath, 'wb', compression), encoding='utf-8') as f:
+        f.write("[\n")
+        for i in range(total):
+            if i in positions:
+                set_code, collector_number, name = positions[i]
+            else:
+                set_code = rng.choice(FILLER_SET_CODES)
+                collector_number = str(rng.randint(1, 400))
+                name = " ".join(rng.choice(_WORDS).title() for _ in range(2))
+            f.write(json.dumps(_synthetic_card(rng, set_code, collector_number, name)))
+            f.write(",\n" if i < total - 1 else "\n")
+        f.write("]\n")
+    return total
+
+class _PageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = self.server.page.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class serve_page:
+    """Serve an HTML page from a local HTTP server, as the Drop Series URL, while in the block"""
+
+    def __init__(self, html):
+        self.server = HTTPServer(('127.0.0.1', 0), _PageHandler)
+        self.server.page = html
+        self.original_url = scrape_secret_lairs.DROP_SERIES_URL
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        scrape_secret_lairs.DROP_SERIES_URL = f"http://127.0.0.1:{self.server.server_port}/Drop_Series"
+        return self
+
+    def __exit__(self, *exc_info):
+        scrape_secret_lairs.DROP_SERIES_URL = self.original_url
+        self.server.shutdown()
+        self.server.server_close()
+
+def measure(func, repeat=3):
+    """
+    Time a function and record the peak memory it allocates
+
+    The timed runs are made without tracing; one extra run under tracemalloc
+    records the peak of Python allocations, which is what the pipeline's
+    memory use is made of.
+
+    Args:
+        func (callable): Function to call without arguments
+        repeat (int): Number of timed runs
+
+    Returns:
+        tuple: (dict with seconds (fastest run), mean_seconds, runs and peak_memory_bytes,
+            the value returned by the last run)
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = func()
+        timings.append(time.perf_counter() - start)
+
+    del value
+    tracemalloc.start()
+    try:
+        value = func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": min(timings), "mean_seconds": sum(timings) / len(timings), "runs": repeat,
+            "peak_memory_bytes": peak}, value
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(card_count=10000, drop_count=400, repeat=3, seed=0, compression='gzip', directory=None):
+    """
+    Generate synthetic fixtures and benchmark each stage of the data pipeline
+
+    Args:
+        card_count (int): Number of cards in the synthetic bulk file
+        drop_count (int): Number of drops on the synthetic wiki page
+        repeat (int): Number of timed runs per stage
+        seed (int): Random seed for the fixtures
+        compression (str): Compression of the bulk file ("gzip", "zstd" or None)
+        directory (str): Directory for the fixtures and output, defaults to a temporary one
+
+    Returns:
+        dict: Environment, parameters, fixture sizes and one result per stage
+    """
+    workdir = directory or tempfile.mkdtemp(prefix="sl-benchmark-")
+    try:
+        drops = generate_drops(drop_count, seed)
+        html = generate_drop_series_html(drops)
+        scryfall_filepath = os.path.join(workdir, "scryfall_data.json" + (".gz" if compression == 'gzip' else
+                                                                         ".zst" if compression == 'zstd' else ""))
+        written = write_scryfall_file(scryfall_filepath, card_count, drops, seed, compression)
+
+        results = []
+        def record(name, func):
+            result, value = measure(func, repeat)
+            results.append(dict(name=name, **result))
+            return value
+
+        card_ranges = record("parse_card_number_range",
+                             lambda: [parse_card_number_range(drop["card_numbers"]) for drop in drops])
+        cards = record("load_scryfall_data",
+                       lambda: load_scryfall_data(scryfall_filepath, predicate=card_range_predicate(card_ranges),
+                                                  fields=SCRYFALL_CARD_FIELDS))
+        matched = record("find_matching_cards",
+                         lambda: sum(len(find_matching_cards(index, card_range))
+                                     for index in [CardIndex(cards)] for card_range in card_ranges))
+        with serve_page(html):
+            secret_lairs = record("scrape_secret_lairs",
+                                  lambda: scrape_secret_lairs.scrape_secret_lairs(match_with_scryfall=True,
+                                                                                  scryfall_filepath=scryfall_filepath))
+        output_directory = os.path.join(workdir, "output")
+        record("save_to_json", lambda: save_to_json(secret_lairs, directory=output_directory))
+
+        return {
+            "version": RESULTS_VERSION,
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parameters": {"cards": card_count, "drops": drop_count, "repeat": repeat, "seed": seed,
+                           "compression": compression},
+            "fixtures": {"cards": written, "drops": len(drops), "matched_cards": matched,
+                         "scryfall_bytes": os.path.getsize(scryfall_filepath), "html_bytes": len(html.encode('utf-8'))},
+            "results": results
+        }
+    finally:
+        if directory is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+def compare_results(baseline, current):
+    """
+    Compare two benchmark runs stage by stage
+
+    Args:
+        baseline (dict): Results of an earlier run_benchmarks call
+        current (dict): Results of a later run with the same parameters
+
+    Returns:
+        list: One dict per stage present in both runs, with the time and peak memory
+            ratios of the current run to the baseline
+    """
+    before = {result["name"]: result for result in baseline["results"]}
+    comparison = []
+    for result in current["results"]:
+        previous = before.get(result["name"])
+        if previous is None:
+            continue
+        comparison.append({
+            "name": result["name"],
+            "seconds_ratio": result["seconds"] / previous["seconds"] if previous["seconds"] else None,
+            "memory_ratio": (result["peak_memory_bytes"] / previous["peak_memory_bytes"]
+                             if previous["peak_memory_bytes"] else None)
+        })
+    return comparison
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the data pipeline on synthetic Scryfall and wiki data')
+    parser.add_argument('--cards', type=int, default=10000, help='Number of cards in the bulk file (default: 10000)')
+    parser.add_argument('--drops', type=int, default=400, help='Number of drops on the wiki page (default: 400)')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs per stage')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for the synthetic data')
+    parser.add_argument('--compression', choices=['gzip', 'zstd', 'none'], default='gzip',
+                        help='Compression of the synthetic bulk file (default: gzip)')
+    parser.add_argument('--directory', help='Keep the generated fixtures in this directory')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.cards, args.drops, args.repeat, args.seed,
+                             None if args.compression == 'none' else args.compression, args.directory)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        for row in compare_results(baseline, results):
+            print(f"{row['name']:<26} time x{row['seconds_ratio'] or 0:6.2f}  memory x{row['memory_ratio'] or 0:6.2f}",
+                  file=sys.stderr)
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+
+import os
+import mmap
+import struct
+import logging
+from collections.abc import Mapping, Sequence
+
+from scripts.drop_totals import TOTAL_PRICE_FIELDS, compute_drop_totals
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Default file name of the binary snapshot inside the data directory
+DEFAULT_SNAPSHOT_FILENAME = "secret_lairs.snapshot"
+
+MAGIC = b'SLSNAP\x00\x00'
+FORMAT_VERSION = 1
+
+# Price fields stored for every card, in record order
+PRICE_FIELDS = ('usd', 'usd_foil', 'eur', 'eur_foil', 'tix')
+
+# magic, version, drop count, card count, lookup count, string count, then the
+# byte offsets of the drop, card, lookup and string offset tables and the string data
+HEADER = struct.Struct('<8sIIIII5Q')
+
+# drop_number, name and card_numbers string ids, first card, number of cards,
+# whether the drop has a card list, then the totals: card_count, the summed
+# value and the number of cards without a price of each total price field
+DROP_RECORD = struct.Struct('<6I I' + 'd' * len(TOTAL_PRICE_FIELDS) + 'I' * len(TOTAL_PRICE_FIELDS))
+
+# name, collector_number, set, id and image_uri string ids, then one per price field
+CARD_RECORD = struct.Struct('<' + 'I' * (5 + len(PRICE_FIELDS)))
+
+_INDEX = struct.Struct('<I')
+_OFFSET = struct.Struct('<Q')
+
+# String id of a missing value
+NONE = 0xFFFFFFFF
+
+class _StringTable:
+    """Deduplicating builder for the snapshot's string table"""
+
+    def __init__(self):
+        self.ids = {}
+        self.offsets = [0]
+        self.data = bytearray()
+
+    def add(self, value):
+        if value is None:
+            return NONE
+        value = str(value)
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = len(self.ids)
+            self.ids[value] = string_id
+            self.data += value.encode('utf-8')
+            self.offsets.append(len(self.data))
+        return string_id
+
+def write_binary_snapshot(data, filepath):
+    """
+    Write Secret Lair drops to a binary snapshot file
+
+    The file holds fixed-width drop and card records that refer to a shared,
+    deduplicated string table, plus the drop positions sorted by drop number.
+    It is written to a temporary file and moved into place when complete, so
+    processes that have the previous version mapped keep reading it unchanged.
+
+    Args:
+        data (list): Secret Lair drops in the format produced by scrape_secret_lairs
+        filepath (str): Path of the file to write
+
+    Returns:
+        str: Path of the written file
+    """
+    strings = _StringTable()
+    drops = bytearray()
+    cards = bytearray()
+    card_count = 0
+    first_positions = {}
+    for position, drop in enumerate(data):
+        drop_cards = drop.get("cards")
+        totals = drop.get("totals") or compute_drop_totals(drop_cards or [])
+        drop_number = drop.get("drop_number", "")
+        # The first drop wins when the wiki lists a drop number more than once
+        first_positions.setdefault(drop_number, position)
+        drops += DROP_RECORD.pack(
+            strings.add(drop_number), strings.add(drop.get("name", "")), strings.add(drop.get("card_numbers", "")),
+            card_count, len(drop_cards or []), int(drop_cards is not None),
+            totals["card_count"],
+            *(totals[field] for field in TOTAL_PRICE_FIELDS),
+            *(totals[f"missing_{field}"] for field in TOTAL_PRICE_FIELDS)
+        )
+        for card in drop_cards or []:
+            prices = card.get("prices") or {}
+            cards += CARD_RECORD.pack(
+                strings.add(card.get("name", "Unknown")), strings.add(card.get("collector_number", "")),
+                strings.add(card.get("set", "")), strings.add(card.get("id")), strings.add(card.get("image_uri")),
+                *(strings.add(prices.get(field)) for field in PRICE_FIELDS)
+            )
+            card_count += 1
+
+    # Drop positions ordered by the UTF-8 bytes of the drop number, for binary search
+    lookup = sorted(first_positions.items(), key=lambda item: item[0].encode('utf-8'))
+    lookup_table = b''.join(_INDEX.pack(position) for _, position in lookup)
+    string_offsets = b''.join(_OFFSET.pack(offset) for offset in strings.offsets)
+
+    drops_offset = HEADER.size
+    cards_offset = drops_offset + len(drops)
+    lookup_offset = cards_offset + len(cards)
+    string_offsets_offset = lookup_offset + len(lookup_table)
+    string_data_offset = string_offsets_offset + len(string_offsets)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(data), card_count, len(lookup), len(strings.ids),
+                         drops_offset, cards_offset, lookup_offset, string_offsets_offset, string_data_offset)
+
+    temp_filepath = filepath + ".tmp"
+    with open(temp_filepath, 'wb') as f:
+        for block in (header, drops, cards, lookup_table, string_offsets, strings.data):
+            f.write(block)
+    os.replace(temp_filepath, filepath)
+    return filepath
+
+def save_to_snapshot(data, filename=DEFAULT_SNAPSHOT_FILENAME, directory="data"):
+    """
+    Save the scraped data as a binary snapshot in the data directory
+
+    Args:
+        data (list): Secret Lair drops in the format produced by scrape_secret_lairs
+        filename (str): Name of the snapshot file
+        directory (str): Directory to save the snapshot to
+
+    Returns:
+        str: Path of the written snapshot
+    """
+    os.makedirs(directory, exist_ok=True)
+    filepath = write_binary_snapshot(data, os.path.join(directory, filename))
+    logger.info(f"Data saved to {filepath}")
+    return filepath
+
+class DropNumberIndex(Mapping):
+    """Read-only mapping of drop numbers to drops, looked up by binary search in a BinarySnapshot"""
+
+    def __init__(self, snapshot):
+        self._snapshot = snapshot
+
+    def _position(self, drop_number):
+        if not isinstance(drop_number, str):
+            return None
+        key = drop_number.encode('utf-8')
+        snapshot = self._snapshot
+        low, high = 0, snapshot.lookup_count
+        while low < high:
+            middle = (low + high) // 2
+            position = snapshot._lookup(middle)
+            if snapshot._string_bytes(snapshot._drop_record(position)[0]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < snapshot.lookup_count:
+            position = snapshot._lookup(low)
+            if snapshot._string_bytes(snapshot._drop_record(position)[0]) == key:
+                return position
+        return None
+
+    def __getitem__(self, drop_number):
+        position = self._position(drop_number)
+        if position is None:
+            raise KeyError(drop_number)
+        return self._snapshot[position]
+
+    def __contains__(self, drop_number):
+        return self._position(drop_number) is not None
+
+    def __iter__(self):
+        for i in range(self._snapshot.lookup_count):
+            yield self._snapshot._string(self._snapshot._drop_record(self._snapshot._lookup(i))[0])
+
+    def __len__(self):
+        return self._snapshot.lookup_count
+
+class BinarySnapshot(Sequence):
+    """
+    Secret Lair drops read from a memory-mapped snapshot written by save_to_snapshot
+
+    Opening a snapshot only maps the file and reads its header. Drops are
+    decoded into the dict format of secret_lairs.json when they are accessed,
+    and not kept, so every process serving the same file shares one copy of it
+    in the page cache and its own memory use does not grow with the dataset.
+    """
+
+    def __init__(self, filepath):
+        """
+        Args:
+            filepath (str): Path of the snapshot file
+
+        Raises:
+            ValueError: If the file is not a snapshot in a supported format
+        """
+        with open(filepath, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < HEADER.size:
+                raise ValueError(f"{filepath} is not a Secret Lair snapshot")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.drop_count, self.card_count, self.lookup_count, self.string_count, self._drops_offset,
+         self._cards_offset, self._lookup_offset, self._string_offsets_offset,
+         self._string_data_offset) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{filepath} is not a Secret Lair snapshot")
+        if version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{filepath} has unsupported snapshot version {version}")
+        end = self._string_data_offset + self._string_offset(self.string_count) if self.string_count else 0
+        if len(self._map) < max(end, self._string_offsets_offset + _OFFSET.size * (self.string_count + 1)):
+            self.close()
+            raise ValueError(f"{filepath} is truncated")
+        self.by_drop_number = DropNumberIndex(self)
+
+    def close(self):
+        """Unmap the file; drops can no longer be read afterwards"""
+        self._map.close()
+
+    def _string_offset(self, string_id):
+        return _OFFSET.unpack_from(self._map, self._string_offsets_offset + string_id * _OFFSET.size)[0]
+
+    def _string_bytes(self, string_id):
+        start = self._string_data_offset + self._string_offset(string_id)
+        end = self._string_data_offset + self._string_offset(string_id + 1)
+        return self._map[start:end]
+
+    def _string(self, string_id):
+        if string_id == NONE:
+            return None
+        return self._string_bytes(string_id).decode('utf-8')
+
+    def _lookup(self, i):
+        return _INDEX.unpack_from(self._map, self._lookup_offset + i * _INDEX.size)[0]
+
+    def _drop_record(self, position):
+        return DROP_RECORD.unpack_from(self._map, self._drops_offset + position * DROP_RECORD.size)
+
+    def _card(self, position):
+        fields = CARD_RECORD.unpack_from(self._map, self._cards_offset + position * CARD_RECORD.size)
+        return {
+            "name": self._string(fields[0]),
+            "collector_number": self._string(fields[1]),
+            "set": self._string(fields[2]),
+            "id": self._string(fields[3]) or "",
+            "image_uri": self._string(fields[4]) or "",
+            "prices": {field: self._string(string_id) for field, string_id in zip(PRICE_FIELDS, fields[5:])}
+        }
+
+    def _drop(self, position, card_limit=None):
+        record = self._drop_record(position)
+        drop = {
+            "drop_number": self._string(record[0]),
+            "name": self._string(record[1]),
+            "card_numbers": self._string(record[2])
+        }
+        first_card, card_count, has_cards = record[3:6]
+        if has_cards:
+            decoded = card_count if card_limit is None else min(card_count, card_limit)
+            drop["cards"] = [self._card(first_card + i) for i in range(decoded)]
+        price_count = len(TOTAL_PRICE_FIELDS)
+        totals = {"card_count": record[6]}
+        for i, field in enumerate(TOTAL_PRICE_FIELDS):
+            totals[field] = record[7 + i]
+            totals[f"missing_{field}"] = record[7 + price_count + i]
+        drop["totals"] = totals
+        return drop
+
+    def previews(self, card_limit):
+        """
+        Get every drop with only its first ``card_limit`` cards decoded, for listings
+
+        Decoding cards is most of the cost of reading a drop, so a listing that
+        shows a few cards per drop skips the rest. The totals still cover every card.
+        """
+        return [self._drop(position, card_limit) for position in range(self.drop_count)]
+
+    def __len__(self):
+        return self.drop_count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._drop(position) for position in range(*index.indices(self.drop_count))]
+        if index < 0:
+            index += self.drop_count
+        if not 0 <= index < self.drop_count:
+            raise IndexError("drop index out of range")
+        return self._drop(index)
+
+    def __iter__(self):
+        for position in range(self.drop_count):
+            yield self._drop(position)
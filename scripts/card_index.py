@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+
+import re
+import logging
+from bisect import bisect_left, bisect_right
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Numeric part of a collector number, e.g. "123" in "123a" or "123★"
+COLLECTOR_NUMBER_PATTERN = re.compile(r'(\d+)')
+
+def parse_collector_number(collector_number):
+    """
+    Split a collector number into its numeric part and whether it is a variant
+
+    Args:
+        collector_number (str): Collector number as stored by Scryfall (e.g. "123", "123a", "123★")
+
+    Returns:
+        tuple: (int number, bool is_variant), or None if the collector number has no digits
+    """
+    match = COLLECTOR_NUMBER_PATTERN.search(collector_number)
+    if not match:
+        return None
+    return int(match.group(1)), not collector_number.isdigit()
+
+class IntervalSet:
+    """
+    Set of integers stored as sorted, merged, inclusive (start, end) intervals
+
+    A drop listing "SLD-1 - SLD-500" is a single interval rather than 500
+    numbers, and membership is a binary search over interval starts, so a
+    lookup costs O(log intervals) however many numbers the set covers.
+    """
+
+    def __init__(self, intervals=()):
+        self._starts = []
+        self._ends = []
+        merged = []
+        for start, end in sorted(intervals):
+            if start > end:
+                continue
+            # Overlapping and adjacent intervals are merged
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        for start, end in merged:
+            self._starts.append(start)
+            self._ends.append(end)
+
+    @classmethod
+    def from_numbers(cls, numbers):
+        """Build an interval set from individual numbers"""
+        return cls((number, number) for number in numbers)
+
+    def union(self, other):
+        """Get a new interval set containing the numbers of both sets"""
+        return IntervalSet(list(self.intervals()) + list(other.intervals()))
+
+    def intervals(self):
+        """Iterate over the merged (start, end) intervals in ascending order"""
+        return zip(self._starts, self._ends)
+
+    def __contains__(self, number):
+        i = bisect_right(self._starts, number) - 1
+        return i >= 0 and number <= self._ends[i]
+
+    def __iter__(self):
+        for start, end in self.intervals():
+            yield from range(start, end + 1)
+
+    def __len__(self):
+        return sum(end - start + 1 for start, end in self.intervals())
+
+    def __bool__(self):
+        return bool(self._starts)
+
+    def __eq__(self, other):
+        if not isinstance(other, IntervalSet):
+            return NotImplemented
+        return self._starts == other._starts and self._ends == other._ends
+
+    def __repr__(self):
+        return f"IntervalSet({list(self.intervals())})"
+
+class CardIndex:
+    """
+    Lookup table of cards keyed by (set code, numeric collector number)
+
+    Cards whose collector number is purely numeric are primary entries; variants
+    such as "123a" or "123★" are kept as secondary entries under the same key.
+    The index is built in a single pass and every lookup is a dictionary access.
+    """
+
+    def __init__(self, cards=()):
+        self._primary = {}
+        self._variants = {}
+        self._numbers = None
+        self._count = 0
+        for card in cards:
+            self.add(card)
+
+    def add(self, card):
+        """Add a card to the index; cards without a numeric collector number are ignored"""
+        parsed = parse_collector_number(card.get('collector_number', ''))
+        if parsed is None:
+            return False
+        number, is_variant = parsed
+        key = (card.get('set', '').lower(), number)
+        entries = self._variants if is_variant else self._primary
+        entries.setdefault(key, []).append(card)
+        self._numbers = None
+        self._count += 1
+        return True
+
+    def get(self, set_code, number, include_variants=True):
+        """
+        Get the cards with the given set code and numeric collector number
+
+        Args:
+            set_code (str): Set code (case-insensitive)
+            number (int): Numeric part of the collector number
+            include_variants (bool): Whether to include variant printings after the primary ones
+
+        Returns:
+            list: Matching cards, primary printings first
+        """
+        key = (set_code.lower(), number)
+        cards = list(self._primary.get(key, ()))
+        if include_variants:
+            cards.extend(self._variants.get(key, ()))
+        return cards
+
+    def numbers(self, set_code):
+        """Get the sorted numeric collector numbers present in a set"""
+        if self._numbers is None:
+            by_set = {}
+            for set_key, number in self._primary.keys() | self._variants.keys():
+                by_set.setdefault(set_key, []).append(number)
+            self._numbers = {set_key: sorted(numbers) for set_key, numbers in by_set.items()}
+        return self._numbers.get(set_code.lower(), [])
+
+    def find(self, set_code, numbers, include_variants=True):
+        """
+        Get all cards in a set whose numeric collector number is in ``numbers``, in number order
+
+        ``numbers`` may be an IntervalSet, in which case each interval is resolved
+        by binary search over the set's collector numbers, so wide ranges cost
+        nothing for the numbers they cover that have no card.
+        """
+        if isinstance(numbers, IntervalSet):
+            present = self.numbers(set_code)
+            numbers = [number for start, end in numbers.intervals()
+                       for number in present[bisect_left(present, start):bisect_right(present, end)]]
+        cards = []
+        for number in sorted(numbers):
+            cards.extend(self.get(set_code, number, include_variants))
+        return cards
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, key):
+        set_code, number = key
+        key = (set_code.lower(), number)
+        return key in self._primary or key in self._variants
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+
+import os
+import sqlite3
+import logging
+from scripts.drop_totals import TOTAL_PRICE_FIELDS, compute_drop_totals
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Default file name of the card database inside the data directory
+DEFAULT_DB_FILENAME = "secret_lairs.db"
+
+# Price fields stored for every card, in column order
+PRICE_FIELDS = ('usd', 'usd_foil', 'eur', 'eur_foil', 'tix')
+
+SCHEMA = """
+CREATE TABLE drops (
+    id INTEGER PRIMARY KEY,
+    drop_number TEXT NOT NULL,
+    name TEXT NOT NULL,
+    card_numbers TEXT NOT NULL,
+    matched INTEGER NOT NULL DEFAULT 0,
+    card_count INTEGER NOT NULL DEFAULT 0,
+    total_usd REAL NOT NULL DEFAULT 0,
+    total_usd_foil REAL NOT NULL DEFAULT 0,
+    total_eur REAL NOT NULL DEFAULT 0,
+    total_eur_foil REAL NOT NULL DEFAULT 0,
+    missing_usd INTEGER NOT NULL DEFAULT 0,
+    missing_usd_foil INTEGER NOT NULL DEFAULT 0,
+    missing_eur INTEGER NOT NULL DEFAULT 0,
+    missing_eur_foil INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE cards (
+    id INTEGER PRIMARY KEY,
+    drop_id INTEGER NOT NULL REFERENCES drops(id),
+    position INTEGER NOT NULL,
+    scryfall_id TEXT,
+    name TEXT NOT NULL,
+    set_code TEXT NOT NULL,
+    collector_number TEXT NOT NULL,
+    image_uri TEXT
+);
+
+CREATE TABLE prices (
+    card_id INTEGER PRIMARY KEY REFERENCES cards(id),
+    usd TEXT,
+    usd_foil TEXT,
+    eur TEXT,
+    eur_foil TEXT,
+    tix TEXT
+);
+
+CREATE INDEX idx_drops_drop_number ON drops(drop_number);
+CREATE INDEX idx_cards_drop ON cards(drop_id, position);
+CREATE INDEX idx_cards_set_collector_number ON cards(set_code, collector_number);
+CREATE INDEX idx_cards_name ON cards(name COLLATE NOCASE);
+"""
+
+# Keys of a drop's "totals" dict, in the column order of _TOTAL_COLUMNS
+_TOTAL_KEYS = (('card_count',) + TOTAL_PRICE_FIELDS
+               + tuple(f"missing_{field}" for field in TOTAL_PRICE_FIELDS))
+_TOTAL_COLUMNS = (('card_count',) + tuple(f"total_{field}" for field in TOTAL_PRICE_FIELDS)
+                  + tuple(f"missing_{field}" for field in TOTAL_PRICE_FIELDS))
+
+_DROP_QUERY = f"SELECT id, drop_number, name, card_numbers, matched, {', '.join(_TOTAL_COLUMNS)} FROM drops"
+
+_CARD_QUERY = """
+SELECT c.drop_id, c.name, c.collector_number, c.set_code, c.scryfall_id, c.image_uri,
+       p.usd, p.usd_foil, p.eur, p.eur_foil, p.tix
+FROM cards c
+LEFT JOIN prices p ON p.card_id = c.id
+"""
+
+def _row_to_card(row):
+    """Convert a row from _CARD_QUERY into the card dict format used in secret_lairs.json"""
+    return {
+        "name": row[1],
+        "collector_number": row[2],
+        "set": row[3],
+        "id": row[4] or "",
+        "image_uri": row[5] or "",
+        "prices": dict(zip(PRICE_FIELDS, row[6:11]))
+    }
+
+def _drop_to_dict(row, cards):
+    """Convert a drops row and its cards into the drop dict format used in secret_lairs.json"""
+    drop = {
+        "drop_number": row[1],
+        "name": row[2],
+        "card_numbers": row[3]
+    }
+    if row[4]:
+        drop["cards"] = cards
+    drop["totals"] = dict(zip(_TOTAL_KEYS, row[5:]))
+    return drop
+
+def write_secret_lairs(conn, data):
+    """
+    Create the schema and insert all drops, cards and prices into an empty database
+
+    Args:
+        conn (sqlite3.Connection): Connection to an empty database
+        data (list): Secret Lair drops in the format produced by scrape_secret_lairs
+    """
+    conn.executescript(SCHEMA)
+    insert_drop = (f"INSERT INTO drops (id, drop_number, name, card_numbers, matched, {', '.join(_TOTAL_COLUMNS)}) "
+                   f"VALUES ({', '.join('?' * (5 + len(_TOTAL_COLUMNS)))})")
+    for drop_id, drop in enumerate(data):
+        cards = drop.get("cards")
+        totals = drop.get("totals") or compute_drop_totals(cards or [])
+        conn.execute(
+            insert_drop,
+            (drop_id, drop.get("drop_number", ""), drop.get("name", ""), drop.get("card_numbers", ""),
+             int(cards is not None)) + tuple(totals[key] for key in _TOTAL_KEYS)
+        )
+        for position, card in enumerate(cards or []):
+            cursor = conn.execute(
+                "INSERT INTO cards (drop_id, position, scryfall_id, name, set_code, collector_number, image_uri) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (drop_id, position, card.get("id"), card.get("name", "Unknown"), card.get("set", ""),
+                 card.get("collector_number", ""), card.get("image_uri"))
+            )
+            prices = card.get("prices") or {}
+            conn.execute(
+                "INSERT INTO prices (card_id, usd, usd_foil, eur, eur_foil, tix) VALUES (?, ?, ?, ?, ?, ?)",
+                (cursor.lastrowid,) + tuple(prices.get(field) for field in PRICE_FIELDS)
+            )
+
+def save_to_sqlite(data, filename=DEFAULT_DB_FILENAME, directory="data"):
+    """
+    Save the scraped data to a SQLite database in the data directory
+
+    The database is built in a temporary file and moved into place when complete,
+    so readers never see a partially written database.
+
+    Args:
+        data (list): Secret Lair drops in the format produced by scrape_secret_lairs
+        filename (str): Name of the database file
+        directory (str): Directory to save the database to
+
+    Returns:
+        str: Path of the written database
+    """
+    os.makedirs(directory, exist_ok=True)
+    filepath = os.path.join(directory, filename)
+    temp_filepath = filepath + ".tmp"
+    if os.path.exists(temp_filepath):
+        os.remove(temp_filepath)
+
+    conn = sqlite3.connect(temp_filepath)
+    try:
+        with conn:
+            write_secret_lairs(conn, data)
+    finally:
+        conn.close()
+
+    os.replace(temp_filepath, filepath)
+    logger.info(f"Data saved to {filepath}")
+    return filepath
+
+class CardStore:
+    """
+    Read-only access to the Secret Lair database written by save_to_sqlite
+
+    Drops and cards are returned in the same dict format as secret_lairs.json,
+    so callers can switch between the two sources transparently.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._conn = None
+
+    @property
+    def conn(self):
+        """Lazily open a read-only connection to the database"""
+        if self._conn is None:
+            uri = f"file:{os.path.abspath(self.db_path)}?mode=ro"
+            self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        return self._conn
+
+    def close(self):
+        """Close the underlying connection, if open"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def list_drops(self):
+        """Get all drops with their cards, in the order they appear on the wiki"""
+        cards_by_drop = {}
+        for row in self.conn.execute(_CARD_QUERY + " ORDER BY c.drop_id, c.position"):
+            cards_by_drop.setdefault(row[0], []).append(_row_to_card(row))
+
+        rows = self.conn.execute(_DROP_QUERY + " ORDER BY id")
+        return [_drop_to_dict(row, cards_by_drop.get(row[0], [])) for row in rows]
+
+    def get_drop(self, drop_number):
+        """Get a single drop and its cards by drop number with indexed queries, or None if it does not exist"""
+        row = self.conn.execute(_DROP_QUERY + " WHERE drop_number = ? ORDER BY id LIMIT 1", (drop_number,)).fetchone()
+        if row is None:
+            return None
+
+        cards = [_row_to_card(card_row) for card_row in
+                 self.conn.execute(_CARD_QUERY + " WHERE c.drop_id = ? ORDER BY c.position", (row[0],))]
+        return _drop_to_dict(row, cards)
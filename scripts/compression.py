@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+import io
+import gzip
+import shutil
+import logging
+
+try:
+    import zstandard
+except ImportError:  # zstd support is optional
+    zstandard = None
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+# File extensions for each supported compression format
+EXTENSIONS = {'.gz': 'gzip', '.zst': 'zstd'}
+
+def compression_for_path(path):
+    """Get the compression implied by a file name ("gzip", "zstd" or None)"""
+    for extension, compression in EXTENSIONS.items():
+        if path.endswith(extension):
+            return compression
+    return None
+
+def detect_compression(path):
+    """Get the compression of an existing file from its magic bytes ("gzip", "zstd" or None)"""
+    with open(path, 'rb') as f:
+        magic = f.read(4)
+    if magic.startswith(GZIP_MAGIC):
+        return 'gzip'
+    if magic.startswith(ZSTD_MAGIC):
+        return 'zstd'
+    return None
+
+def zstd_available():
+    """Check whether the optional zstandard package is installed"""
+    return zstandard is not None
+
+def open_binary(path, mode='rb', compression=None):
+    """
+    Open a file for binary reading or writing through the given compression
+
+    Args:
+        path (str): Path to the file
+        mode (str): "rb" or "wb"
+        compression (str): "gzip", "zstd" or None for an uncompressed file
+
+    Raises:
+        RuntimeError: If zstd is requested but the zstandard package is not installed
+    """
+    if compression == 'gzip':
+        return gzip.open(path, mode)
+    if compression == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("zstd compression requires the 'zstandard' package")
+        return zstandard.open(path, mode)
+    return open(path, mode)
+
+def open_text(path, encoding='utf-8'):
+    """Open a possibly compressed file for reading text, decompressing on the fly"""
+    return io.TextIOWrapper(open_binary(path, 'rb', detect_compression(path)), encoding=encoding)
+
+def transcode(source_path, source_compression, target_path, target_compression, chunk_size=1024 * 1024):
+    """Stream a file from one compression format into another without holding it in memory"""
+    with open_binary(source_path, 'rb', source_compression) as source, \
+            open_binary(target_path, 'wb', target_compression) as target:
+        shutil.copyfileobj(source, target, chunk_size)
+
+def uncompressed_size(path, compression, chunk_size=1024 * 1024):
+    """
+    Decompress a file to count its uncompressed bytes
+
+    Reading the whole stream also verifies the format's checksums, so a
+    corrupted file raises an error instead of returning a size.
+    """
+    size = 0
+    with open_binary(path, 'rb', compression) as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            size += len(chunk)
+    return size
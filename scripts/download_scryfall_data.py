@@ -7,18 +7,37 @@ import sys
 import json
 import time
 import logging
+import zlib
 import argparse
+import urllib3
 from datetime import datetime, timedelta
 
+# Add the project root to the path so the module also works when run directly
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.compression import compression_for_path, transcode, uncompressed_size, zstd_available
+
 # Set up logger
 logger = logging.getLogger(__name__)
 
-def get_latest_all_cards_url():
+# Default name of the downloaded bulk data file; stored gzip-compressed
+SCRYFALL_DATA_FILENAME = "scryfall_data.json.gz"
+
+# Scryfall bulk data types that can be downloaded, smallest first.
+# unique_artwork keeps a single printing per artwork, so Secret Lair reprints
+# of existing art can be missing from it; default_cards has every printing
+# (in English where available) and is the smallest type with all SLD cards.
+BULK_TYPES = ('unique_artwork', 'default_cards', 'all_cards')
+DEFAULT_BULK_TYPE = 'default_cards'
+
+def get_latest_bulk_data_info(bulk_type='all_cards'):
     """
-    Query the Scryfall Bulk Data API to get the URL for the latest all_cards data file
+    Query the Scryfall Bulk Data API for the metadata of the latest bulk data file
+    
+    Args:
+        bulk_type (str): The bulk data type to look up (e.g. "all_cards")
     
     Returns:
-        str: URL of the latest all_cards file, or None if not found
+        dict: The bulk data object (download_uri, size, updated_at, ...), or None if not found
     """
     logger.info("Fetching information about the latest Scryfall bulk data...")
     api_url = "https://api.scryfall.com/bulk-data"
@@ -29,21 +48,76 @@ def get_latest_all_cards_url():
         
         data = response.json()
         
-        # Find the all_cards data object
+        # Find the requested bulk data object
         for item in data.get('data', []):
-            if item.get('type') == 'all_cards':
-                download_url = item.get('download_uri')
-                logger.info(f"Found latest all_cards data (updated: {item.get('updated_at')})")
+            if item.get('type') == bulk_type:
+                logger.info(f"Found latest {bulk_type} data (updated: {item.get('updated_at')})")
                 logger.info(f"Size: {item.get('size') / (1024 * 1024):.2f} MB")
-                return download_url
+                return item
                 
-        logger.error("Could not find all_cards data in the Scryfall bulk data response")
+        logger.error(f"Could not find {bulk_type} data in the Scryfall bulk data response")
         return None
         
     except requests.exceptions.RequestException as e:
         logger.error(f"Error fetching Scryfall bulk data information: {e}")
         return None
 
+def get_latest_all_cards_url():
+    """
+    Query the Scryfall Bulk Data API to get the URL for the latest all_cards data file
+    
+    Returns:
+        str: URL of the latest all_cards file, or None if not found
+    """
+    info = get_latest_bulk_data_info('all_cards')
+    return info.get('download_uri') if info else None
+
+def manifest_path(filepath):
+    """Path of the sidecar manifest describing a downloaded data file"""
+    return filepath + ".manifest.json"
+
+def load_manifest(filepath):
+    """
+    Load the manifest recorded when a data file was downloaded
+    
+    Args:
+        filepath (str): Path to the downloaded data file
+        
+    Returns:
+        dict: The bulk data metadata and HTTP validators, or None if there is no valid manifest
+    """
+    try:
+        with open(manifest_path(filepath), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if isinstance(manifest, dict) else None
+
+def save_manifest(filepath, manifest):
+    """Atomically write the manifest for a downloaded data file"""
+    path = manifest_path(filepath)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+def is_manifest_current(manifest, info, filepath):
+    """
+    Check whether a downloaded file matches the latest bulk data on Scryfall
+    
+    Args:
+        manifest (dict): Manifest of the file on disk, or None
+        info (dict): Latest bulk data object from the Scryfall API
+        filepath (str): Path to the downloaded data file
+        
+    Returns:
+        bool: True if the file exists, is intact and has the same bulk type and updated_at as ``info``
+    """
+    if not manifest or not info.get('updated_at') or not os.path.exists(filepath):
+        return False
+    return (manifest.get('type') == info.get('type')
+            and manifest.get('updated_at') == info.get('updated_at')
+            and manifest.get('file_size') == os.path.getsize(filepath))
+
 def is_file_recent(filepath, hours=24):
     """
     Check if a file exists and has been modified within the specified number of hours
@@ -69,67 +143,309 @@ def is_file_recent(filepath, hours=24):
     
     return False
 
-def download_scryfall_data(url=None, directory="data", filename="scryfall_data.json"):
+# Size of each read from the download stream. Bytes from a read interrupted by a
+# dropped connection are lost, so this bounds the data re-fetched per retry.
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+class IncompleteDownloadError(Exception):
+    """Raised when a transfer ends before the expected number of bytes was received"""
+
+def _load_partial_info(info_path):
+    """Load the URL and validator recorded for a partial download, or None"""
+    try:
+        with open(info_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _discard_partial(part_path, info_path):
+    """Remove a partial download and its metadata"""
+    for path in (part_path, info_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+def _expected_total_size(response, offset):
+    """Work out the full file size from a (possibly partial) response's headers"""
+    content_range = response.headers.get('content-range', '')
+    if response.status_code == 206 and '/' in content_range:
+        total = content_range.rsplit('/', 1)[1]
+        if total.isdigit():
+            return int(total)
+    content_length = response.headers.get('content-length')
+    if content_length and content_length.isdigit():
+        return offset + int(content_length)
+    return None
+
+def _is_retryable(error):
+    """Check whether a failed download attempt is worth retrying"""
+    response = getattr(error, 'response', None)
+    if response is None:
+        return True
+    # Client errors other than timeouts and rate limiting will not go away on retry
+    return not (400 <= response.status_code < 500) or response.status_code in (408, 429)
+
+def _download_to_part(url, part_path, info_path, filename, conditional_headers=None):
+    """
+    Download (or resume downloading) ``url`` into ``part_path``
+    
+    The bytes are stored exactly as transferred: with gzip transfer encoding the
+    partial file is the gzip stream itself, so resume offsets and sizes refer to
+    what the server sent.
+    
+    Args:
+        conditional_headers (dict): If-None-Match/If-Modified-Since headers for the
+            file already on disk; only sent when not resuming a partial download
+    
+    Returns:
+        dict: The recorded transfer details (url, validators, content_encoding,
+            total_size), or None if the server reported that the file on disk is current
+        
+    Raises:
+        requests.exceptions.RequestException: On HTTP or connection errors
+        urllib3.exceptions.HTTPError: If the connection drops while reading
+        IncompleteDownloadError: If the transfer ended early
+    """
+    # A partial file can only be resumed if it belongs to the same URL
+    partial_info = _load_partial_info(info_path)
+    if os.path.exists(part_path) and (not partial_info or partial_info.get('url') != url):
+        logger.info("Discarding partial download of a different file")
+        _discard_partial(part_path, info_path)
+        partial_info = None
+    
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    known_total = (partial_info or {}).get('total_size')
+    if known_total is not None and offset > known_total:
+        logger.warning("Partial download is larger than expected, restarting")
+        _discard_partial(part_path, info_path)
+        offset = 0
+    
+    # Ask for gzip transfer encoding; the compressed bytes are what we store
+    headers = {'Accept-Encoding': 'gzip'}
+    if offset:
+        headers['Range'] = f"bytes={offset}-"
+        # If the file changed since the partial download started, the server
+        # ignores the range and sends the whole new file instead
+        validator = (partial_info or {}).get('validator')
+        if validator:
+            headers['If-Range'] = validator
+    elif conditional_headers:
+        headers.update(conditional_headers)
+    
+    with requests.get(url, stream=True, headers=headers, timeout=60) as response:
+        if response.status_code == 304 and not offset:
+            return None
+        if response.status_code == 416 and offset:
+            if offset == known_total:
+                # The previous attempt already received every byte
+                return partial_info
+            _discard_partial(part_path, info_path)
+            raise IncompleteDownloadError("server rejected the resume range")
+        response.raise_for_status()
+        
+        content_encoding = response.headers.get('content-encoding', '').strip().lower() or None
+        if content_encoding == 'identity':
+            content_encoding = None
+        if content_encoding not in (None, 'gzip'):
+            raise requests.exceptions.ContentDecodingError(f"Unsupported content encoding: {content_encoding}")
+        
+        if offset and response.status_code != 206:
+            logger.info("Server did not resume the partial download, starting over")
+            offset = 0
+        elif offset and partial_info.get('content_encoding') != content_encoding:
+            _discard_partial(part_path, info_path)
+            raise IncompleteDownloadError("content encoding changed while resuming")
+        elif offset:
+            logger.info(f"Resuming download at {offset / (1024 * 1024):.2f} MB")
+        
+        partial_info = {
+            'url': url,
+            'etag': response.headers.get('etag'),
+            'last_modified': response.headers.get('last-modified'),
+            'validator': response.headers.get('etag') or response.headers.get('last-modified'),
+            'content_encoding': content_encoding,
+            'total_size': _expected_total_size(response, offset)
+        }
+        with open(info_path, 'w', encoding='utf-8') as f:
+            json.dump(partial_info, f)
+        
+        # Download the file with progress bar
+        total_size = partial_info['total_size']
+        with open(part_path, 'ab' if offset else 'wb') as file, tqdm(
+            desc=filename,
+            total=total_size,
+            initial=offset,
+            unit='B',
+            unit_scale=True,
+            unit_divisor=1024,
+            disable=logger.level > logging.INFO  # Only show progress bar if not in debug mode
+        ) as progress_bar:
+            for data in response.raw.stream(DOWNLOAD_CHUNK_SIZE, decode_content=False):
+                file.write(data)
+                progress_bar.update(len(data))
+    
+    size = os.path.getsize(part_path)
+    if total_size is not None and size < total_size:
+        raise IncompleteDownloadError(f"received {size} of {total_size} bytes")
+    if total_size is not None and size > total_size:
+        _discard_partial(part_path, info_path)
+        raise IncompleteDownloadError(f"received {size} bytes, more than the expected {total_size}")
+    return partial_info
+
+def _verify_part(part_path, info_path, content_encoding, expected_size):
+    """
+    Check a completed partial download against the expected uncompressed size
+    
+    Compressed transfers are fully decompressed, which also verifies their checksums.
+    
+    Raises:
+        IncompleteDownloadError: If the data is corrupt or has the wrong size; the
+            partial file is discarded so the next attempt starts over
+    """
+    if content_encoding is None and expected_size is None:
+        return
+    try:
+        if content_encoding is None:
+            size = os.path.getsize(part_path)
+        else:
+            size = uncompressed_size(part_path, content_encoding)
+    except (OSError, EOFError, zlib.error) as e:
+        _discard_partial(part_path, info_path)
+        raise IncompleteDownloadError(f"downloaded data is corrupt: {e}")
+    if expected_size is not None and size != expected_size:
+        _discard_partial(part_path, info_path)
+        raise IncompleteDownloadError(f"downloaded {size} bytes of data, expected {expected_size}")
+
+def download_scryfall_data(url=None, directory="data", filename=SCRYFALL_DATA_FILENAME,
+                           expected_size=None, max_retries=5, backoff=2.0, bulk_type=DEFAULT_BULK_TYPE):
     """
     Download the bulk data from Scryfall and save it to the specified directory
     
+    A manifest saved next to the file records Scryfall's updated_at and the
+    response's ETag/Last-Modified. The download is skipped when Scryfall reports
+    the same updated_at, and otherwise made conditional on those validators.
+    
+    The file is downloaded to a ``.part`` file next to the destination, resumed
+    with HTTP range requests after connection failures, checked against the
+    expected size and only then renamed into place, so an interrupted download
+    never looks like a complete data file.
+    
+    The transfer uses gzip encoding when the server supports it. The file is
+    stored compressed according to the extension of ``filename`` (".gz" or
+    ".zst"); any other name stores plain JSON.
+    
     Args:
         url (str): The URL of the Scryfall bulk data, or None to fetch latest
         directory (str): The directory to save the file to
         filename (str): The name of the file to save the data as
+        expected_size (int): Expected uncompressed size in bytes; taken from the bulk
+            data API when no URL is given, otherwise from the response headers
+        max_retries (int): Number of times to retry after a failed attempt
+        backoff (float): Delay in seconds before the first retry, doubled on each retry
+        bulk_type (str): The Scryfall bulk data type to download when no URL is given
     """
+    if bulk_type not in BULK_TYPES:
+        logger.error(f"Unknown bulk data type '{bulk_type}', expected one of: {', '.join(BULK_TYPES)}")
+        return None
+    
     # Create the directory if it doesn't exist
     os.makedirs(directory, exist_ok=True)
     
     # Full path to the file
     filepath = os.path.join(directory, filename)
+    if compression_for_path(filepath) == 'zstd' and not zstd_available():
+        logger.error("Storing the file with zstd compression requires the zstandard package")
+        return None
+    manifest = load_manifest(filepath) if os.path.exists(filepath) else None
     
-    # Check if the file already exists and is recent (within the last 24 hours)
-    if is_file_recent(filepath):
-        file_mtime = os.path.getmtime(filepath)
-        file_time = datetime.fromtimestamp(file_mtime)
-        logger.info(f"Scryfall data file already exists and is recent (last updated: {file_time.strftime('%Y-%m-%d %H:%M:%S')})")
-        logger.info(f"Skipping download. Use --force flag to override.")
-        return filepath
-    
-    # If no URL is provided, get the latest all_cards URL
+    # If no URL is provided, ask Scryfall for the latest file of the bulk type. When
+    # its updated_at matches the file we already have, there is nothing to download.
+    info = None
     if not url:
-        url = get_latest_all_cards_url()
+        info = get_latest_bulk_data_info(bulk_type)
+        if info is None:
+            # Without the API we can't tell whether our copy is current; keep using it if it's fairly new
+            if is_file_recent(filepath):
+                logger.warning("Could not check Scryfall for updates, using the existing data file")
+                return filepath
+        elif is_manifest_current(manifest, info, filepath):
+            logger.info(f"Scryfall data file is up to date (updated: {info.get('updated_at')})")
+            logger.info(f"Skipping download. Use --force flag to override.")
+            return filepath
+        else:
+            url = info.get('download_uri')
+            expected_size = expected_size or info.get('size')
         
     if not url:
         logger.error("No valid URL available for download")
         return None
     
+    # Let the server confirm that the file we have from this URL is still current
+    conditional_headers = {}
+    if manifest and manifest.get('download_uri') == url:
+        if manifest.get('etag'):
+            conditional_headers['If-None-Match'] = manifest['etag']
+        if manifest.get('last_modified'):
+            conditional_headers['If-Modified-Since'] = manifest['last_modified']
+    
     logger.info(f"Downloading Scryfall bulk data from: {url}")
     logger.info(f"This file will be saved to: {filepath}")
     
-    try:
-        # Make a streaming GET request
-        response = requests.get(url, stream=True)
-        response.raise_for_status()  # Raise an exception for HTTP errors
-        
-        # Get the total file size in bytes
-        total_size = int(response.headers.get('content-length', 0))
-        
-        # Download the file with progress bar
-        with open(filepath, 'wb') as file, tqdm(
-            desc=filename,
-            total=total_size,
-            unit='B',
-            unit_scale=True,
-            unit_divisor=1024,
-            disable=logger.level > logging.INFO  # Only show progress bar if not in debug mode
-        ) as progress_bar:
-            for data in response.iter_content(chunk_size=1024 * 1024):  # 1MB chunks
-                file.write(data)
-                progress_bar.update(len(data))
-        
-        logger.info(f"Download complete! File saved to {filepath}")
+    part_path = filepath + ".part"
+    info_path = part_path + ".json"
+    attempt = 0
+    while True:
+        try:
+            transfer = _download_to_part(url, part_path, info_path, filename, conditional_headers)
+            if transfer is not None:
+                _verify_part(part_path, info_path, transfer.get('content_encoding'), expected_size)
+            break
+        except (requests.exceptions.RequestException, urllib3.exceptions.HTTPError, IncompleteDownloadError) as e:
+            attempt += 1
+            if attempt > max_retries or not _is_retryable(e):
+                logger.error(f"Error downloading file: {e}")
+                return None
+            delay = backoff * 2 ** (attempt - 1)
+            logger.warning(f"Download attempt {attempt} failed ({e}), retrying in {delay:.1f} seconds")
+            time.sleep(delay)
+    
+    if transfer is None:
+        logger.info("Scryfall data file has not changed on the server, keeping the existing file")
+        if info and manifest:
+            manifest.update(updated_at=info.get('updated_at'), size=info.get('size'))
+            save_manifest(filepath, manifest)
         return filepath
     
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error downloading file: {e}")
-        return None
+    # Only a complete, verified file is moved to the final path. When the stored
+    # format differs from the transfer encoding it is converted on the way.
+    content_encoding = transfer.get('content_encoding')
+    compression = compression_for_path(filepath)
+    if compression == content_encoding:
+        os.replace(part_path, filepath)
+    else:
+        logger.info(f"Storing data with {compression or 'no'} compression...")
+        transcode(part_path, content_encoding, filepath + ".tmp", compression)
+        os.replace(filepath + ".tmp", filepath)
+    _discard_partial(part_path, info_path)
+    
+    size = os.path.getsize(filepath)
+    save_manifest(filepath, {
+        'type': info.get('type') if info else None,
+        'updated_at': info.get('updated_at') if info else None,
+        'size': info.get('size') if info else None,
+        'download_uri': url,
+        'etag': transfer.get('etag'),
+        'last_modified': transfer.get('last_modified'),
+        'compression': compression,
+        'file_size': size,
+        'downloaded_at': datetime.now().isoformat(timespec='seconds')
+    })
+    logger.info(f"Download complete! File saved to {filepath} ({size} bytes)")
+    return filepath
+
+def scryfall_filename(compression='gzip'):
+    """Get the data file name for a storage compression ("gzip", "zstd" or "none")"""
+    extensions = {'gzip': '.gz', 'zstd': '.zst', 'none': ''}
+    return "scryfall_data.json" + extensions[compression]
 
 def setup_logging(verbose=False):
     """Configure logging based on verbosity level"""
@@ -148,17 +464,26 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Download Scryfall bulk card data')
     parser.add_argument('url', nargs='?', help='Optional URL to download from (if not provided, uses Scryfall API)')
     parser.add_argument('--force', '-f', action='store_true', help='Force download even if recent file exists')
+    parser.add_argument('--bulk-type', choices=BULK_TYPES, default=DEFAULT_BULK_TYPE,
+                        help=f'Scryfall bulk data type to download (default: {DEFAULT_BULK_TYPE})')
+    parser.add_argument('--compression', choices=['gzip', 'zstd', 'none'], default='gzip',
+                        help='How to compress the stored file (zstd requires the zstandard package)')
     parser.add_argument('--verbose', '-v', action='store_true', help='Enable verbose debug output')
     args = parser.parse_args()
     
     # Set up logging based on verbosity
     setup_logging(args.verbose)
     
+    if args.compression == 'zstd' and not zstd_available():
+        logger.warning("The zstandard package is not installed, storing the file with gzip instead")
+        args.compression = 'gzip'
+    filename = scryfall_filename(args.compression)
+    
     # If force flag is specified, delete the existing file if it exists
     if args.force:
-        filepath = os.path.join("data", "scryfall_data.json")
+        filepath = os.path.join("data", filename)
         if os.path.exists(filepath):
             logger.info(f"Force flag specified, removing existing file {filepath}")
             os.remove(filepath)
     
-    download_scryfall_data(args.url)
\ No newline at end of file
+    download_scryfall_data(args.url, filename=filename, bulk_type=args.bulk_type)
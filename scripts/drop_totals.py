@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+# Price fields summed into each drop's totals
+TOTAL_PRICE_FIELDS = ('usd', 'usd_foil', 'eur', 'eur_foil')
+
+def parse_price(value):
+    """Convert a Scryfall price string to a float, or None if it is missing or invalid"""
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+def compute_drop_totals(cards):
+    """
+    Compute aggregate values for a drop's cards
+
+    Args:
+        cards (list): Cards in the format stored in secret_lairs.json
+
+    Returns:
+        dict: card_count, the summed value of each price field (rounded to cents)
+            and, for each price field, the number of cards with no price
+    """
+    totals = {"card_count": len(cards)}
+    for field in TOTAL_PRICE_FIELDS:
+        total = 0.0
+        missing = 0
+        for card in cards:
+            price = parse_price((card.get("prices") or {}).get(field))
+            if price is None:
+                missing += 1
+            else:
+                total += price
+        totals[field] = round(total, 2)
+        totals[f"missing_{field}"] = missing
+    return totals
+
+def add_drop_totals(secret_lairs, overwrite=False):
+    """
+    Add a "totals" entry to every drop that does not already have one
+
+    Args:
+        secret_lairs (list): Secret Lair drops, modified in place
+        overwrite (bool): Whether to recompute totals that are already present
+
+    Returns:
+        list: The same list of drops
+    """
+    for drop in secret_lairs:
+        if overwrite or "totals" not in drop:
+            drop["totals"] = compute_drop_totals(drop.get("cards") or [])
+    return secret_lairs
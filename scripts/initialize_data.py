@@ -5,21 +5,97 @@ import sys
 import time
 import logging
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 # Update imports to use fully qualified paths
-from scripts.download_scryfall_data import download_scryfall_data, setup_logging
-from scripts.scrape_secret_lairs import scrape_secret_lairs, save_to_json
+from scripts.download_scryfall_data import (download_scryfall_data, setup_logging, SCRYFALL_DATA_FILENAME,
+                                            BULK_TYPES, DEFAULT_BULK_TYPE)
+from scripts.scrape_secret_lairs import (fetch_secret_lairs, match_secret_lairs, save_to_json, find_incomplete_drops,
+                                         load_previous_secret_lairs, refresh_prices)
+from scripts.card_store import save_to_sqlite
+from scripts.binary_snapshot import save_to_snapshot
+from scripts.price_history import record_price_history
+from scripts.scryfall_collection import refresh_prices_from_api
 
 # Set up logger
 logger = logging.getLogger(__name__)
 
-def initialize_data_directory(verbose=False, force=False):
+def report_incomplete_drops(secret_lairs, bulk_type):
+    """
+    Log the drops with collector numbers missing from the downloaded bulk data
+    
+    Args:
+        secret_lairs (list): Scraped Secret Lair drops
+        bulk_type (str): The Scryfall bulk data type the drops were matched against
+        
+    Returns:
+        list: (drop, missing collector numbers) tuples from find_incomplete_drops
+    """
+    incomplete = find_incomplete_drops(secret_lairs)
+    if not incomplete:
+        logger.info(f"All listed Secret Lair cards were found in the {bulk_type} bulk data")
+        return incomplete
+    
+    logger.warning(f"{len(incomplete)} drops have cards missing from the {bulk_type} bulk data:")
+    for drop, missing in incomplete:
+        logger.warning(f"  {drop.get('drop_number')} {drop.get('name')}: {', '.join(str(n) for n in missing)}")
+    if bulk_type != BULK_TYPES[-1]:
+        logger.warning(f"These cards may only be present in a larger bulk file, try --bulk-type {BULK_TYPES[-1]}")
+    return incomplete
+
+def download_stage(data_dir, force=False, bulk_type=DEFAULT_BULK_TYPE):
+    """
+    Download the Scryfall bulk data into the data directory
+    
+    Returns:
+        str: Path to the downloaded file, or None if the download failed
+    """
+    # If force flag is specified and the file exists, delete it
+    if force:
+        filepath = os.path.join(data_dir, SCRYFALL_DATA_FILENAME)
+        if os.path.exists(filepath):
+            logger.info(f"Force flag specified, removing existing file {filepath}")
+            os.remove(filepath)
+    
+    scryfall_file = download_scryfall_data(directory=data_dir, bulk_type=bulk_type)
+    if scryfall_file:
+        # Older versions stored the bulk data uncompressed; it is no longer used
+        legacy_filepath = os.path.join(data_dir, "scryfall_data.json")
+        if os.path.exists(legacy_filepath):
+            logger.info(f"Removing uncompressed Scryfall data file {legacy_filepath}")
+            os.remove(legacy_filepath)
+    return scryfall_file
+
+def _timed(timings, stage, func, *args, **kwargs):
+    """Call ``func`` and record its wall-clock time in seconds under ``timings[stage]``"""
+    start_time = time.time()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        timings[stage] = time.time() - start_time
+
+def save_secret_lairs(secret_lairs, data_dir):
+    """Save the matched drops as JSON, SQLite and a binary snapshot, and add their prices to the price history"""
+    save_to_json(secret_lairs, directory=data_dir)
+    save_to_sqlite(secret_lairs, directory=data_dir)
+    save_to_snapshot(secret_lairs, directory=data_dir)
+    record_price_history(secret_lairs, directory=data_dir)
+
+def initialize_data_directory(verbose=False, force=False, bulk_type=DEFAULT_BULK_TYPE):
     """
     Initialize the data directory by downloading Scryfall data and scraping Secret Lair information.
     This creates all the necessary data files for the MTG Inventory Manager.
     
+    The Scryfall download and the mtg.wiki scrape are independent, so they run
+    concurrently; card matching starts once both have finished. The total time
+    is close to that of the slower of the two instead of their sum.
+    
+    Drops whose wiki row is unchanged since the last run keep their cards and
+    only get fresh prices, unless ``force`` is set.
+    
     Args:
         verbose (bool): Whether to show verbose debug output
-        force (bool): Whether to force download even if recent file exists
+        force (bool): Whether to force download even if recent file exists, and match every drop again
+        bulk_type (str): The Scryfall bulk data type to download (see BULK_TYPES)
     """
     # Configure logging based on verbosity
     setup_logging(verbose)
@@ -33,52 +109,53 @@ def initialize_data_directory(verbose=False, force=False):
     os.makedirs(data_dir, exist_ok=True)
     
     success = True
+    timings = {}
+    start_time = time.time()
     
-    # Step 1: Download Scryfall bulk data
-    logger.info("\n[Step 1/2] Downloading Scryfall card data")
+    # Step 1: Download Scryfall bulk data while scraping the Secret Lair list
+    logger.info("\n[Step 1/2] Downloading Scryfall card data and scraping Secret Lair data")
     logger.info("-" * 60)
-    start_time = time.time()
-    try:
-        # If force flag is specified and the file exists, delete it
-        if force:
-            filepath = os.path.join(data_dir, "scryfall_data.json")
-            if os.path.exists(filepath):
-                logger.info(f"Force flag specified, removing existing file {filepath}")
-                os.remove(filepath)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        download_future = executor.submit(_timed, timings, "download", download_stage, data_dir, force, bulk_type)
+        scrape_future = executor.submit(_timed, timings, "scrape", fetch_secret_lairs)
         
-        scryfall_file = download_scryfall_data(directory=data_dir)
-        if not scryfall_file:
-            logger.warning("Failed to download Scryfall data")
+        try:
+            if not download_future.result():
+                logger.warning("Failed to download Scryfall data")
+                success = False
+        except Exception as e:
+            logger.error(f"Exception occurred while downloading Scryfall data: {e}", exc_info=verbose)
             success = False
-    except Exception as e:
-        logger.error(f"Exception occurred while downloading Scryfall data: {e}", exc_info=verbose)
-        success = False
-    
-    elapsed_time = time.time() - start_time
-    logger.info(f"Scryfall download completed in {elapsed_time:.1f} seconds")
+        
+        secret_lairs = None
+        try:
+            secret_lairs = scrape_future.result()
+        except Exception as e:
+            logger.error(f"Exception occurred while scraping Secret Lair data: {e}", exc_info=verbose)
     
-    # Step 2: Scrape Secret Lair data
-    logger.info("\n[Step 2/2] Scraping Secret Lair data")
+    # Step 2: Match the drops with the Scryfall data and save them
+    logger.info("\n[Step 2/2] Matching Secret Lair cards with Scryfall data")
     logger.info("-" * 60)
-    start_time = time.time()
-    try:
-        # Use the match_with_scryfall option to add card details from Scryfall
-        secret_lairs = scrape_secret_lairs(match_with_scryfall=True, 
-                                           scryfall_filepath=os.path.join(data_dir, "scryfall_data.json"))
-        if secret_lairs:
-            save_to_json(secret_lairs, directory=data_dir)
-        else:
-            logger.warning("Failed to scrape Secret Lair data")
+    if secret_lairs:
+        try:
+            # Drops unchanged since the last run reuse their cards; --force matches everything again
+            previous = None if force else load_previous_secret_lairs(os.path.join(data_dir, "secret_lairs.json"))
+            _timed(timings, "match", match_secret_lairs, secret_lairs,
+                   scryfall_filepath=os.path.join(data_dir, SCRYFALL_DATA_FILENAME), previous=previous)
+            _timed(timings, "save", save_secret_lairs, secret_lairs, data_dir)
+            if any(drop.get("cards") for drop in secret_lairs):
+                report_incomplete_drops(secret_lairs, bulk_type)
+        except Exception as e:
+            logger.error(f"Exception occurred while matching Secret Lair data: {e}", exc_info=verbose)
             success = False
-    except Exception as e:
-        logger.error(f"Exception occurred while scraping Secret Lair data: {e}", exc_info=verbose)
+    else:
+        logger.warning("Failed to scrape Secret Lair data")
         success = False
-    
-    elapsed_time = time.time() - start_time
-    logger.info(f"Secret Lair scraping completed in {elapsed_time:.1f} seconds")
+    timings["total"] = time.time() - start_time
     
     # Final status
     logger.info("\n" + "=" * 60)
+    logger.info("Stage timings: " + ", ".join(f"{stage} {elapsed:.1f}s" for stage, elapsed in timings.items()))
     if success:
         logger.info("Data initialization COMPLETED SUCCESSFULLY")
         logger.info(f"All data files have been saved to the '{data_dir}' directory")
@@ -89,11 +166,140 @@ def initialize_data_directory(verbose=False, force=False):
     
     return success
 
-if __name__ == "__main__":
+def refresh_data_prices(verbose=False, force=False, bulk_type=DEFAULT_BULK_TYPE):
+    """
+    Refresh the card prices of the saved Secret Lair data from the latest Scryfall data
+    
+    The wiki is not scraped and no cards are matched: the Scryfall file is
+    downloaded if it changed, then only the prices of the cards already in
+    secret_lairs.json are replaced and the drop totals recomputed.
+    
+    Args:
+        verbose (bool): Whether to show verbose debug output
+        force (bool): Whether to force download even if recent file exists
+        bulk_type (str): The Scryfall bulk data type to download (see BULK_TYPES)
+        
+    Returns:
+        bool: True if the prices were refreshed and saved
+    """
+    # Configure logging based on verbosity
+    setup_logging(verbose)
+    
+    logger.info("=" * 60)
+    logger.info("MTG INVENTORY MANAGER - PRICE REFRESH")
+    logger.info("=" * 60)
+    
+    data_dir = "data"
+    secret_lairs = load_previous_secret_lairs(os.path.join(data_dir, "secret_lairs.json"))
+    if secret_lairs is None:
+        logger.error("No saved Secret Lair data to refresh, run a full initialization first")
+        return False
+    
+    timings = {}
+    start_time = time.time()
+    success = True
+    try:
+        if not _timed(timings, "download", download_stage, data_dir, force, bulk_type):
+            logger.warning("Failed to download Scryfall data, refreshing from the existing file")
+        updated = _timed(timings, "prices", refresh_prices, secret_lairs,
+                         os.path.join(data_dir, SCRYFALL_DATA_FILENAME))
+        if updated is None:
+            success = False
+        else:
+            _timed(timings, "save", save_secret_lairs, secret_lairs, data_dir)
+    except Exception as e:
+        logger.error(f"Exception occurred while refreshing prices: {e}", exc_info=verbose)
+        success = False
+    timings["total"] = time.time() - start_time
+    
+    logger.info("Stage timings: " + ", ".join(f"{stage} {elapsed:.1f}s" for stage, elapsed in timings.items()))
+    if success:
+        logger.info("Price refresh COMPLETED SUCCESSFULLY")
+    else:
+        logger.warning("Price refresh FAILED, the saved data was not changed")
+    return success
+
+def refresh_api_prices(verbose=False):
+    """
+    Refresh the card prices of the saved Secret Lair data from the Scryfall API
+    
+    Neither the wiki nor the bulk data is downloaded: the cards already in
+    secret_lairs.json are requested in batches from Scryfall's collection
+    endpoint, which makes this cheap enough for intraday updates.
+    
+    Args:
+        verbose (bool): Whether to show verbose debug output
+        
+    Returns:
+        bool: True if the prices were refreshed and saved
+    """
+    # Configure logging based on verbosity
+    setup_logging(verbose)
+    
+    logger.info("=" * 60)
+    logger.info("MTG INVENTORY MANAGER - API PRICE REFRESH")
+    logger.info("=" * 60)
+    
+    data_dir = "data"
+    secret_lairs = load_previous_secret_lairs(os.path.join(data_dir, "secret_lairs.json"))
+    if secret_lairs is None:
+        logger.error("No saved Secret Lair data to refresh, run a full initialization first")
+        return False
+    
+    timings = {}
+    start_time = time.time()
+    success = True
+    try:
+        if _timed(timings, "prices", refresh_prices_from_api, secret_lairs) is None:
+            success = False
+        else:
+            _timed(timings, "save", save_secret_lairs, secret_lairs, data_dir)
+    except Exception as e:
+        logger.error(f"Exception occurred while refreshing prices: {e}", exc_info=verbose)
+        success = False
+    timings["total"] = time.time() - start_time
+    
+    logger.info("Stage timings: " + ", ".join(f"{stage} {elapsed:.1f}s" for stage, elapsed in timings.items()))
+    if success:
+        logger.info("Price refresh COMPLETED SUCCESSFULLY")
+    else:
+        logger.warning("Price refresh FAILED, the saved data was not changed")
+    return success
+
+def main(argv=None):
+    """
+    Command line entry point, shared by init_data.py and ``python -m scripts.initialize_data``
+    
+    Args:
+        argv (list): Command line arguments (default: sys.argv[1:])
+        
+    Returns:
+        int: Exit code - 0 on success, 1 on failure
+    """
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Initialize MTG Inventory Manager data')
     parser.add_argument('--force', '-f', action='store_true', help='Force download even if recent file exists')
     parser.add_argument('--verbose', '-v', action='store_true', help='Enable verbose debug output')
-    args = parser.parse_args()
+    parser.add_argument('--bulk-type', choices=BULK_TYPES, default=DEFAULT_BULK_TYPE,
+                        help=f'Scryfall bulk data type to download (default: {DEFAULT_BULK_TYPE})')
+    modes = parser.add_mutually_exclusive_group()
+    modes.add_argument('--prices-only', action='store_true',
+                       help='Only refresh the prices in the saved data, without scraping the wiki')
+    modes.add_argument('--api-prices', action='store_true',
+                       help='Only refresh the prices in the saved data from the Scryfall API, without the bulk data')
+    parser.add_argument('--export-static', nargs='?', const='', metavar='DIR',
+                        help='Export the web UI to static files afterwards (default directory: data/static)')
+    args = parser.parse_args(argv)
     
-    sys.exit(0 if initialize_data_directory(args.verbose, args.force) else 1)
\ No newline at end of file
+    if args.api_prices:
+        success = refresh_api_prices(args.verbose)
+    else:
+        run = refresh_data_prices if args.prices_only else initialize_data_directory
+        success = run(args.verbose, args.force, args.bulk_type)
+    if success and args.export_static is not None:
+        from export_static import export_static
+        success = export_static(args.export_static or None, "data", verbose=args.verbose) == 0
+    return 0 if success else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
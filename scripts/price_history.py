@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import math
+import mmap
+import struct
+import logging
+from array import array
+from datetime import date as Date, datetime, timezone
+
+# Add the project root to the path so the module also works when run directly
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.drop_totals import parse_price
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Directory of the price history, inside the data directory
+PRICE_HISTORY_DIRNAME = "price_history"
+
+# Price fields recorded for every card, one column file each
+HISTORY_FIELDS = ('usd', 'usd_foil', 'eur', 'eur_foil', 'tix')
+
+# One index record per snapshot: date ordinal, first row in the columns, number of rows
+SNAPSHOT_RECORD = struct.Struct('<iqi')
+
+# Prices are stored as little-endian float32 cents, with NaN for a missing price
+_VALUE = struct.Struct('<f')
+
+def price_to_cents(value):
+    """Convert a Scryfall price string to cents, or NaN if it is missing or invalid"""
+    price = parse_price(value)
+    return math.nan if price is None else round(price * 100)
+
+def _cents_to_price(cents):
+    return None if math.isnan(cents) else round(cents / 100, 2)
+
+class PriceHistory:
+    """
+    Append-only columnar store of daily card price snapshots
+
+    Every card gets a fixed slot the first time it is seen (``cards.txt``, one
+    Scryfall id per line). A snapshot appends one float32 per slot to each
+    price column (``<field>.f32``) and one record to ``snapshots.bin``, so the
+    price of a card on a given day is at a computed offset and a card's time
+    series is read in O(points) without touching other cards.
+
+    A snapshot for a date that already has one replaces it. The snapshot index
+    is written last, so rows left behind by an interrupted write are ignored
+    and overwritten by the next snapshot.
+    """
+
+    def __init__(self, directory=os.path.join("data", PRICE_HISTORY_DIRNAME)):
+        self.directory = directory
+        self._slots = {}
+        self._snapshots = []
+        self._load()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _load(self):
+        try:
+            with open(self._path("cards.txt"), 'r', encoding='utf-8') as f:
+                for slot, card_id in enumerate(f.read().splitlines()):
+                    self._slots[card_id] = slot
+        except FileNotFoundError:
+            pass
+        try:
+            with open(self._path("snapshots.bin"), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = b''
+        usable = len(data) - len(data) % SNAPSHOT_RECORD.size
+        self._snapshots = list(SNAPSHOT_RECORD.iter_unpack(data[:usable]))
+
+    def __len__(self):
+        return len(self._snapshots)
+
+    def dates(self):
+        """Get the dates of all snapshots, oldest first"""
+        return [Date.fromordinal(ordinal) for ordinal, _, _ in self._snapshots]
+
+    def append_snapshot(self, secret_lairs, date=None):
+        """
+        Record the current prices of every card in the given drops
+
+        Args:
+            secret_lairs (list): Secret Lair drops with matched cards
+            date (date): Date of the snapshot, defaults to today (UTC)
+
+        Returns:
+            int: Number of distinct cards recorded
+        """
+        date = date or datetime.now(timezone.utc).date()
+        prices_by_id = {}
+        for drop in secret_lairs:
+            for card in drop.get("cards") or []:
+                if card.get("id"):
+                    prices_by_id[card["id"]] = card.get("prices") or {}
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        # New cards get the next free slots
+        new_ids = [card_id for card_id in prices_by_id if card_id not in self._slots]
+        if new_ids:
+            with open(self._path("cards.txt"), 'a', encoding='utf-8') as f:
+                for card_id in new_ids:
+                    self._slots[card_id] = len(self._slots)
+                    f.write(card_id + "\n")
+
+        # A second snapshot on the same day replaces the first
+        if self._snapshots and self._snapshots[-1][0] == date.toordinal():
+            self._snapshots.pop()
+        if self._snapshots and self._snapshots[-1][0] > date.toordinal():
+            raise ValueError(f"Cannot add a snapshot for {date}, the history already goes up to {self.dates()[-1]}")
+        start = self._snapshots[-1][1] + self._snapshots[-1][2] if self._snapshots else 0
+        count = len(self._slots)
+
+        for field in HISTORY_FIELDS:
+            values = array('f', [math.nan]) * count
+            for card_id, prices in prices_by_id.items():
+                values[self._slots[card_id]] = price_to_cents(prices.get(field))
+            if sys.byteorder == 'big':
+                values.byteswap()
+            with open(self._path(f"{field}.f32"), 'ab') as f:
+                f.truncate(start * _VALUE.size)
+                values.tofile(f)
+
+        self._snapshots.append((date.toordinal(), start, count))
+        with open(self._path("snapshots.bin"), 'ab') as f:
+            f.truncate((len(self._snapshots) - 1) * SNAPSHOT_RECORD.size)
+            f.write(SNAPSHOT_RECORD.pack(*self._snapshots[-1]))
+
+        logger.info(f"Recorded prices of {len(prices_by_id)} cards for {date.isoformat()}")
+        return len(prices_by_id)
+
+    def _open_columns(self):
+        columns = {}
+        for field in HISTORY_FIELDS:
+            with open(self._path(f"{field}.f32"), 'rb') as f:
+                # mmap can't map an empty file; it only happens when no snapshot has any cards
+                empty = os.fstat(f.fileno()).st_size == 0
+                columns[field] = b'' if empty else mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return columns
+
+    def _series(self, columns, slot):
+        series = []
+        for ordinal, start, count in self._snapshots:
+            if slot >= count:
+                continue
+            offset = (start + slot) * _VALUE.size
+            prices = {field: _cents_to_price(_VALUE.unpack_from(columns[field], offset)[0])
+                      for field in HISTORY_FIELDS}
+            # Skip days on which the card was not part of any drop
+            if any(value is not None for value in prices.values()):
+                series.append(dict(date=Date.fromordinal(ordinal).isoformat(), **prices))
+        return series
+
+    def card_series(self, card_id):
+        """
+        Get the price history of a card
+
+        Args:
+            card_id (str): Scryfall id of the card
+
+        Returns:
+            list: One dict per snapshot containing the card, oldest first, with "date"
+                and each price field in dollars (None when missing)
+        """
+        return self.cards_series([card_id]).get(card_id, [])
+
+    def cards_series(self, card_ids):
+        """Get the price history of several cards, as a dict of card_series results by card id"""
+        slots = {card_id: self._slots[card_id] for card_id in card_ids if card_id in self._slots}
+        if not slots or not self._snapshots:
+            return {}
+        columns = self._open_columns()
+        try:
+            return {card_id: self._series(columns, slot) for card_id, slot in slots.items()}
+        finally:
+            for column in columns.values():
+                if isinstance(column, mmap.mmap):
+                    column.close()
+
+    def drop_series(self, drop):
+        """
+        Get the history of a drop's total value
+
+        Args:
+            drop (dict): A Secret Lair drop with matched cards
+
+        Returns:
+            list: One dict per snapshot, oldest first, with "date", the summed value of
+                each price field and "missing_<field>" counts of cards without a price
+        """
+        card_ids = [card.get("id") for card in drop.get("cards") or [] if card.get("id")]
+        totals = {}
+        for series in self.cards_series(card_ids).values():
+            for point in series:
+                total = totals.get(point["date"])
+                if total is None:
+                    total = {"date": point["date"]}
+                    for field in HISTORY_FIELDS:
+                        total[field] = 0.0
+                        total[f"missing_{field}"] = 0
+                    totals[point["date"]] = total
+                for field in HISTORY_FIELDS:
+                    if point[field] is None:
+                        total[f"missing_{field}"] += 1
+                    else:
+                        total[field] += point[field]
+        
+        series = [totals[day] for day in sorted(totals)]
+        for total in series:
+            for field in HISTORY_FIELDS:
+                total[field] = round(total[field], 2)
+        return series
+
+def record_price_history(secret_lairs, directory="data"):
+    """Append today's prices of the drops' cards to the price history in the data directory"""
+    return PriceHistory(os.path.join(directory, PRICE_HISTORY_DIRNAME)).append_snapshot(secret_lairs)
@@ -1,264 +1,738 @@
 #!/usr/bin/env python3
 
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from html.parser import HTMLParser
 import json
 import re
+import hashlib
 import os
+import sys
 import logging
 import argparse
 
+# Add the project root to the path so the module also works when run directly
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.card_index import CardIndex, IntervalSet, parse_collector_number
+from scripts.card_store import save_to_sqlite
+from scripts.binary_snapshot import save_to_snapshot
+from scripts.drop_totals import add_drop_totals
+from scripts.compression import open_text
+from scripts.price_history import record_price_history
+
 # Set up logger
 logger = logging.getLogger(__name__)
 
-def load_scryfall_data(filepath="data/scryfall_data.json"):
-    """Load the Scryfall card data from the JSON file"""
+# Fields copied from each Scryfall card into a drop's card list
+SCRYFALL_CARD_FIELDS = ('name', 'collector_number', 'set', 'id', 'image_uris', 'prices')
+
+# mtg.wiki page listing every Secret Lair drop
+DROP_SERIES_URL = "https://mtg.wiki/page/Secret_Lair/Drop_Series"
+
+# lxml is optional; without it the stdlib streaming parser is used
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+def _has_wikitable_class(class_attribute):
+    # While parsing, the strainer sees the raw attribute (e.g. "wikitable sortable")
+    return class_attribute is not None and 'wikitable' in class_attribute.split()
+
+# Only the wiki tables are built into a tree; the rest of the page is skipped while parsing
+WIKITABLE_STRAINER = SoupStrainer('table', class_=_has_wikitable_class)
+
+# XPath of the first wikitable on a page, for the lxml backend
+_WIKITABLE_XPATH = "(//table[contains(concat(' ', normalize-space(@class), ' '), ' wikitable ')])[1]"
+
+# JSON insignificant whitespace, used to skip between array elements
+_JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+# Characters that can follow a complete number inside an array
+_JSON_NUMBER_TERMINATORS = frozenset(',] \t\n\r')
+
+def iter_json_array(fileobj, chunk_size=1024 * 1024):
+    """
+    Incrementally decode a top-level JSON array, yielding one element at a time.
+    
+    Only the current read chunk and the element being decoded are held in memory,
+    so arbitrarily large files can be processed in constant space.
+    
+    Args:
+        fileobj: A text-mode file object positioned at the start of the array
+        chunk_size (int): Number of characters to read per chunk
+        
+    Yields:
+        The decoded array elements, in order
+        
+    Raises:
+        json.JSONDecodeError: If the input is not a well-formed JSON array
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+    
+    def read_more():
+        """Append the next chunk to the unconsumed part of the buffer"""
+        nonlocal buffer, pos, eof
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+    
+    def next_char():
+        """Skip whitespace and return the next significant character, or None at EOF"""
+        nonlocal pos
+        while True:
+            pos = _JSON_WHITESPACE.match(buffer, pos).end()
+            if pos < len(buffer):
+                return buffer[pos]
+            if not read_more():
+                return None
+    
+    def error(message):
+        return json.JSONDecodeError(message, buffer, pos)
+    
+    if next_char() != '[':
+        raise error("Expecting '['")
+    pos += 1
+    
+    if next_char() == ']':
+        return
+    
+    while True:
+        if next_char() is None:
+            raise error("Unterminated array")
+        
+        # Decode the next element, pulling in more input while it is incomplete.
+        # A value ending exactly at the end of the buffer may be a truncated
+        # scalar (e.g. "12" of "123"), so it is only accepted once more input
+        # has been read or the file is exhausted. A number is also cut short
+        # when the buffer ends inside its fraction or exponent ("1" of "1.5e10"),
+        # so it is only accepted once it is followed by a character that ends it.
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof or not read_more():
+                    raise
+                continue
+            if end == len(buffer) and not eof and read_more():
+                continue
+            if (isinstance(value, (int, float)) and not isinstance(value, bool)
+                    and buffer[end:end + 1] not in _JSON_NUMBER_TERMINATORS and not eof and read_more()):
+                continue
+            break
+        pos = end
+        yield value
+        
+        separator = next_char()
+        if separator == ']':
+            return
+        if separator != ',':
+            raise error("Expecting ',' delimiter")
+        pos += 1
+
+def iter_scryfall_cards(filepath="data/scryfall_data.json.gz", predicate=None, fields=None):
+    """
+    Stream cards from a Scryfall bulk data file without loading the whole file
+    
+    Compressed files (gzip or zstd) are decompressed on the fly while parsing.
+    
+    Args:
+        filepath (str): Path to the Scryfall bulk data JSON file, optionally compressed
+        predicate (callable): Optional function taking a card dict; cards for which
+            it returns a falsy value are skipped
+        fields (iterable): Optional card fields to keep; all others are dropped
+            
+    Yields:
+        dict: Each matching card, projected to the requested fields
+    """
+    with open_text(filepath) as f:
+        for card in iter_json_array(f):
+            if predicate is not None and not predicate(card):
+                continue
+            if fields is not None:
+                card = {field: card[field] for field in fields if field in card}
+            yield card
+
+def set_code_predicate(set_codes):
+    """Build a card predicate matching any of the given set codes (case-insensitive)"""
+    wanted = {code.lower() for code in set_codes}
+    return lambda card: card.get('set', '') in wanted
+
+def load_scryfall_data(filepath="data/scryfall_data.json.gz", predicate=None, fields=None):
+    """
+    Load the Scryfall card data from the JSON file
+    
+    The file is streamed, so memory use is bounded by the cards kept after
+    applying ``predicate`` and ``fields`` rather than by the size of the file.
+    
+    Args:
+        filepath (str): Path to the Scryfall bulk data JSON file
+        predicate (callable): Optional filter applied to each card
+        fields (iterable): Optional card fields to keep
+        
+    Returns:
+        list: The matching cards, or None if the file is missing or invalid
+    """
     logger.info(f"Loading Scryfall data from {filepath}...")
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            logger.info(f"Loaded {len(data)} cards from Scryfall data")
-            return data
+        data = list(iter_scryfall_cards(filepath, predicate=predicate, fields=fields))
+        logger.info(f"Loaded {len(data)} cards from Scryfall data")
+        return data
     except FileNotFoundError:
         logger.error(f"Error: Scryfall data file not found at {filepath}")
         return None
     except json.JSONDecodeError:
         logger.error(f"Error: Invalid JSON in Scryfall data file")
         return None
+    except (OSError, EOFError, RuntimeError) as e:
+        logger.error(f"Error: Could not read Scryfall data file: {e}")
+        return None
+
+# A collector number entry such as "123", "SLD-123", "SLD-123a", "SLD-123★" or "PLST-SLD-45".
+# Set codes contain at least one letter, so "12-16" is a range and not set "12".
+_CARD_NUMBER_ENTRY = r'(?:(?P<{0}set>(?=[A-Za-z0-9]*[A-Za-z])[A-Za-z0-9]+(?:-(?=[A-Za-z0-9]*[A-Za-z])[A-Za-z0-9]+)*)-)?(?P<{0}number>\d+)(?P<{0}suffix>[A-Za-z★☆†‡§]*)'
+CARD_NUMBER_PART_PATTERN = re.compile(
+    r'(?<![A-Za-z0-9])' + _CARD_NUMBER_ENTRY.format('start_')
+    + r'(?:\s*[-–—]\s*' + _CARD_NUMBER_ENTRY.format('end_') + r')?(?![A-Za-z0-9])'
+)
+# Separators between the entries of a card number list
+CARD_NUMBER_SEPARATOR_PATTERN = re.compile(r'\s*(?:[,;&]|\band\b)\s*')
+
+# Set code of card numbers listed without one
+DEFAULT_CARD_SET_CODE = "SLD"
 
 def parse_card_number_range(card_numbers_str):
-    """Parse the card number range from a string like 'SLD-123 - SLD-129' or mixed formats"""
-    # Common formats:
-    # "SLD-123 - SLD-129" (range with set code)
-    # "012 - 016" (simple number range without set code)
-    # "SLD-123, SLD-125, SLD-127" (list)
-    # "SLD-123" (single card)
-    # "SLD-123 - SLD-129, SLD-135, SLD-140" (mixed format)
-    
-    # Clean up the string
-    card_numbers_str = card_numbers_str.strip()
-    
-    # Initialize variables to store all collector numbers and the set code
-    all_numbers = []
+    """
+    Parse the card numbers of a drop from a string like 'SLD-123 - SLD-129' or mixed formats
+    
+    Supported formats include "SLD-123 - SLD-129" (range with set code),
+    "012 - 016" (range without set code, in SLD), "SLD-123, SLD-125" (list),
+    "SLD-123 - SLD-129, SLD-135" (mixed), "SLD-123★" or "SLD-45a" (a specific
+    variant printing) and promo sets other than SLD, e.g. "SLP-12" or "PLST-SLD-4".
+    Numbers without a set code belong to the set of the previous entry.
+    
+    Args:
+        card_numbers_str (str): The card numbers column of a drop
+        
+    Returns:
+        dict: {'type': 'intervals', 'sets': {set code: IntervalSet of numeric collector
+            numbers}, 'variants': {set code: [exact collector numbers]}}, or None if no
+            card numbers were found. Numbers in 'sets' match every printing with that
+            numeric part; 'variants' only match the exact collector number.
+    """
+    intervals = {}
+    variants = {}
     set_code = None
-    default_set_code = "SLD"  # Default set code if none is found
-    
-    # Process each part (split by commas)
-    parts = [part.strip() for part in card_numbers_str.split(',')]
-    
-    for part in parts:
-        # Check if this part is a range with hyphen in the format "SET-NUM - SET-NUM"
-        range_match = re.search(r'([A-Z0-9]+)-(\d+)\s*-\s*([A-Z0-9]+)-(\d+)', part)
-        if range_match:
-            start_set = range_match.group(1)
-            start_num = int(range_match.group(2))
-            end_set = range_match.group(3)
-            end_num = int(range_match.group(4))
-            
-            # Set the set_code if this is the first valid entry
-            if set_code is None:
-                set_code = start_set
-            # Ensure sets match
-            elif set_code != start_set or start_set != end_set:
-                logger.warning(f"Set code mismatch in {part}")
-                continue
-                
-            # Add all numbers in the range to our list
-            all_numbers.extend(range(start_num, end_num + 1))
+    
+    for part in CARD_NUMBER_SEPARATOR_PATTERN.split(card_numbers_str.strip()):
+        match = CARD_NUMBER_PART_PATTERN.search(part)
+        if not match:
+            if part:
+                logger.debug(f"Skipping unrecognized card number entry: {part}")
             continue
-            
-        # Check for simple number range format like "012 - 016"
-        simple_range_match = re.search(r'(\d+)\s*-\s*(\d+)', part)
-        if simple_range_match:
-            start_num = int(simple_range_match.group(1))
-            end_num = int(simple_range_match.group(2))
-            
-            # If we don't have a set code yet, use the default (SLD)
-            if set_code is None:
-                set_code = default_set_code
-                logger.debug(f"Using default set code '{set_code}' for range {part}")
-                
-            # Add all numbers in the range to our list
-            all_numbers.extend(range(start_num, end_num + 1))
+        
+        start_set = (match.group('start_set') or '').upper() or None
+        end_set = (match.group('end_set') or '').upper() or None
+        start_num = int(match.group('start_number'))
+        suffix = match.group('start_suffix').lower()
+        
+        # Entries without a set code continue the previous set, SLD by default
+        entry_set = start_set or end_set or set_code or DEFAULT_CARD_SET_CODE
+        if end_set and end_set != entry_set:
+            logger.warning(f"Set code mismatch in {part}")
             continue
+        set_code = entry_set
         
-        # Check for a single card entry
-        single_match = re.search(r'([A-Z0-9]+)-(\d+)', part)
-        if single_match:
-            current_set = single_match.group(1)
-            num = int(single_match.group(2))
-            
-            # Set the set_code if this is the first valid entry
-            if set_code is None:
-                set_code = current_set
-            # Ensure sets match
-            elif set_code != current_set:
-                logger.warning(f"Set code mismatch in {part}")
+        if match.group('end_number') is None:
+            end_num = start_num
+        else:
+            end_num = int(match.group('end_number'))
+            if match.group('end_suffix').lower() != suffix:
+                logger.warning(f"Collector number suffix mismatch in {part}")
                 continue
-                
-            # Add this number to our list
-            all_numbers.append(num)
-            continue
-            
-        # Check for a simple number format (without set code)
-        simple_num_match = re.search(r'^(\d+)$', part)
-        if simple_num_match:
-            num = int(simple_num_match.group(1))
-            
-            # If we don't have a set code yet, use the default (SLD)
-            if set_code is None:
-                set_code = default_set_code
-                logger.debug(f"Using default set code '{set_code}' for number {num}")
-                
-            # Add this number to our list
-            all_numbers.append(num)
-            continue
+            if end_num < start_num:
+                logger.warning(f"Empty card number range in {part}")
+                continue
+        
+        # The List reprints are numbered by their original set, e.g. "PLST-SLD-45"
+        # is collector number "SLD-45" of PLST, and only match that exact number
+        entry_set, _, prefix = set_code.partition('-')
+        prefix = f"{prefix}-" if prefix else ''
+        if prefix or suffix:
+            variants.setdefault(entry_set, set()).update(f"{prefix}{number}{suffix}"
+                                                         for number in range(start_num, end_num + 1))
+        else:
+            intervals.setdefault(entry_set, []).append((start_num, end_num))
     
-    # If we found any valid numbers and a set code
-    if all_numbers and set_code:
-        # Sort and remove duplicates
-        all_numbers = sorted(list(set(all_numbers)))
-        logger.debug(f"Identified set {set_code} with collector numbers: {all_numbers}")
-        return {
-            'type': 'list',
-            'set': set_code,
-            'numbers': all_numbers
-        }
+    if not intervals and not variants:
+        logger.warning(f"Could not parse card number format: {card_numbers_str}")
+        return None
     
-    logger.warning(f"Could not parse card number format: {card_numbers_str}")
-    return None
+    card_range = {
+        'type': 'intervals',
+        'sets': {code: IntervalSet(ranges) for code, ranges in intervals.items()},
+        'variants': {code: sorted(numbers, key=parse_collector_number) for code, numbers in variants.items()}
+    }
+    logger.debug(f"Identified collector numbers {card_range['sets']} and variants {card_range['variants']}")
+    return card_range
+
+def _as_intervals(card_range):
+    # Ranges in the older {'type': 'list', 'set': ..., 'numbers': [...]} form are still accepted
+    if card_range['type'] == 'list':
+        return {'type': 'intervals', 'sets': {card_range['set']: IntervalSet.from_numbers(card_range['numbers'])},
+                'variants': {}}
+    return card_range
+
+def card_range_sets(card_range):
+    """Get the set codes referenced by a parsed card range"""
+    card_range = _as_intervals(card_range)
+    return list(dict.fromkeys([*card_range['sets'], *card_range['variants']]))
+
+def card_range_predicate(card_ranges):
+    """
+    Build a card predicate matching the cards listed by any of the given card ranges
+    
+    The numbers of every range are merged into one IntervalSet per set, so each
+    card is checked with a set lookup and an O(log intervals) binary search.
+    The intervals of all ranges are collected first and each set is built once.
+    """
+    intervals = {}
+    exact = set()
+    for card_range in map(_as_intervals, card_ranges):
+        for code, interval_set in card_range['sets'].items():
+            intervals.setdefault(code.lower(), []).extend(interval_set.intervals())
+        for code, collector_numbers in card_range['variants'].items():
+            exact.update((code.lower(), collector_number) for collector_number in collector_numbers)
+    numbers = {code: IntervalSet(ranges) for code, ranges in intervals.items()}
+    
+    def predicate(card):
+        set_key = card.get('set', '')
+        collector_number = card.get('collector_number', '')
+        if (set_key, collector_number) in exact:
+            return True
+        parsed = parse_collector_number(collector_number) if set_key in numbers else None
+        return parsed is not None and parsed[0] in numbers[set_key]
+    return predicate
 
 def find_matching_cards(scryfall_data, card_range):
-    """Find cards in Scryfall data that match the given card number range"""
+    """
+    Find cards in Scryfall data that match the given card number range
+    
+    Args:
+        scryfall_data: A CardIndex, or a list of Scryfall cards to index
+        card_range (dict): Parsed card range from parse_card_number_range, or a
+            {'type': 'list', 'set': ..., 'numbers': [...]} dict
+        
+    Returns:
+        list: Matching cards ordered by set, then collector number
+    """
     if not card_range or not scryfall_data:
         return []
     
+    # Build a one-off index when given a plain card list. Callers matching
+    # many ranges should build the CardIndex once and pass it in instead.
+    card_index = scryfall_data if isinstance(scryfall_data, CardIndex) else CardIndex(scryfall_data)
+    card_range = _as_intervals(card_range)
+    
     matching_cards = []
-    set_code = card_range['set']
+    for set_code in card_range_sets(card_range):
+        interval_set = card_range['sets'].get(set_code, IntervalSet())
+        logger.debug(f"Looking for cards in set '{set_code.lower()}' with numbers: {interval_set}")
+        cards = card_index.find(set_code, interval_set)
+        
+        # Specific variants are looked up by their numeric part and compared exactly
+        found = {id(card) for card in cards}
+        for collector_number in card_range['variants'].get(set_code, ()):
+            number, _ = parse_collector_number(collector_number)
+            cards.extend(card for card in card_index.get(set_code, number)
+                         if card.get('collector_number') == collector_number and id(card) not in found)
+        cards.sort(key=lambda card: parse_collector_number(card.get('collector_number', ''))[0])
+        
+        for card in cards:
+            logger.debug(f"Matched: {card.get('name')} #{card.get('collector_number')}")
+        logger.debug(f"Found {len(cards)} matching cards from set {set_code}")
+        matching_cards.extend(cards)
+    return matching_cards
+
+class WikitableParser(HTMLParser):
+    """
+    Streaming parser that collects the cell texts of the first wikitable on a page
     
-    # SLD set code in Scryfall is lowercase
-    scryfall_set_code = set_code.lower()
+    No document tree is built: text is only accumulated while inside a cell of
+    the table, and everything after the table is ignored.
+    """
     
-    logger.debug(f"Looking for cards in set '{scryfall_set_code}' with numbers: {card_range['numbers'] if 'numbers' in card_range else '?'}")
+    def __init__(self):
+        super().__init__()
+        self.rows = None  # Set to a list once the wikitable starts, one list of td texts per row
+        self._depth = 0  # Table nesting depth within the wikitable
+        self._done = False
+        self._row = None
+        self._cell = None
+        self._cell_is_td = False
     
-    # Filter to just SLD cards first for efficiency
-    sld_cards = [card for card in scryfall_data if card.get('set', '') == scryfall_set_code]
-    logger.debug(f"Found {len(sld_cards)} cards with set code '{scryfall_set_code}'")
+    def _end_cell(self):
+        if self._cell is not None and self._cell_is_td and self._row is not None:
+            self._row.append(''.join(self._cell).strip())
+        self._cell = None
     
-    for card in sld_cards:
-        collector_number = card.get('collector_number', '')
-        
-        # Some collector numbers might have non-numeric characters, like "123a"
-        # Extract the numeric part for comparison
-        collector_num_match = re.search(r'(\d+)', collector_number)
-        if not collector_num_match:
-            continue
-        
-        card_num = int(collector_num_match.group(1))
+    def handle_starttag(self, tag, attrs):
+        if self._done:
+            return
+        if tag == 'table':
+            if self._depth:
+                self._depth += 1
+            elif _has_wikitable_class(dict(attrs).get('class')):
+                self._depth = 1
+                self.rows = []
+        elif self._depth == 1 and tag == 'tr':
+            self._end_cell()
+            self._row = []
+            self.rows.append(self._row)
+        elif self._depth == 1 and tag in ('td', 'th'):
+            self._end_cell()
+            self._cell = []
+            self._cell_is_td = tag == 'td'
+    
+    def handle_endtag(self, tag):
+        if self._done or not self._depth:
+            return
+        if tag == 'table':
+            self._depth -= 1
+            if not self._depth:
+                self._end_cell()
+                self._done = True
+        elif self._depth == 1 and tag in ('td', 'th'):
+            self._end_cell()
+        elif self._depth == 1 and tag == 'tr':
+            self._end_cell()
+            self._row = None
+    
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+def _table_rows_stream(html):
+    parser = WikitableParser()
+    parser.feed(html)
+    parser.close()
+    return parser.rows
+
+def _table_rows_lxml(html):
+    try:
+        tables = lxml.html.fromstring(html).xpath(_WIKITABLE_XPATH)
+    except lxml.etree.ParserError:
+        # Raised for documents with no elements at all, such as an empty page
+        return None
+    if not tables:
+        return None
+    return [[cell.text_content().strip() for cell in row.iter('td')] for row in tables[0].iter('tr')]
+
+def _table_rows_bs4(html, parser='html.parser'):
+    soup = BeautifulSoup(html, parser, parse_only=WIKITABLE_STRAINER)
+    main_table = soup.find('table')
+    if main_table is None:
+        return None
+    return [[column.text.strip() for column in row.find_all('td')] for row in main_table.find_all('tr')]
+
+# Ways of extracting the wikitable's rows, by backend name
+HTML_BACKENDS = {
+    'lxml': _table_rows_lxml,
+    'stream': _table_rows_stream,
+    'bs4': _table_rows_bs4,
+}
+
+# Backends tried in turn until one finds the wikitable: lxml is by far the fastest,
+# the streaming parser needs only the standard library, and the BeautifulSoup
+# strainer, the slowest, is only a last resort for markup the others cannot read
+HTML_BACKEND_ORDER = tuple(backend for backend in ('lxml', 'stream', 'bs4') if backend != 'lxml' or lxml is not None)
+
+def parse_secret_lair_table(html, backend=None):
+    """
+    Parse the Secret Lair drops from the first wikitable of the Drop Series page
+    
+    Args:
+        html (str): The page's HTML
+        backend (str): One of HTML_BACKENDS, or None to try HTML_BACKEND_ORDER in turn
         
-        # Check if this card's number is in our list
-        if card_range['type'] == 'list' and card_num in card_range['numbers']:
-            logger.debug(f"Matched: {card.get('name')} #{collector_number}")
-            matching_cards.append(card)
+    Returns:
+        list: Drops with drop_number, name and card_numbers, or None if the page has no wikitable
+    """
+    rows = None
+    for name in (backend,) if backend else HTML_BACKEND_ORDER:
+        rows = HTML_BACKENDS[name](html)
+        if rows is not None:
+            break
+        logger.debug(f"The {name} HTML backend found no wikitable")
+    if rows is None:
+        return None
     
-    logger.debug(f"Found {len(matching_cards)} matching cards from set {set_code}")
-    return matching_cards
+    # Process table rows (skip header row)
+    secret_lairs = []
+    for columns in rows[1:]:
+        if len(columns) >= 3:  # Ensure we have at least the columns we need
+            secret_lairs.append({
+                "drop_number": columns[0],
+                "name": columns[1],
+                "card_numbers": columns[2]
+            })
+    return secret_lairs
 
-def scrape_secret_lairs(match_with_scryfall=False, scryfall_filepath="data/scryfall_data.json"):
+def fetch_secret_lairs():
+    """
+    Fetch the Secret Lair drop list from mtg.wiki and parse its table rows
+    
+    This only needs the network, not the Scryfall data, so it can run while the
+    bulk data is still downloading.
+    
+    Returns:
+        list: Drops with drop_number, name and card_numbers, or None if the page could not be scraped
+    """
     logger.info("Scraping Secret Lair data...")
-    url = "https://mtg.wiki/page/Secret_Lair/Drop_Series"
     
     # Send HTTP request to the URL
-    response = requests.get(url, timeout=10)
+    response = requests.get(DROP_SERIES_URL, timeout=10)
     if response.status_code != 200:
         logger.error(f"Failed to retrieve the page: Status code {response.status_code}")
         return None
     
-    # Parse HTML content
-    soup = BeautifulSoup(response.text, 'html.parser')
-    
-    # Find the table containing Secret Lair data
-    tables = soup.find_all('table', class_='wikitable')
-    if not tables:
+    secret_lairs = parse_secret_lair_table(response.text)
+    if secret_lairs is None:
         logger.error("Could not find any tables on the page")
         return None
     
-    # Assuming the main Secret Lair table is the first matching table
-    main_table = tables[0]
+    logger.info(f"Found {len(secret_lairs)} Secret Lair drops")
+    return secret_lairs
+
+def row_fingerprint(drop):
+    """Fingerprint of a drop's wiki row; drops with the same fingerprint list the same cards"""
+    row = "\x1f".join(drop.get(key, "") for key in ("drop_number", "name", "card_numbers"))
+    return hashlib.sha1(row.encode('utf-8')).hexdigest()
+
+def card_prices(card):
+    """Get the price block stored for a card from a Scryfall card object"""
+    prices = card.get("prices") or {}
+    return {
+        "usd": prices.get("usd"),
+        "usd_foil": prices.get("usd_foil"),
+        "eur": prices.get("eur"),
+        "eur_foil": prices.get("eur_foil"),
+        "tix": prices.get("tix")
+    }
+
+def update_card_prices(secret_lairs, prices_by_id):
+    """
+    Replace the prices of stored cards with fresh ones, leaving everything else untouched
     
-    # Load Scryfall data if we want to match cards
-    scryfall_data = None
-    if match_with_scryfall:
-        scryfall_data = load_scryfall_data(scryfall_filepath)
-        if not scryfall_data:
-            logger.warning("Could not load Scryfall data. Proceeding without card matching.")
-            match_with_scryfall = False
+    Args:
+        secret_lairs (list): Secret Lair drops, modified in place
+        prices_by_id (dict): Price blocks (see card_prices) by Scryfall card id
+        
+    Returns:
+        int: Number of cards whose prices were replaced
+    """
+    updated = 0
+    for drop in secret_lairs:
+        for card in drop.get("cards") or []:
+            prices = prices_by_id.get(card.get("id"))
+            if prices is not None:
+                card["prices"] = prices
+                updated += 1
+    return updated
+
+def refresh_prices(secret_lairs, scryfall_filepath="data/scryfall_data.json.gz"):
+    """
+    Update the prices of already matched cards from the Scryfall data, without rematching
     
-    # Initialize list to store all Secret Lair drops
-    secret_lairs = []
+    Only the ids and prices of the stored cards are kept while streaming the
+    Scryfall file, so this needs neither the wiki nor a card index.
     
-    # Process table rows (skip header row)
-    for row in main_table.find_all('tr')[1:]:
-        columns = row.find_all('td')
-        if len(columns) >= 3:  # Ensure we have at least the columns we need
-            # Extract drop number
-            drop_number = columns[0].text.strip()
-            
-            # Extract name
-            name = columns[1].text.strip()
-            
-            # Extract card numbers
-            card_numbers = columns[2].text.strip()
-            
-            # Create a dictionary for this Secret Lair drop
-            secret_lair = {
-                "drop_number": drop_number,
-                "name": name,
-                "card_numbers": card_numbers
-            }
+    Args:
+        secret_lairs (list): Saved Secret Lair drops, modified in place
+        scryfall_filepath (str): Path to the Scryfall bulk data file
+        
+    Returns:
+        int: Number of cards whose prices were updated, or None if the Scryfall data can't be loaded
+    """
+    card_ids = {card.get("id") for drop in secret_lairs for card in drop.get("cards") or []}
+    card_ids.discard(None)
+    card_ids.discard("")
+    logger.info(f"Refreshing prices of {len(card_ids)} cards")
+    
+    scryfall_data = load_scryfall_data(scryfall_filepath,
+                                       predicate=lambda card: card.get('id') in card_ids,
+                                       fields=('id', 'prices'))
+    if scryfall_data is None:
+        return None
+    
+    updated = update_card_prices(secret_lairs, {card["id"]: card_prices(card) for card in scryfall_data})
+    add_drop_totals(secret_lairs, overwrite=True)
+    if len(scryfall_data) < len(card_ids):
+        logger.warning(f"{len(card_ids) - len(scryfall_data)} cards were not found in the Scryfall data")
+    logger.info(f"Updated prices of {updated} cards")
+    return updated
+
+def load_previous_secret_lairs(filepath="data/secret_lairs.json"):
+    """
+    Load the drops saved by a previous run, to reuse their matched cards
+    
+    Returns:
+        list: The saved drops, or None if there is no valid file
+    """
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            secret_lairs = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return secret_lairs if isinstance(secret_lairs, list) else None
+
+def match_secret_lairs(secret_lairs, scryfall_filepath="data/scryfall_data.json.gz", previous=None):
+    """
+    Add matching Scryfall cards and value totals to scraped Secret Lair drops
+    
+    When the drops of a previous run are given, drops whose wiki row is unchanged
+    and whose cards were all found reuse the previous card list and only get their
+    prices refreshed. Only new, changed or incomplete drops are matched again.
+    Both happen in a single pass over the Scryfall file.
+    
+    Args:
+        secret_lairs (list): Drops returned by fetch_secret_lairs, modified in place
+        scryfall_filepath (str): Path to the Scryfall bulk data file
+        previous (list): Drops saved by a previous run, or None to match every drop
+        
+    Returns:
+        list: The same list of drops. If the Scryfall data can't be loaded, reused
+            drops keep their previous cards and the others are returned without cards.
+    """
+    # Card lists of previously complete drops, by the fingerprint of their wiki row
+    reusable = {}
+    if previous:
+        incomplete = {id(drop) for drop, _ in find_incomplete_drops(previous)}
+        for drop in previous:
+            if drop.get("cards") and id(drop) not in incomplete:
+                reusable[row_fingerprint(drop)] = drop["cards"]
+    
+    reused = []
+    to_match = []
+    for secret_lair in secret_lairs:
+        cards = reusable.get(row_fingerprint(secret_lair))
+        if cards is not None:
+            secret_lair["cards"] = cards
+            reused.append(secret_lair)
+            continue
+        card_range = parse_card_number_range(secret_lair["card_numbers"])
+        if card_range:
+            to_match.append((secret_lair, card_range))
+    if previous:
+        logger.info(f"Reusing cards of {len(reused)} unchanged drops, matching {len(to_match)} new or changed drops")
+    
+    # Load Scryfall data: the cards of reused drops by id, for their prices, and
+    # the cards listed by the drops to match. Only the fields we copy are kept.
+    reused_ids = {card.get("id") for drop in reused for card in drop["cards"]}
+    in_ranges = card_range_predicate(card_range for _, card_range in to_match)
+    scryfall_data = load_scryfall_data(scryfall_filepath,
+                                       predicate=lambda card: card.get('id') in reused_ids or in_ranges(card),
+                                       fields=SCRYFALL_CARD_FIELDS)
+    if not scryfall_data:
+        logger.warning("Could not load Scryfall data. Proceeding without card matching.")
+    else:
+        prices_by_id = {card["id"]: card_prices(card) for card in scryfall_data if card.get("id") in reused_ids}
+        update_card_prices(reused, prices_by_id)
+        
+        # Index the cards once and look up every drop to match
+        card_index = CardIndex(scryfall_data) if to_match else None
+        for secret_lair, card_range in to_match:
+            name = secret_lair["name"]
+            logger.debug(f"Processing card range for drop: {name}")
+            matching_cards = find_matching_cards(card_index, card_range)
             
-            # If matching with Scryfall, find and add the matching cards
-            if match_with_scryfall and scryfall_data:
-                card_range = parse_card_number_range(card_numbers)
-                if card_range:
-                    logger.debug(f"Processing card range for drop: {name}")
-                    matching_cards = find_matching_cards(scryfall_data, card_range)
-                    
-                    # Add basic card info to our Secret Lair object
-                    card_list = []
-                    for card in matching_cards:
-                        # Get price data from the card object
-                        prices = card.get("prices", {})
-                        
-                        card_list.append({
-                            "name": card.get("name", "Unknown"),
-                            "collector_number": card.get("collector_number", ""),
-                            "set": card.get("set", ""),
-                            "id": card.get("id", ""),
-                            "image_uri": card.get("image_uris", {}).get("normal", ""),
-                            "prices": {
-                                "usd": prices.get("usd"),
-                                "usd_foil": prices.get("usd_foil"),
-                                "eur": prices.get("eur"),
-                                "eur_foil": prices.get("eur_foil"),
-                                "tix": prices.get("tix")
-                            }
-                        })
-                    
-                    secret_lair["cards"] = card_list
-                    if card_list:
-                        logger.debug(f"Added {len(card_list)} cards to drop: {name}")
+            # Add basic card info to our Secret Lair object
+            card_list = []
+            for card in matching_cards:
+                card_list.append({
+                    "name": card.get("name", "Unknown"),
+                    "collector_number": card.get("collector_number", ""),
+                    "set": card.get("set", ""),
+                    "id": card.get("id", ""),
+                    "image_uri": card.get("image_uris", {}).get("normal", ""),
+                    "prices": card_prices(card)
+                })
             
-            # Add to our list
-            secret_lairs.append(secret_lair)
+            secret_lair["cards"] = card_list
+            if card_list:
+                logger.debug(f"Added {len(card_list)} cards to drop: {name}")
+    
+    # Precompute per-drop values so consumers never have to sum card prices
+    add_drop_totals(secret_lairs, overwrite=True)
     
     matched_card_count = sum(len(drop.get("cards", [])) for drop in secret_lairs)
     if matched_card_count > 0:
         logger.info(f"Matched a total of {matched_card_count} cards across all Secret Lair drops")
-    
-    logger.info(f"Found {len(secret_lairs)} Secret Lair drops")
     return secret_lairs
 
+def scrape_secret_lairs(match_with_scryfall=False, scryfall_filepath="data/scryfall_data.json.gz", previous=None):
+    """
+    Scrape the Secret Lair drop list and optionally match its cards with Scryfall data
+    
+    Args:
+        match_with_scryfall (bool): Whether to add card details from the Scryfall data
+        scryfall_filepath (str): Path to the Scryfall bulk data file
+        previous (list): Drops saved by a previous run whose unchanged card lists can be reused
+        
+    Returns:
+        list: The Secret Lair drops, or None if the page could not be scraped
+    """
+    secret_lairs = fetch_secret_lairs()
+    if secret_lairs is None:
+        return None
+    
+    if match_with_scryfall:
+        return match_secret_lairs(secret_lairs, scryfall_filepath, previous)
+    return add_drop_totals(secret_lairs, overwrite=True)
+
+def find_incomplete_drops(secret_lairs):
+    """
+    Find drops whose listed collector numbers were not all matched to Scryfall cards
+    
+    Used to validate that the downloaded bulk data type covers every Secret Lair
+    card; numbers missing here are typically only present in a larger bulk file.
+    
+    Args:
+        secret_lairs (list): Drops returned by scrape_secret_lairs with card matching
+        
+    Returns:
+        list: (drop, missing collector numbers such as "SLD-12") tuples, in drop order
+    """
+    incomplete = []
+    for drop in secret_lairs:
+        card_range = parse_card_number_range(drop.get("card_numbers", ""))
+        if not card_range:
+            continue
+        matched = set()
+        matched_exact = set()
+        for card in drop.get("cards") or []:
+            set_key = card.get("set", "").lower()
+            parsed = parse_collector_number(card.get("collector_number", ""))
+            if parsed:
+                matched.add((set_key, parsed[0]))
+            matched_exact.add((set_key, card.get("collector_number")))
+        missing = []
+        for set_code in card_range_sets(card_range):
+            missing.extend(f"{set_code}-{number}" for number in card_range['sets'].get(set_code, ())
+                           if (set_code.lower(), number) not in matched)
+            missing.extend(f"{set_code}-{collector_number}" for collector_number in card_range['variants'].get(set_code, ())
+                           if (set_code.lower(), collector_number) not in matched_exact)
+        if missing:
+            incomplete.append((drop, missing))
+    return incomplete
+
 def save_to_json(data, filename="secret_lairs.json", directory="data"):
     """Save the scraped data to a JSON file in the data directory"""
     # Create the data directory if it doesn't exist
@@ -286,14 +760,32 @@ if __name__ == "__main__":
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Scrape Secret Lair data from MTG Wiki')
     parser.add_argument('--verbose', '-v', action='store_true', help='Enable verbose debug output')
+    parser.add_argument('--full', action='store_true', help='Match every drop instead of reusing unchanged ones')
+    parser.add_argument('--prices-only', action='store_true',
+                        help='Only refresh the prices in the saved data, without scraping the wiki')
     args = parser.parse_args()
     
     # Set up logging based on verbosity
     setup_logging(args.verbose)
     
-    # When run directly, match with Scryfall data
-    secret_lairs = scrape_secret_lairs(match_with_scryfall=True)
-    if secret_lairs:
-        save_to_json(secret_lairs)
+    if args.prices_only:
+        # Patch the prices of the saved drops without touching the wiki
+        secret_lairs = load_previous_secret_lairs()
+        if secret_lairs is None:
+            logger.error("No saved Secret Lair data to refresh, run a full scrape first")
+        elif refresh_prices(secret_lairs) is not None:
+            save_to_json(secret_lairs)
+            save_to_sqlite(secret_lairs)
+            save_to_snapshot(secret_lairs)
+            record_price_history(secret_lairs)
     else:
-        logger.error("Failed to scrape Secret Lair data")
\ No newline at end of file
+        # When run directly, match with Scryfall data
+        previous = None if args.full else load_previous_secret_lairs()
+        secret_lairs = scrape_secret_lairs(match_with_scryfall=True, previous=previous)
+        if secret_lairs:
+            save_to_json(secret_lairs)
+            save_to_sqlite(secret_lairs)
+            save_to_snapshot(secret_lairs)
+            record_price_history(secret_lairs)
+        else:
+            logger.error("Failed to scrape Secret Lair data")
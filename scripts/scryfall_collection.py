@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import aiohttp
+
+# Add the project root to the path so the module also works when run directly
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.drop_totals import add_drop_totals
+from scripts.scrape_secret_lairs import card_prices, update_card_prices
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Scryfall endpoint returning the cards for a list of identifiers
+SCRYFALL_COLLECTION_URL = "https://api.scryfall.com/cards/collection"
+
+# Most identifiers Scryfall accepts in one collection request
+COLLECTION_BATCH_SIZE = 75
+
+# Requests in flight at once, and the minimum spacing between request starts
+# (Scryfall asks for 50-100 ms between requests)
+DEFAULT_CONCURRENCY = 4
+DEFAULT_REQUEST_INTERVAL = 0.1
+
+# Scryfall requires every API client to send a User-Agent and an Accept header
+REQUEST_HEADERS = {
+    'User-Agent': 'MTGInventoryManager/1.0',
+    'Accept': 'application/json'
+}
+
+class RateLimiter:
+    """Space out request starts across concurrent tasks by at least ``interval`` seconds"""
+
+    def __init__(self, interval=DEFAULT_REQUEST_INTERVAL):
+        self.interval = interval
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        """
+        Wait until the next request may start
+
+        Returns:
+            float: Event loop time the request was scheduled to start at
+        """
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        await asyncio.sleep(start - now)
+        return start
+
+def batches(items, size=COLLECTION_BATCH_SIZE):
+    """Split a list into consecutive batches of at most ``size`` items"""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def _retry_delay(response, attempt, backoff):
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return backoff * (2 ** attempt)
+
+async def fetch_collection_batch(session, card_ids, limiter, url=SCRYFALL_COLLECTION_URL, max_retries=3, backoff=1.0):
+    """
+    Fetch one batch of cards by Scryfall id from the collection endpoint
+
+    Rate limited (429) and server error responses, responses whose body is not
+    valid JSON and connection errors are retried with exponential backoff,
+    honouring Retry-After.
+
+    Args:
+        session (aiohttp.ClientSession): Session whose connection pool is used
+        card_ids (list): At most COLLECTION_BATCH_SIZE Scryfall card ids
+        limiter (RateLimiter): Limiter shared by all requests
+        url (str): Collection endpoint URL
+        max_retries (int): Number of retries after the first attempt
+        backoff (float): Delay before the first retry in seconds, doubled on each retry
+
+    Returns:
+        list: The cards found, or None if the batch could not be fetched
+    """
+    payload = {"identifiers": [{"id": card_id} for card_id in card_ids]}
+    for attempt in range(max_retries + 1):
+        await limiter.wait()
+        response = None
+        try:
+            async with session.post(url, json=payload) as response:
+                if response.status == 200:
+                    body = await response.json()
+                    if body.get("not_found"):
+                        logger.debug(f"{len(body['not_found'])} cards not found on Scryfall")
+                    return body.get("data", [])
+                if response.status != 429 and response.status < 500:
+                    logger.error(f"Scryfall rejected a collection request: status code {response.status}")
+                    return None
+                error = f"status code {response.status}"
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error = str(e) or type(e).__name__
+        except ValueError as e:
+            # A truncated or garbled body is treated like a server error
+            error = f"invalid JSON response: {e}"
+
+        if attempt == max_retries:
+            logger.error(f"Giving up on a batch of {len(card_ids)} cards after {max_retries + 1} attempts: {error}")
+            return None
+        delay = _retry_delay(response, attempt, backoff)
+        logger.warning(f"Collection request failed ({error}), retrying in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+async def fetch_cards_by_id(card_ids, url=SCRYFALL_COLLECTION_URL, concurrency=DEFAULT_CONCURRENCY,
+                            interval=DEFAULT_REQUEST_INTERVAL, batch_size=COLLECTION_BATCH_SIZE, timeout=30,
+                            backoff=1.0):
+    """
+    Fetch cards by Scryfall id through the collection endpoint, several batches at a time
+
+    Args:
+        card_ids (iterable): Scryfall card ids; duplicates are fetched once
+        url (str): Collection endpoint URL
+        concurrency (int): Maximum number of requests in flight, and connections in the pool
+        interval (float): Minimum time between request starts in seconds
+        batch_size (int): Identifiers per request
+        timeout (float): Timeout of each request in seconds
+        backoff (float): Delay before retrying a failed request in seconds, doubled on each retry
+
+    Returns:
+        tuple: (dict of fetched cards by id, number of batches that failed)
+    """
+    card_ids = list(dict.fromkeys(card_ids))
+    limiter = RateLimiter(interval)
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector, headers=REQUEST_HEADERS,
+                                     timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        async def fetch(batch):
+            async with semaphore:
+                return await fetch_collection_batch(session, batch, limiter, url, backoff=backoff)
+        results = await asyncio.gather(*(fetch(batch) for batch in batches(card_ids, batch_size)))
+
+    cards = {}
+    for result in results:
+        for card in result or []:
+            cards[card.get("id")] = card
+    return cards, sum(result is None for result in results)
+
+def refresh_prices_from_api(secret_lairs, url=SCRYFALL_COLLECTION_URL, concurrency=DEFAULT_CONCURRENCY,
+                            interval=DEFAULT_REQUEST_INTERVAL):
+    """
+    Update the prices of already matched cards from the Scryfall API, without the bulk data
+
+    Only the cards in the saved drops are requested, so an intraday refresh of
+    every Secret Lair card takes a few dozen requests.
+
+    Args:
+        secret_lairs (list): Saved Secret Lair drops, modified in place
+        url (str): Collection endpoint URL
+        concurrency (int): Maximum number of requests in flight
+        interval (float): Minimum time between request starts in seconds
+
+    Returns:
+        int: Number of cards whose prices were updated, or None if no card could be fetched
+    """
+    card_ids = [card.get("id") for drop in secret_lairs for card in drop.get("cards") or [] if card.get("id")]
+    card_ids = list(dict.fromkeys(card_ids))
+    logger.info(f"Fetching prices of {len(card_ids)} cards from the Scryfall API")
+
+    start_time = time.time()
+    cards, failed = asyncio.run(fetch_cards_by_id(card_ids, url, concurrency, interval))
+    if failed:
+        logger.warning(f"{failed} of {len(batches(card_ids))} collection requests failed")
+    if card_ids and not cards:
+        return None
+
+    updated = update_card_prices(secret_lairs, {card_id: card_prices(card) for card_id, card in cards.items()})
+    add_drop_totals(secret_lairs, overwrite=True)
+    if len(cards) < len(card_ids):
+        logger.warning(f"{len(card_ids) - len(cards)} cards were not returned by the Scryfall API")
+    logger.info(f"Updated prices of {updated} cards in {time.time() - start_time:.1f}s")
+    return updated
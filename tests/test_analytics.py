@@ -0,0 +1,84 @@
+import os
+import sys
+import statistics
+import pytest
+
+# Add project root to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from web.analytics import DropAnalytics
+
+def card(usd, usd_foil=None):
+    """Build a card with the given usd and usd_foil price strings"""
+    return {"name": "Card", "prices": {"usd": usd, "usd_foil": usd_foil}}
+
+SAMPLE_DROPS = [
+    {"drop_number": "1", "name": "Three Cards", "cards": [card("10.00", "20.00"), card("2.00"), card("4.00")]},
+    {"drop_number": "2", "name": "No Cards", "cards": []},
+    {"drop_number": "3", "name": "Unpriced", "cards": [card(None), card("")]},
+    {"drop_number": "4", "name": "Four Cards", "cards": [card("1.00"), card("3.00"), card("5.00"), card("40.00")]}
+]
+
+class TestDropAnalytics:
+    """Tests for the vectorized drop analytics"""
+    
+    def test_drop_statistics(self):
+        """Test per-drop totals, medians, extremes and missing counts"""
+        drops = DropAnalytics(SAMPLE_DROPS).drops()
+        
+        assert drops[0]["prices"]["usd"] == {"total": 16.0, "median": 4.0, "min": 2.0, "max": 10.0, "missing": 0}
+        assert drops[0]["prices"]["usd_foil"] == {"total": 20.0, "median": 20.0, "min": 20.0, "max": 20.0,
+                                                  "missing": 2}
+        assert drops[1]["prices"]["usd"] == {"total": 0.0, "median": None, "min": None, "max": None, "missing": 0}
+        assert drops[2]["prices"]["usd"] == {"total": 0.0, "median": None, "min": None, "max": None, "missing": 2}
+        assert drops[3]["prices"]["usd"]["median"] == 4.0
+        assert drops[3]["card_count"] == 4
+    
+    def test_roi(self):
+        """Test ROI against configurable retail prices"""
+        analytics = DropAnalytics(SAMPLE_DROPS)
+        
+        drop = analytics.drop("4", retail_price=40.0, foil_retail_price=50.0)
+        
+        assert drop["roi"] == {"usd": 0.23, "usd_foil": -1.0}
+        assert analytics.drop("2")["roi"] == {"usd": None, "usd_foil": None}
+        assert analytics.drop("missing") is None
+    
+    def test_summary(self):
+        """Test the totals over all drops and the ranking by ROI"""
+        summary = DropAnalytics(SAMPLE_DROPS).summary(retail_price=10.0, top=2)
+        
+        assert summary["drops"] == 4
+        assert summary["cards"] == 9
+        assert summary["prices"]["usd"] == {"total": 65.0, "missing": 2}
+        assert [drop["drop_number"] for drop in summary["top_roi"]["usd"]] == ["4", "1"]
+    
+    def test_invalid_prices(self):
+        """Test that unparseable price strings count as missing prices"""
+        drops = DropAnalytics([{"drop_number": "1", "cards": [card("abc"), card("3.00"), {"name": "No Prices"}]}]).drops()
+        
+        assert drops[0]["prices"]["usd"] == {"total": 3.0, "median": 3.0, "min": 3.0, "max": 3.0, "missing": 2}
+    
+    def test_empty_dataset(self):
+        """Test that no drops produce empty results"""
+        analytics = DropAnalytics([])
+        
+        assert analytics.drops() == []
+        assert analytics.summary()["top_roi"] == {"usd": [], "usd_foil": []}
+    
+    def test_statistics_match_per_drop_computation(self):
+        """Test that the bulk statistics of many drops match computing each drop on its own"""
+        drops = [{"drop_number": str(i), "cards": [card(str(i % 7 + j) if (i + j) % 5 else None, str(j))
+                                                   for j in range(i % 6)]}
+                 for i in range(200)]
+        analytics = DropAnalytics(drops)
+        
+        for drop, stats in zip(drops, analytics.drops(retail_price=5.0)):
+            prices = [float(c["prices"]["usd"]) for c in drop["cards"] if c["prices"]["usd"] is not None]
+            expected_total = sum(prices)
+            assert stats["card_count"] == len(drop["cards"])
+            assert stats["prices"]["usd"]["total"] == round(expected_total, 2)
+            assert stats["prices"]["usd"]["missing"] == len(drop["cards"]) - len(prices)
+            assert stats["prices"]["usd"]["min"] == (min(prices) if prices else None)
+            assert stats["prices"]["usd"]["max"] == (max(prices) if prices else None)
+            assert stats["prices"]["usd"]["median"] == (round(statistics.median(prices), 2) if prices else None)
+            assert stats["roi"]["usd"] == (round((expected_total - 5.0) / 5.0, 2) if drop["cards"] else None)
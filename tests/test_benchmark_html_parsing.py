@@ -0,0 +1,21 @@
+import os
+import sys
+import pytest
+
+# Add project root to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.benchmark_html_parsing import benchmark_backends, available_backends, DEFAULT_FIXTURE
+
+class TestBenchmarkHtmlParsing:
+    """Tests for the HTML backend benchmark"""
+    
+    def test_benchmark_backends_on_fixture(self):
+        """Test that every available backend is timed against the whole-page baseline"""
+        with open(DEFAULT_FIXTURE, encoding='utf-8') as f:
+            html = f.read()
+        
+        results = benchmark_backends(html, repeat=1)
+        
+        assert [result["backend"] for result in results] == ["whole page (html.parser)"] + available_backends()
+        assert len({result["drops"] for result in results}) == 1
+        assert all(result["seconds"] > 0 for result in results)
@@ -0,0 +1,54 @@
+import os
+import sys
+import json
+import pytest
+
+# Add project root to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.benchmark_pipeline import (
+    generate_drops,
+    generate_drop_series_html,
+    write_scryfall_file,
+    run_benchmarks,
+    compare_results
+)
+from scripts.scrape_secret_lairs import parse_secret_lair_table, load_scryfall_data
+
+class TestBenchmarkPipeline:
+    """Tests for the data pipeline benchmark"""
+    
+    def test_generated_page_parses_to_the_drops(self):
+        """Test that the synthetic wiki page round-trips through the table parser"""
+        drops = generate_drops(50, seed=1)
+        
+        assert parse_secret_lair_table(generate_drop_series_html(drops)) == drops
+        assert generate_drops(50, seed=1) == drops
+    
+    def test_write_scryfall_file_contains_listed_cards(self, tmp_path):
+        """Test that the bulk file has the requested size and every card the drops list"""
+        drops = [{"drop_number": "1", "name": "Test", "card_numbers": "SLD-1 - SLD-3, SLD-2★, SLP-1"}]
+        filepath = str(tmp_path / "scryfall_data.json.gz")
+        
+        assert write_scryfall_file(filepath, 100, drops) == 100
+        cards = load_scryfall_data(filepath)
+        
+        assert len(cards) == 100
+        listed = {(card["set"], card["collector_number"]) for card in cards}
+        assert {("sld", "1"), ("sld", "2"), ("sld", "3"), ("sld", "2★"), ("slp", "1")} <= listed
+    
+    def test_run_benchmarks(self, tmp_path):
+        """Test that every stage is timed and the results are JSON serializable"""
+        results = run_benchmarks(card_count=300, drop_count=20, repeat=1, directory=str(tmp_path))
+        
+        assert [result["name"] for result in results["results"]] == [
+            "parse_card_number_range", "load_scryfall_data", "find_matching_cards",
+            "scrape_secret_lairs", "save_to_json"
+        ]
+        assert all(result["seconds"] > 0 and result["peak_memory_bytes"] > 0 for result in results["results"])
+        assert results["fixtures"]["cards"] == 300
+        assert results["fixtures"]["matched_cards"] > 0
+        assert os.path.exists(tmp_path / "output" / "secret_lairs.json")
+        json.dumps(results)
+        
+        comparison = compare_results(results, results)
+        assert all(row["seconds_ratio"] == 1 and row["memory_ratio"] == 1 for row in comparison)
@@ -0,0 +1,87 @@
+import os
+import copy
+import pytest
+
+# Add project root to path for imports
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.binary_snapshot import BinarySnapshot, save_to_snapshot, write_binary_snapshot
+from scripts.drop_totals import add_drop_totals
+from tests.test_card_store import SAMPLE_DROPS
+
+@pytest.fixture
+def snapshot(tmp_path):
+    """Map a snapshot built from the sample drops"""
+    snapshot = BinarySnapshot(save_to_snapshot(SAMPLE_DROPS, directory=str(tmp_path)))
+    yield snapshot
+    snapshot.close()
+
+class TestBinarySnapshot:
+    """Tests for the binary_snapshot module"""
+    
+    def test_round_trip(self, snapshot, tmp_path):
+        """Test that drops read back match the JSON format they were written from"""
+        expected = add_drop_totals(copy.deepcopy(SAMPLE_DROPS))
+        
+        assert len(snapshot) == 2
+        assert list(snapshot) == expected
+        assert snapshot[-1] == expected[1]
+        assert snapshot[0:1] == expected[:1]
+        assert snapshot[0]["totals"]["usd_foil"] == 7.0
+        assert not os.path.exists(str(tmp_path / "secret_lairs.snapshot.tmp"))
+        with pytest.raises(IndexError):
+            snapshot[2]
+    
+    def test_previews(self, snapshot):
+        """Test that previews decode only the first cards of each drop but keep the full totals"""
+        expected = add_drop_totals(copy.deepcopy(SAMPLE_DROPS))
+        previews = snapshot.previews(1)
+        
+        assert previews[0]["cards"] == expected[0]["cards"][:1]
+        assert previews[0]["totals"] == expected[0]["totals"]
+        assert "cards" not in previews[1]
+    
+    def test_drop_number_lookup(self, tmp_path):
+        """Test looking drops up by number, with the first of duplicate numbers winning"""
+        drops = [{"drop_number": str(n), "name": f"Drop {n}", "card_numbers": f"SLD-{n}"} for n in range(1, 40)]
+        drops.append({"drop_number": "7", "name": "Duplicate", "card_numbers": "SLD-7"})
+        snapshot = BinarySnapshot(write_binary_snapshot(drops, str(tmp_path / "drops.snapshot")))
+        
+        assert snapshot.by_drop_number["7"]["name"] == "Drop 7"
+        assert snapshot.by_drop_number.get("39")["name"] == "Drop 39"
+        assert "40" not in snapshot.by_drop_number
+        assert snapshot.by_drop_number.get("0") is None
+        assert len(snapshot.by_drop_number) == 39
+        assert sorted(snapshot.by_drop_number) == sorted(str(n) for n in range(1, 40))
+        snapshot.close()
+    
+    def test_strings_are_shared(self, tmp_path):
+        """Test that repeated strings such as set codes and prices are stored once"""
+        cards = [{"name": "Card", "collector_number": str(n), "set": "sld", "id": f"id-{n}",
+                  "prices": {"usd": "1.00"}} for n in range(100)]
+        snapshot = BinarySnapshot(write_binary_snapshot([{"drop_number": "1", "name": "Drop", "card_numbers": "",
+                                                          "cards": cards}], str(tmp_path / "drops.snapshot")))
+        
+        assert snapshot.card_count == 100
+        # 100 ids, 100 collector numbers ("1" is shared with the drop number), the drop's
+        # other two strings, and "Card", "sld" and "1.00" once each
+        assert snapshot.string_count == 205
+        assert snapshot[0]["cards"][42]["prices"] == {"usd": "1.00", "usd_foil": None, "eur": None,
+                                                      "eur_foil": None, "tix": None}
+        snapshot.close()
+    
+    def test_rejects_other_files(self, tmp_path):
+        """Test that files that are not snapshots raise ValueError"""
+        path = tmp_path / "other.snapshot"
+        path.write_bytes(b"[]")
+        with pytest.raises(ValueError):
+            BinarySnapshot(str(path))
+        
+        path.write_bytes(b"x" * 100)
+        with pytest.raises(ValueError):
+            BinarySnapshot(str(path))
+        
+        write_binary_snapshot(SAMPLE_DROPS, str(path))
+        path.write_bytes(path.read_bytes()[:-5])
+        with pytest.raises(ValueError):
+            BinarySnapshot(str(path))
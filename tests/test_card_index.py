@@ -0,0 +1,82 @@
+import os
+import pytest
+
+# Add project root to path for imports
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.card_index import CardIndex, IntervalSet, parse_collector_number
+
+class TestCardIndex:
+    """Tests for the card_index module"""
+    
+    def test_parse_collector_number(self):
+        """Test splitting collector numbers into number and variant flag"""
+        assert parse_collector_number("123") == (123, False)
+        assert parse_collector_number("123a") == (123, True)
+        assert parse_collector_number("123★") == (123, True)
+        assert parse_collector_number("★") is None
+    
+    def test_get_primary_and_variants(self):
+        """Test that variants are returned after primary printings"""
+        variant = {"name": "Variant", "set": "sld", "collector_number": "123★"}
+        primary = {"name": "Primary", "set": "sld", "collector_number": "123"}
+        index = CardIndex([variant, primary])
+        
+        assert index.get("SLD", 123) == [primary, variant]
+        assert index.get("sld", 123, include_variants=False) == [primary]
+        assert index.get("eld", 123) == []
+        assert ("SLD", 123) in index
+        assert len(index) == 2
+    
+    def test_find_orders_by_number(self):
+        """Test finding several collector numbers at once"""
+        cards = [
+            {"name": "Card 3", "set": "sld", "collector_number": "3"},
+            {"name": "Card 1", "set": "sld", "collector_number": "1"},
+            {"name": "Other Set", "set": "eld", "collector_number": "2"},
+            {"name": "No Number", "set": "sld", "collector_number": ""}
+        ]
+        index = CardIndex(cards)
+        
+        assert [card["name"] for card in index.find("SLD", [3, 1, 2])] == ["Card 1", "Card 3"]
+        assert len(index) == 3
+    
+    def test_find_with_interval_set(self):
+        """Test resolving an interval set against the collector numbers present in a set"""
+        cards = [{"name": f"Card {n}", "set": "sld", "collector_number": str(n)} for n in (1, 5, 9, 100)]
+        cards.append({"name": "Card 5a", "set": "sld", "collector_number": "5a"})
+        index = CardIndex(cards)
+        
+        result = index.find("SLD", IntervalSet([(2, 9), (50, 1000000)]))
+        
+        assert [card["name"] for card in result] == ["Card 5", "Card 5a", "Card 9", "Card 100"]
+        assert index.numbers("sld") == [1, 5, 9, 100]
+        
+        # Adding a card invalidates the sorted numbers
+        index.add({"name": "Card 3", "set": "sld", "collector_number": "3"})
+        assert [card["name"] for card in index.find("SLD", IntervalSet([(2, 4)]))] == ["Card 3"]
+
+class TestIntervalSet:
+    """Tests for the IntervalSet class"""
+    
+    def test_merges_overlapping_and_adjacent_intervals(self):
+        """Test that intervals are sorted and merged"""
+        intervals = IntervalSet([(10, 12), (1, 3), (4, 5), (11, 20), (30, 30), (8, 7)])
+        
+        assert list(intervals.intervals()) == [(1, 5), (10, 20), (30, 30)]
+        assert len(intervals) == 17
+        assert list(IntervalSet.from_numbers([3, 1, 2, 9])) == [1, 2, 3, 9]
+    
+    def test_membership(self):
+        """Test membership at and between interval boundaries"""
+        intervals = IntervalSet([(1, 5), (10, 20)])
+        
+        assert all(number in intervals for number in (1, 5, 10, 15, 20))
+        assert not any(number in intervals for number in (0, 6, 9, 21))
+        assert 1 not in IntervalSet()
+        assert not IntervalSet()
+    
+    def test_union(self):
+        """Test combining two interval sets"""
+        union = IntervalSet([(1, 3)]).union(IntervalSet([(4, 6), (10, 10)]))
+        assert union == IntervalSet([(1, 6), (10, 10)])
@@ -0,0 +1,81 @@
+import os
+import copy
+import sqlite3
+import pytest
+
+# Add project root to path for imports
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.card_store import CardStore, save_to_sqlite
+from scripts.drop_totals import add_drop_totals
+
+SAMPLE_DROPS = [
+    {
+        "drop_number": "1",
+        "name": "First Drop",
+        "card_numbers": "SLD-1 - SLD-2",
+        "cards": [
+            {
+                "name": "Card One",
+                "collector_number": "1",
+                "set": "sld",
+                "id": "id-1",
+                "image_uri": "https://example.com/1.jpg",
+                "prices": {"usd": "1.50", "usd_foil": "3.00", "eur": None, "eur_foil": None, "tix": None}
+            },
+            {
+                "name": "Card Two",
+                "collector_number": "2",
+                "set": "sld",
+                "id": "id-2",
+                "image_uri": "https://example.com/2.jpg",
+                "prices": {"usd": None, "usd_foil": "4.00", "eur": "1.00", "eur_foil": None, "tix": None}
+            }
+        ]
+    },
+    {
+        "drop_number": "2",
+        "name": "Unmatched Drop",
+        "card_numbers": "Unknown"
+    }
+]
+
+@pytest.fixture
+def store(tmp_path):
+    """Create a CardStore over a database built from the sample drops"""
+    db_path = save_to_sqlite(SAMPLE_DROPS, directory=str(tmp_path))
+    with CardStore(db_path) as store:
+        yield store
+
+class TestCardStore:
+    """Tests for the card_store module"""
+    
+    def test_save_to_sqlite_creates_indexes(self, tmp_path):
+        """Test that the database is written atomically with the expected indexes"""
+        db_path = save_to_sqlite(SAMPLE_DROPS, filename="test.db", directory=str(tmp_path))
+        
+        assert db_path == os.path.join(str(tmp_path), "test.db")
+        assert not os.path.exists(db_path + ".tmp")
+        
+        conn = sqlite3.connect(db_path)
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        conn.close()
+        assert {"idx_drops_drop_number", "idx_cards_set_collector_number", "idx_cards_name"} <= indexes
+    
+    def test_list_drops_round_trip(self, store):
+        """Test that drops read back match the JSON format they were written from"""
+        assert store.list_drops() == add_drop_totals(copy.deepcopy(SAMPLE_DROPS))
+    
+    def test_get_drop(self, store):
+        """Test loading a single drop by drop number"""
+        expected = add_drop_totals(copy.deepcopy(SAMPLE_DROPS))
+        assert store.get_drop("1") == expected[0]
+        assert store.get_drop("2") == expected[1]
+        assert store.get_drop("999") is None
+    
+    def test_get_drop_uses_indexes(self, store):
+        """Test that single drop lookups are index searches, not table scans"""
+        for query, params in (("SELECT id FROM drops WHERE drop_number = ?", ("1",)),
+                              ("SELECT id FROM cards c WHERE c.drop_id = ? ORDER BY c.position", (0,))):
+            plan = " ".join(row[-1] for row in store.conn.execute("EXPLAIN QUERY PLAN " + query, params))
+            assert "USING" in plan and "INDEX" in plan
@@ -2,7 +2,10 @@ import os
 import json
 import pytest
 import responses
+import gzip
 import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from datetime import datetime, timedelta
 from unittest.mock import patch, MagicMock
 
@@ -12,9 +15,77 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from scripts.download_scryfall_data import (
     get_latest_all_cards_url,
     is_file_recent,
-    download_scryfall_data
+    download_scryfall_data,
+    load_manifest
 )
 
+class RangeRequestHandler(BaseHTTPRequestHandler):
+    """Serves the server's ``content`` with Range support, optionally dropping connections early"""
+    
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        content = server.content
+        gzip_encoded = server.gzip_encoding and 'gzip' in self.headers.get('Accept-Encoding', '')
+        if gzip_encoded:
+            content = server.gzip_content
+        if self.headers.get('If-None-Match') == '"v1"' and 'Range' not in self.headers:
+            self.send_response(304)
+            self.end_headers()
+            return
+        start = 0
+        range_header = self.headers.get('Range')
+        if range_header and server.supports_ranges:
+            start = int(range_header.split('=')[1].split('-')[0])
+            if start >= len(content):
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{len(content)}")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{len(content) - 1}/{len(content)}")
+        else:
+            self.send_response(200)
+        body = content[start:]
+        self.send_header('Content-Length', str(len(body)))
+        if gzip_encoded:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('ETag', '"v1"')
+        self.end_headers()
+        
+        # Simulate a dropped connection after a number of bytes
+        if server.fail_after:
+            cut = server.fail_after.pop(0)
+            self.wfile.write(body[:cut])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def range_server():
+    """Run a local HTTP server that serves a fixed payload with Range support"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), RangeRequestHandler)
+    server.content = json.dumps([{"name": f"Card {i}"} for i in range(2000)]).encode('utf-8')
+    server.gzip_content = gzip.compress(server.content)
+    server.gzip_encoding = False
+    server.supports_ranges = True
+    server.fail_after = []
+    server.requests = []
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/all-cards.json"
+    # Read in small chunks so dropped connections lose no more than the current chunk
+    patcher = patch('scripts.download_scryfall_data.DOWNLOAD_CHUNK_SIZE', 100)
+    patcher.start()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    patcher.stop()
+    server.shutdown()
+    server.server_close()
+
 class TestDownloadScryfallData:
     """Tests for the download_scryfall_data module"""
     
@@ -141,4 +212,165 @@ class TestDownloadScryfallData:
             assert saved_content == mock_content
             
             # Check that the function returned the expected path
-            assert result == test_file
\ No newline at end of file
+            assert result == test_file
+    
+    def test_download_resumes_after_dropped_connection(self, range_server, tmp_path):
+        """Test that an interrupted download resumes with a Range request"""
+        range_server.fail_after = [1000, 5000]
+        
+        result = download_scryfall_data(url=range_server.url, directory=str(tmp_path),
+                                        expected_size=len(range_server.content), backoff=0, filename='scryfall_data.json')
+        
+        assert result == str(tmp_path / "scryfall_data.json")
+        assert (tmp_path / "scryfall_data.json").read_bytes() == range_server.content
+        assert not os.path.exists(result + ".part")
+        assert 'Range' not in range_server.requests[0]
+        assert range_server.requests[1]['Range'] == 'bytes=1000-'
+        assert range_server.requests[1]['If-Range'] == '"v1"'
+        assert range_server.requests[2]['Range'] == 'bytes=6000-'
+    
+    def test_download_restarts_without_range_support(self, range_server, tmp_path):
+        """Test that the download starts over when the server ignores Range"""
+        range_server.supports_ranges = False
+        range_server.fail_after = [1000]
+        
+        result = download_scryfall_data(url=range_server.url, directory=str(tmp_path), backoff=0, filename='scryfall_data.json')
+        
+        assert (tmp_path / "scryfall_data.json").read_bytes() == range_server.content
+        assert result is not None
+    
+    def test_download_gives_up_and_keeps_no_final_file(self, range_server, tmp_path):
+        """Test that a download failing every attempt never produces the final file"""
+        range_server.fail_after = [100, 100, 100]
+        
+        result = download_scryfall_data(url=range_server.url, directory=str(tmp_path),
+                                        max_retries=2, backoff=0, filename='scryfall_data.json')
+        
+        assert result is None
+        assert not (tmp_path / "scryfall_data.json").exists()
+        # The partial file is kept so a later run can resume it
+        assert (tmp_path / "scryfall_data.json.part").stat().st_size == 300
+    
+    def test_download_rejects_size_mismatch(self, range_server, tmp_path):
+        """Test that a file larger than the advertised size is discarded"""
+        result = download_scryfall_data(url=range_server.url, directory=str(tmp_path),
+                                        expected_size=len(range_server.content) - 1,
+                                        max_retries=1, backoff=0, filename='scryfall_data.json')
+        
+        assert result is None
+        assert not (tmp_path / "scryfall_data.json").exists()
+    
+    def mock_bulk_data(self, url, updated_at, size, bulk_type="default_cards"):
+        """Register a Scryfall bulk data API response pointing at ``url``"""
+        responses.add(
+            responses.GET,
+            "https://api.scryfall.com/bulk-data",
+            json={"data": [{"type": bulk_type, "download_uri": url, "updated_at": updated_at, "size": size}]},
+            status=200
+        )
+    
+    @responses.activate
+    def test_download_skipped_when_updated_at_matches(self, tmp_path):
+        """Test that an unchanged bulk file costs only the bulk data API call"""
+        download_url = "https://scryfall.com/archive/cards/all-cards.json"
+        content = b'[{"name": "Test Card"}]'
+        self.mock_bulk_data(download_url, "2025-04-20T12:00:00.000Z", len(content))
+        responses.add(responses.GET, download_url, body=content, status=200,
+                      headers={'content-length': str(len(content)), 'etag': '"abc"'})
+        
+        filepath = download_scryfall_data(directory=str(tmp_path))
+        manifest = load_manifest(filepath)
+        assert manifest["updated_at"] == "2025-04-20T12:00:00.000Z"
+        assert manifest["etag"] == '"abc"'
+        assert manifest["file_size"] == os.path.getsize(filepath)
+        assert len(responses.calls) == 2
+        
+        # Even an old file is kept while Scryfall reports the same updated_at
+        os.utime(filepath, (0, 0))
+        assert download_scryfall_data(directory=str(tmp_path)) == filepath
+        assert len(responses.calls) == 3
+        assert responses.calls[2].request.url == "https://api.scryfall.com/bulk-data"
+    
+    @responses.activate
+    def test_download_when_updated_at_changes(self, tmp_path):
+        """Test that a newer bulk file on Scryfall is downloaded"""
+        download_url = "https://scryfall.com/archive/cards/all-cards.json"
+        (tmp_path / "scryfall_data.json.gz").write_bytes(gzip.compress(b'[]'))
+        (tmp_path / "scryfall_data.json.gz.manifest.json").write_text(json.dumps(
+            {"updated_at": "2025-04-19T12:00:00.000Z",
+             "file_size": (tmp_path / "scryfall_data.json.gz").stat().st_size}))
+        content = b'[{"name": "New Card"}]'
+        self.mock_bulk_data(download_url, "2025-04-20T12:00:00.000Z", len(content))
+        responses.add(responses.GET, download_url, body=content, status=200,
+                      headers={'content-length': str(len(content))})
+        
+        filepath = download_scryfall_data(directory=str(tmp_path))
+        
+        assert gzip.decompress((tmp_path / "scryfall_data.json.gz").read_bytes()) == content
+        assert load_manifest(filepath)["updated_at"] == "2025-04-20T12:00:00.000Z"
+    
+    @responses.activate
+    def test_download_when_bulk_type_changes(self, tmp_path):
+        """Test that switching bulk type replaces a file with the same updated_at"""
+        all_cards_url = "https://scryfall.com/archive/cards/all-cards.json"
+        default_cards_url = "https://scryfall.com/archive/cards/default-cards.json"
+        content = b'[{"name": "Test Card"}]'
+        self.mock_bulk_data(all_cards_url, "2025-04-20T12:00:00.000Z", len(content), bulk_type="all_cards")
+        responses.add(responses.GET, all_cards_url, body=content, status=200)
+        filepath = download_scryfall_data(directory=str(tmp_path), bulk_type="all_cards")
+        assert load_manifest(filepath)["type"] == "all_cards"
+        
+        self.mock_bulk_data(default_cards_url, "2025-04-20T12:00:00.000Z", len(content))
+        responses.add(responses.GET, default_cards_url, body=content, status=200)
+        download_scryfall_data(directory=str(tmp_path))
+        
+        assert responses.calls[-1].request.url == default_cards_url
+        assert load_manifest(filepath)["type"] == "default_cards"
+    
+    def test_download_rejects_unknown_bulk_type(self, tmp_path):
+        """Test that an unknown bulk type is refused before contacting Scryfall"""
+        assert download_scryfall_data(directory=str(tmp_path), bulk_type="oracle_cards") is None
+    
+    def test_download_revalidates_with_etag(self, range_server, tmp_path):
+        """Test that a file downloaded from the same URL is revalidated with If-None-Match"""
+        filepath = download_scryfall_data(url=range_server.url, directory=str(tmp_path))
+        assert load_manifest(filepath)["etag"] == '"v1"'
+        
+        assert download_scryfall_data(url=range_server.url, directory=str(tmp_path)) == filepath
+        
+        assert range_server.requests[1]['If-None-Match'] == '"v1"'
+        assert gzip.decompress((tmp_path / "scryfall_data.json.gz").read_bytes()) == range_server.content
+
+    def test_download_stores_gzip_transfer_as_is(self, range_server, tmp_path):
+        """Test that a gzip-encoded transfer is resumed and stored without re-encoding"""
+        range_server.gzip_encoding = True
+        range_server.fail_after = [500]
+        
+        filepath = download_scryfall_data(url=range_server.url, directory=str(tmp_path),
+                                          expected_size=len(range_server.content), backoff=0)
+        
+        assert filepath == str(tmp_path / "scryfall_data.json.gz")
+        assert (tmp_path / "scryfall_data.json.gz").read_bytes() == range_server.gzip_content
+        assert range_server.requests[0]['Accept-Encoding'] == 'gzip'
+        assert range_server.requests[1]['Range'] == 'bytes=500-'
+        assert load_manifest(filepath)["compression"] == 'gzip'
+    
+    def test_download_rejects_wrong_uncompressed_size(self, range_server, tmp_path):
+        """Test that a gzip transfer is checked against the uncompressed size"""
+        range_server.gzip_encoding = True
+        
+        filepath = download_scryfall_data(url=range_server.url, directory=str(tmp_path),
+                                          expected_size=len(range_server.content) + 1,
+                                          max_retries=0, backoff=0)
+        
+        assert filepath is None
+        assert not (tmp_path / "scryfall_data.json.gz").exists()
+        assert not (tmp_path / "scryfall_data.json.gz.part").exists()
+    
+    def test_download_decodes_gzip_for_plain_filename(self, range_server, tmp_path):
+        """Test that a plain .json destination gets the decoded JSON"""
+        range_server.gzip_encoding = True
+        
+        download_scryfall_data(url=range_server.url, directory=str(tmp_path), filename='plain.json')
+        
+        assert (tmp_path / "plain.json").read_bytes() == range_server.content
@@ -0,0 +1,52 @@
+import os
+import pytest
+
+# Add project root to path for imports
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.drop_totals import parse_price, compute_drop_totals, add_drop_totals
+
+class TestDropTotals:
+    """Tests for the drop_totals module"""
+    
+    def test_parse_price(self):
+        """Test converting Scryfall price strings"""
+        assert parse_price("10.99") == 10.99
+        assert parse_price(None) is None
+        assert parse_price("") is None
+        assert parse_price("invalid") is None
+    
+    def test_compute_drop_totals(self):
+        """Test summing prices and counting missing ones"""
+        cards = [
+            {"prices": {"usd": "10.10", "usd_foil": "20.20", "eur": None, "eur_foil": "1.00"}},
+            {"prices": {"usd": "0.20", "usd_foil": None, "eur": None, "eur_foil": "2.50"}},
+            {"name": "No Prices"}
+        ]
+        
+        totals = compute_drop_totals(cards)
+        
+        assert totals == {
+            "card_count": 3,
+            "usd": 10.3, "missing_usd": 1,
+            "usd_foil": 20.2, "missing_usd_foil": 2,
+            "eur": 0.0, "missing_eur": 3,
+            "eur_foil": 3.5, "missing_eur_foil": 1
+        }
+    
+    def test_add_drop_totals(self):
+        """Test that existing totals are kept unless overwrite is requested"""
+        drops = [
+            {"drop_number": "1", "cards": [{"prices": {"usd": "1.00"}}]},
+            {"drop_number": "2", "totals": {"usd": 99.0}},
+            {"drop_number": "3"}
+        ]
+        
+        add_drop_totals(drops)
+        
+        assert drops[0]["totals"]["usd"] == 1.0
+        assert drops[1]["totals"] == {"usd": 99.0}
+        assert drops[2]["totals"]["card_count"] == 0
+        
+        add_drop_totals(drops, overwrite=True)
+        assert drops[1]["totals"]["usd"] == 0.0
@@ -1,19 +1,42 @@
 import os
 import sys
 import pytest
+import logging
+import threading
 from unittest.mock import patch, MagicMock
 
 # Add project root to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from scripts.initialize_data import initialize_data_directory
+from scripts.initialize_data import initialize_data_directory, refresh_data_prices, refresh_api_prices, main
 
 class TestInitializeData:
     """Tests for the initialize_data module"""
     
+    @pytest.fixture(autouse=True)
+    def work_in_tmp_path(self, tmp_path, monkeypatch):
+        """Run in a temporary directory, so the relative data directory is never the repo's"""
+        monkeypatch.chdir(tmp_path)
+    
+    @pytest.fixture(autouse=True)
+    def mock_record_history(self):
+        """Keep the tests from writing to the real price history"""
+        with patch('scripts.initialize_data.record_price_history') as mock_record:
+            yield mock_record
+    
+    @pytest.fixture(autouse=True)
+    def mock_save_snapshot(self):
+        """Keep the tests from writing a binary snapshot to the real data directory"""
+        with patch('scripts.initialize_data.save_to_snapshot') as mock_save:
+            yield mock_save
+    
     @patch('scripts.initialize_data.download_scryfall_data')
-    @patch('scripts.initialize_data.scrape_secret_lairs')
+    @patch('scripts.initialize_data.fetch_secret_lairs')
+    @patch('scripts.initialize_data.load_previous_secret_lairs')
+    @patch('scripts.initialize_data.match_secret_lairs')
     @patch('scripts.initialize_data.save_to_json')
-    def test_initialize_data_success(self, mock_save_json, mock_scrape, mock_download):
+    @patch('scripts.initialize_data.save_to_sqlite')
+    def test_initialize_data_success(self, mock_save_sqlite, mock_save_json, mock_match, mock_load_previous,
+                                     mock_scrape, mock_download):
         """Test successful data initialization"""
         # Set up mocks
         mock_download.return_value = "/path/to/scryfall_data.json"
@@ -25,21 +48,32 @@ class TestInitializeData:
         # Check that the function returned True (success)
         assert result is True
         
-        # Check that the download was called
-        mock_download.assert_called_once()
+        # Check that the smallest bulk type covering Secret Lair cards was downloaded
+        mock_download.assert_called_once_with(directory="data", bulk_type="default_cards")
         
-        # Check that the scraper was called with the right arguments
-        mock_scrape.assert_called_once_with(
-            match_with_scryfall=True, 
-            scryfall_filepath=os.path.join("data", "scryfall_data.json")
+        # Check that the scraped drops were matched against the downloaded file
+        mock_scrape.assert_called_once_with()
+        mock_load_previous.assert_called_once_with(os.path.join("data", "secret_lairs.json"))
+        mock_match.assert_called_once_with(
+            mock_scrape.return_value,
+            scryfall_filepath=os.path.join("data", "scryfall_data.json.gz"),
+            previous=mock_load_previous.return_value
         )
         
         # Check that save_to_json was called
         mock_save_json.assert_called_once()
+        
+        # Check that the SQLite database was written alongside the JSON file
+        mock_save_sqlite.assert_called_once_with(mock_scrape.return_value, directory="data")
     
     @patch('scripts.initialize_data.download_scryfall_data')
-    @patch('scripts.initialize_data.scrape_secret_lairs')
-    def test_initialize_data_download_failure(self, mock_scrape, mock_download):
+    @patch('scripts.initialize_data.fetch_secret_lairs')
+    @patch('scripts.initialize_data.load_previous_secret_lairs')
+    @patch('scripts.initialize_data.match_secret_lairs')
+    @patch('scripts.initialize_data.save_to_json')
+    @patch('scripts.initialize_data.save_to_sqlite')
+    def test_initialize_data_download_failure(self, mock_save_sqlite, mock_save_json, mock_match, mock_load_previous,
+                                              mock_scrape, mock_download):
         """Test initialization when download fails"""
         # Set up mocks
         mock_download.return_value = None  # Download failed
@@ -57,9 +91,10 @@ class TestInitializeData:
         mock_scrape.assert_called_once()
     
     @patch('scripts.initialize_data.download_scryfall_data')
-    @patch('scripts.initialize_data.scrape_secret_lairs')
+    @patch('scripts.initialize_data.fetch_secret_lairs')
     @patch('scripts.initialize_data.save_to_json')
-    def test_initialize_data_scrape_failure(self, mock_save_json, mock_scrape, mock_download):
+    @patch('scripts.initialize_data.save_to_sqlite')
+    def test_initialize_data_scrape_failure(self, mock_save_sqlite, mock_save_json, mock_scrape, mock_download):
         """Test initialization when scraping fails"""
         # Set up mocks
         mock_download.return_value = "/path/to/scryfall_data.json"
@@ -79,10 +114,12 @@ class TestInitializeData:
         
         # Check that save_to_json was not called
         mock_save_json.assert_not_called()
+        mock_save_sqlite.assert_not_called()
     
     @patch('scripts.initialize_data.download_scryfall_data')
-    @patch('scripts.initialize_data.scrape_secret_lairs')
-    def test_initialize_data_force_flag(self, mock_scrape, mock_download):
+    @patch('scripts.initialize_data.fetch_secret_lairs')
+    @patch('scripts.initialize_data.save_to_sqlite')
+    def test_initialize_data_force_flag(self, mock_save_sqlite, mock_scrape, mock_download):
         """Test initialization with force flag"""
         # Set up mocks
         mock_download.return_value = "/path/to/scryfall_data.json"
@@ -95,4 +132,131 @@ class TestInitializeData:
         mock_download.assert_called_once()
         
         # Ideally we would check that the force flag was passed to download_scryfall_data,
-        # but since we're mocking the function, we can't check the actual arguments easily
\ No newline at end of file
+        # but since we're mocking the function, we can't check the actual arguments easily
+    
+    @patch('scripts.initialize_data.download_scryfall_data')
+    @patch('scripts.initialize_data.fetch_secret_lairs')
+    @patch('scripts.initialize_data.save_to_json')
+    @patch('scripts.initialize_data.save_to_sqlite')
+    def test_initialize_data_reports_incomplete_drops(self, mock_save_sqlite, mock_save_json, mock_scrape,
+                                                      mock_download, caplog):
+        """Test that drops with cards missing from the bulk data are reported"""
+        mock_download.return_value = "/path/to/scryfall_data.json.gz"
+        mock_scrape.return_value = [{"drop_number": "7", "name": "Partial Drop", "card_numbers": "SLD-1 - SLD-2",
+                                     "cards": [{"set": "sld", "collector_number": "1"}]}]
+        
+        result = initialize_data_directory(verbose=False, force=False, bulk_type="unique_artwork")
+        
+        assert result is True
+        mock_download.assert_called_once_with(directory="data", bulk_type="unique_artwork")
+        assert "7 Partial Drop: SLD-2" in caplog.text
+        assert "--bulk-type all_cards" in caplog.text
+    
+    @patch('scripts.initialize_data.download_scryfall_data')
+    @patch('scripts.initialize_data.fetch_secret_lairs')
+    @patch('scripts.initialize_data.match_secret_lairs')
+    @patch('scripts.initialize_data.save_to_json')
+    @patch('scripts.initialize_data.save_to_sqlite')
+    def test_initialize_data_overlaps_download_and_scrape(self, mock_save_sqlite, mock_save_json, mock_match,
+                                                          mock_scrape, mock_download, caplog):
+        """Test that the wiki scrape runs while the download is still in progress"""
+        scrape_done = threading.Event()
+        
+        def download(**kwargs):
+            # Only finishes once the scrape has completed, which would deadlock if the stages ran in sequence
+            assert scrape_done.wait(timeout=5)
+            return "/path/to/scryfall_data.json.gz"
+        
+        def scrape():
+            scrape_done.set()
+            return [{"drop_number": "1", "name": "Test Secret Lair", "card_numbers": "SLD-1"}]
+        
+        mock_download.side_effect = download
+        mock_scrape.side_effect = scrape
+        
+        with caplog.at_level(logging.INFO):
+            assert initialize_data_directory(verbose=False, force=False) is True
+        
+        mock_match.assert_called_once()
+        assert "Stage timings: " in caplog.text
+        for stage in ("download", "scrape", "match", "save", "total"):
+            assert f"{stage} " in caplog.text
+    
+    @patch('scripts.initialize_data.download_scryfall_data')
+    @patch('scripts.initialize_data.fetch_secret_lairs')
+    @patch('scripts.initialize_data.load_previous_secret_lairs')
+    @patch('scripts.initialize_data.refresh_prices')
+    @patch('scripts.initialize_data.save_to_json')
+    @patch('scripts.initialize_data.save_to_sqlite')
+    def test_refresh_data_prices(self, mock_save_sqlite, mock_save_json, mock_refresh, mock_load_previous,
+                                 mock_scrape, mock_download, mock_record_history):
+        """Test that a price refresh patches the saved drops without scraping the wiki"""
+        mock_download.return_value = "/path/to/scryfall_data.json.gz"
+        mock_load_previous.return_value = [{"drop_number": "1", "cards": [{"id": "a"}]}]
+        mock_refresh.return_value = 1
+        
+        assert refresh_data_prices() is True
+        
+        mock_scrape.assert_not_called()
+        mock_refresh.assert_called_once_with(mock_load_previous.return_value,
+                                             os.path.join("data", "scryfall_data.json.gz"))
+        mock_save_json.assert_called_once_with(mock_load_previous.return_value, directory="data")
+        mock_save_sqlite.assert_called_once_with(mock_load_previous.return_value, directory="data")
+        mock_record_history.assert_called_once_with(mock_load_previous.return_value, directory="data")
+    
+    @patch('scripts.initialize_data.download_scryfall_data')
+    @patch('scripts.initialize_data.load_previous_secret_lairs')
+    @patch('scripts.initialize_data.save_to_json')
+    def test_refresh_data_prices_without_saved_data(self, mock_save_json, mock_load_previous, mock_download):
+        """Test that a price refresh needs a previous full initialization"""
+        mock_load_previous.return_value = None
+        
+        assert refresh_data_prices() is False
+        
+        mock_download.assert_not_called()
+        mock_save_json.assert_not_called()
+    
+    @patch('scripts.initialize_data.download_scryfall_data')
+    @patch('scripts.initialize_data.load_previous_secret_lairs')
+    @patch('scripts.initialize_data.refresh_prices_from_api')
+    @patch('scripts.initialize_data.save_to_json')
+    @patch('scripts.initialize_data.save_to_sqlite')
+    def test_refresh_api_prices(self, mock_save_sqlite, mock_save_json, mock_refresh, mock_load_previous,
+                                mock_download, mock_record_history):
+        """Test that an API price refresh saves the patched drops without downloading bulk data"""
+        mock_load_previous.return_value = [{"drop_number": "1", "cards": [{"id": "a"}]}]
+        mock_refresh.return_value = 1
+        
+        assert refresh_api_prices() is True
+        
+        mock_download.assert_not_called()
+        mock_refresh.assert_called_once_with(mock_load_previous.return_value)
+        mock_save_json.assert_called_once_with(mock_load_previous.return_value, directory="data")
+        mock_record_history.assert_called_once_with(mock_load_previous.return_value, directory="data")
+        
+        # Nothing is saved when no card could be fetched
+        mock_save_json.reset_mock()
+        mock_refresh.return_value = None
+        assert refresh_api_prices() is False
+        mock_save_json.assert_not_called()
+    
+    @patch('scripts.initialize_data.initialize_data_directory')
+    @patch('scripts.initialize_data.refresh_api_prices')
+    @patch('export_static.export_static')
+    def test_main(self, mock_export, mock_refresh_api, mock_initialize):
+        """Test that the command line runs the selected mode and the static export after it"""
+        mock_initialize.return_value = True
+        mock_export.return_value = 0
+        assert main(['--force']) == 0
+        mock_initialize.assert_called_once_with(False, True, 'default_cards')
+        mock_export.assert_not_called()
+        
+        mock_refresh_api.return_value = True
+        assert main(['--api-prices', '--export-static', 'site']) == 0
+        mock_export.assert_called_once_with('site', "data", verbose=False)
+        
+        # No export after a failed refresh
+        mock_export.reset_mock()
+        mock_refresh_api.return_value = False
+        assert main(['--api-prices', '--export-static']) == 1
+        mock_export.assert_not_called()
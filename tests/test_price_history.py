@@ -0,0 +1,103 @@
+import os
+import sys
+import math
+import pytest
+from datetime import date
+
+# Add project root to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.price_history import PriceHistory, price_to_cents, record_price_history, HISTORY_FIELDS
+
+def make_drops(prices_by_id):
+    """Build a single drop containing one card per id with the given prices"""
+    return [{"drop_number": "1", "cards": [{"id": card_id, "prices": prices}
+                                           for card_id, prices in prices_by_id.items()]}]
+
+class TestPriceHistory:
+    """Tests for the columnar price history store"""
+    
+    def test_price_to_cents(self):
+        """Test converting Scryfall price strings to cents"""
+        assert price_to_cents("12.34") == 1234
+        assert math.isnan(price_to_cents(None))
+        assert math.isnan(price_to_cents("n/a"))
+    
+    def test_card_series(self, tmp_path):
+        """Test that a card's prices are read back per snapshot, across reopening the store"""
+        history = PriceHistory(str(tmp_path))
+        history.append_snapshot(make_drops({"a": {"usd": "1.10", "usd_foil": "2.00"}, "b": {"usd": "5.00"}}),
+                                date(2025, 1, 1))
+        history.append_snapshot(make_drops({"a": {"usd": "1.30"}}), date(2025, 1, 2))
+        
+        reopened = PriceHistory(str(tmp_path))
+        
+        assert reopened.dates() == [date(2025, 1, 1), date(2025, 1, 2)]
+        assert reopened.card_series("a") == [
+            {"date": "2025-01-01", "usd": 1.1, "usd_foil": 2.0, "eur": None, "eur_foil": None, "tix": None},
+            {"date": "2025-01-02", "usd": 1.3, "usd_foil": None, "eur": None, "eur_foil": None, "tix": None}
+        ]
+        # Card b was not in the second snapshot
+        assert [point["date"] for point in reopened.card_series("b")] == ["2025-01-01"]
+        assert reopened.card_series("unknown") == []
+    
+    def test_new_cards_get_new_slots(self, tmp_path):
+        """Test that cards first seen in a later snapshot only appear from that date on"""
+        history = PriceHistory(str(tmp_path))
+        history.append_snapshot(make_drops({"a": {"usd": "1.00"}}), date(2025, 1, 1))
+        history.append_snapshot(make_drops({"a": {"usd": "1.00"}, "c": {"usd": "3.00"}}), date(2025, 1, 2))
+        
+        assert PriceHistory(str(tmp_path)).card_series("c")[0]["date"] == "2025-01-02"
+        # One float32 per card slot per snapshot and column
+        assert os.path.getsize(tmp_path / "usd.f32") == (1 + 2) * 4
+    
+    def test_same_day_snapshot_replaces_previous(self, tmp_path):
+        """Test that rerunning on the same day overwrites that day's prices"""
+        history = PriceHistory(str(tmp_path))
+        history.append_snapshot(make_drops({"a": {"usd": "1.00"}}), date(2025, 1, 1))
+        history.append_snapshot(make_drops({"a": {"usd": "2.00"}}), date(2025, 1, 1))
+        
+        reopened = PriceHistory(str(tmp_path))
+        
+        assert len(reopened) == 1
+        assert reopened.card_series("a")[0]["usd"] == 2.0
+        assert os.path.getsize(tmp_path / "usd.f32") == 4
+    
+    def test_older_snapshot_rejected(self, tmp_path):
+        """Test that the history stays in date order"""
+        history = PriceHistory(str(tmp_path))
+        history.append_snapshot(make_drops({"a": {"usd": "1.00"}}), date(2025, 1, 2))
+        
+        with pytest.raises(ValueError):
+            history.append_snapshot(make_drops({"a": {"usd": "1.00"}}), date(2025, 1, 1))
+    
+    def test_interrupted_snapshot_is_ignored(self, tmp_path):
+        """Test that rows written without an index record are discarded by the next snapshot"""
+        history = PriceHistory(str(tmp_path))
+        history.append_snapshot(make_drops({"a": {"usd": "1.00"}}), date(2025, 1, 1))
+        for field in HISTORY_FIELDS:
+            with open(tmp_path / f"{field}.f32", 'ab') as f:
+                f.write(b'\x00' * 4)
+        
+        history = PriceHistory(str(tmp_path))
+        history.append_snapshot(make_drops({"a": {"usd": "2.00"}}), date(2025, 1, 2))
+        
+        assert [point["usd"] for point in PriceHistory(str(tmp_path)).card_series("a")] == [1.0, 2.0]
+    
+    def test_drop_series(self, tmp_path):
+        """Test that a drop's value history sums its cards per day"""
+        history = PriceHistory(str(tmp_path))
+        drops = make_drops({"a": {"usd": "1.10"}, "b": {"usd": "2.20", "usd_foil": "4.00"}})
+        history.append_snapshot(drops, date(2025, 1, 1))
+        
+        series = history.drop_series(drops[0])
+        
+        assert len(series) == 1
+        assert series[0]["date"] == "2025-01-01"
+        assert series[0]["usd"] == 3.3
+        assert series[0]["usd_foil"] == 4.0
+        assert series[0]["missing_usd_foil"] == 1
+    
+    def test_record_price_history(self, tmp_path):
+        """Test that snapshots are recorded under the data directory"""
+        assert record_price_history(make_drops({"a": {"usd": "1.00"}}), directory=str(tmp_path)) == 1
+        assert len(PriceHistory(str(tmp_path / "price_history"))) == 1
@@ -0,0 +1,84 @@
+import os
+import pytest
+from werkzeug.datastructures import MultiDict
+
+# Add project root to path for imports
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from web.response_cache import ResponseCache, cache_key
+
+class TestResponseCache:
+    """Tests for the rendered response cache"""
+
+    def test_cache_key(self):
+        """Test that query arguments are part of the key regardless of their order"""
+        assert cache_key('/', MultiDict()) == '/'
+        assert cache_key('/api/secret-lairs', MultiDict([('sort', 'name'), ('limit', '5')])) == \
+            cache_key('/api/secret-lairs', MultiDict([('limit', '5'), ('sort', 'name')]))
+        assert cache_key('/api/search', MultiDict([('q', 'a')])) != cache_key('/api/search', MultiDict([('q', 'b')]))
+
+    def test_cache_key_escapes_arguments(self):
+        """Test that a value containing "&" and "=" does not share the key of two arguments"""
+        assert cache_key('/api/secret-lairs', MultiDict([('limit', '2&sort=name')])) != \
+            cache_key('/api/secret-lairs', MultiDict([('limit', '2'), ('sort', 'name')]))
+
+    def test_get_and_put(self):
+        """Test that a cached response is returned for the same version only"""
+        cache = ResponseCache()
+        assert cache.get('v1', '/') is None
+        cache.put('v1', '/', b'<html>', 'text/html')
+
+        assert cache.get('v1', '/') == (b'<html>', 'text/html')
+        # A new dataset version drops every entry of the old one
+        assert cache.get('v2', '/') is None
+        assert cache.stats()["entries"] == 0
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 2
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entries are evicted to stay within the memory budget"""
+        cache = ResponseCache(max_bytes=10)
+        cache.put('v1', 'a', b'aaaa', 'text/plain')
+        cache.put('v1', 'b', b'bbbb', 'text/plain')
+        cache.get('v1', 'a')
+        cache.put('v1', 'c', b'cccc', 'text/plain')
+
+        assert cache.get('v1', 'b') is None
+        assert cache.get('v1', 'a') is not None
+        assert cache.get('v1', 'c') is not None
+        assert cache.stats()["bytes"] == 8
+        assert cache.stats()["evictions"] == 1
+
+        # Bodies larger than the whole budget are not cached
+        cache.put('v1', 'd', b'd' * 11, 'text/plain')
+        assert cache.get('v1', 'd') is None
+
+    def test_disabled(self):
+        """Test that a zero budget disables the cache"""
+        cache = ResponseCache(max_bytes=0)
+        cache.put('v1', '/', b'<html>', 'text/html')
+        assert cache.get('v1', '/') is None
+
+    def test_disk_backing(self, tmp_path):
+        """Test that entries on disk are served by a new cache and removed when the version changes"""
+        ResponseCache(directory=str(tmp_path)).put('v1', '/', b'<html>', 'text/html')
+
+        restarted = ResponseCache(directory=str(tmp_path))
+        assert restarted.get('v1', '/') == (b'<html>', 'text/html')
+        assert restarted.stats()["disk_hits"] == 1
+        assert restarted.get('v1', '/') is not None
+        assert restarted.stats()["hits"] == 1
+
+        assert restarted.get('v2', '/') is None
+        assert os.listdir(tmp_path / "response-cache") == []
+
+    def test_disk_backing_keeps_other_files(self, tmp_path):
+        """Test that files the cache did not write are never removed from its directory"""
+        (tmp_path / "price_history").mkdir()
+        (tmp_path / "secret_lairs.json").write_text("[]")
+        cache = ResponseCache(directory=str(tmp_path))
+        cache.put('v1', '/', b'<html>', 'text/html')
+        cache.get('v2', '/')
+        cache.clear()
+
+        assert sorted(os.listdir(tmp_path)) == ["price_history", "secret_lairs.json"]
@@ -1,3 +1,4 @@
+import io
 import os
 import json
 import pytest
@@ -8,49 +9,141 @@ from unittest.mock import patch, MagicMock, mock_open, ANY
 # Add project root to path for imports
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts import scrape_secret_lairs as scraper
+from scripts.card_index import IntervalSet
 from scripts.scrape_secret_lairs import (
+    iter_json_array,
+    load_scryfall_data,
+    set_code_predicate,
+    card_range_predicate,
     parse_card_number_range,
     find_matching_cards,
+    find_incomplete_drops,
+    match_secret_lairs,
+    refresh_prices,
+    parse_secret_lair_table,
     scrape_secret_lairs,
     save_to_json
 )
 
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "secret_lair_drop_series.html")
+
+# The lxml backend is only tested when the optional package is installed
+HTML_BACKENDS = [backend for backend in scraper.HTML_BACKENDS if backend != 'lxml' or scraper.lxml is not None]
+
 class TestScrapeSL:
     """Tests for the scrape_secret_lairs module"""
     
     def test_parse_card_number_range_simple(self):
         """Test parsing a simple card number range"""
         result = parse_card_number_range("SLD-123 - SLD-129")
-        assert result['type'] == 'list'
-        assert result['set'] == 'SLD'
-        assert result['numbers'] == [123, 124, 125, 126, 127, 128, 129]
+        assert result['type'] == 'intervals'
+        assert result['sets'] == {'SLD': IntervalSet([(123, 129)])}
+        assert list(result['sets']['SLD']) == [123, 124, 125, 126, 127, 128, 129]
+        assert result['variants'] == {}
     
     def test_parse_card_number_range_list(self):
         """Test parsing a comma-separated list of card numbers"""
         result = parse_card_number_range("SLD-123, SLD-125, SLD-127")
-        assert result['type'] == 'list'
-        assert result['set'] == 'SLD'
-        assert result['numbers'] == [123, 125, 127]
+        assert result['type'] == 'intervals'
+        assert list(result['sets']['SLD']) == [123, 125, 127]
     
     def test_parse_card_number_range_mixed(self):
         """Test parsing a mixed format with ranges and individual numbers"""
         result = parse_card_number_range("SLD-123 - SLD-125, SLD-130")
-        assert result['type'] == 'list'
-        assert result['set'] == 'SLD'
-        assert result['numbers'] == [123, 124, 125, 130]
+        assert result['type'] == 'intervals'
+        assert list(result['sets']['SLD'].intervals()) == [(123, 125), (130, 130)]
     
     def test_parse_card_number_simple_numbers(self):
         """Test parsing simple numbers without set code"""
         result = parse_card_number_range("123 - 125")
-        assert result['type'] == 'list'
-        assert result['set'] == 'SLD'  # Default set code
-        assert result['numbers'] == [123, 124, 125]
+        assert result['type'] == 'intervals'
+        assert list(result['sets']) == ['SLD']  # Default set code
+        assert list(result['sets']['SLD']) == [123, 124, 125]
+    
+    def test_parse_card_number_range_merges_overlaps(self):
+        """Test that overlapping and adjacent entries are merged into one interval"""
+        result = parse_card_number_range("SLD-501 - SLD-505, SLD-503, 506 – 510")
+        assert list(result['sets']['SLD'].intervals()) == [(501, 510)]
+    
+    def test_parse_card_number_range_variants_and_promo_sets(self):
+        """Test parsing variant suffixes and set codes other than SLD"""
+        result = parse_card_number_range("SLD-123★, SLD-45A, SLD-1 - 3, SLP-12 and PLST-SLD-4")
+        assert result['sets'] == {'SLD': IntervalSet([(1, 3)]), 'SLP': IntervalSet([(12, 12)])}
+        assert result['variants'] == {'SLD': ['45a', '123★'], 'PLST': ['SLD-4']}
+    
+    def test_parse_card_number_range_set_mismatch(self):
+        """Test that a range spanning two sets is skipped"""
+        assert parse_card_number_range("SLD-1 - SLP-4") is None
+        assert parse_card_number_range("SLD-1 - SLP-4, SLD-9")['sets'] == {'SLD': IntervalSet([(9, 9)])}
+    
+    def test_parse_card_number_range_reversed(self):
+        """Test that reversed ranges are skipped rather than producing an empty set"""
+        with patch.object(scraper.logger, 'warning') as warning:
+            assert parse_card_number_range("SLD-100 - SLD-90") is None
+        assert any("SLD-100 - SLD-90" in call.args[0] for call in warning.call_args_list)
+        assert parse_card_number_range("SLD-9★ - SLD-5★") is None
+        assert parse_card_number_range("SLD-100 - SLD-90, SLD-7")['sets'] == {'SLD': IntervalSet([(7, 7)])}
     
     def test_parse_card_number_invalid(self):
         """Test parsing an invalid format"""
         result = parse_card_number_range("Invalid Format")
         assert result is None
     
+    def test_iter_json_array_small_chunks(self):
+        """Test that elements split across read chunks are decoded correctly"""
+        items = [{"name": "Card A", "set": "sld"}, {"name": "Card B", "nested": [1, 2]}, 123, "x"]
+        stream = io.StringIO(json.dumps(items, indent=2))
+        
+        assert list(iter_json_array(stream, chunk_size=3)) == items
+    
+    def test_iter_json_array_numbers_across_chunks(self):
+        """Test that numbers split inside their fraction or exponent are not cut short"""
+        for text in ("[1.5e10]", "[1e5]", "[1.5, 2]", "[-0.25E-3 ,7]", "[12345]"):
+            for chunk_size in (1, 2, 3):
+                assert list(iter_json_array(io.StringIO(text), chunk_size=chunk_size)) == json.loads(text)
+    
+    def test_iter_json_array_empty(self):
+        """Test streaming an empty array"""
+        assert list(iter_json_array(io.StringIO("  [ ]  "))) == []
+    
+    def test_iter_json_array_invalid(self):
+        """Test that malformed input raises a JSON decode error"""
+        with pytest.raises(json.JSONDecodeError):
+            list(iter_json_array(io.StringIO('[{"name": "A"} {"name": "B"}]')))
+        with pytest.raises(json.JSONDecodeError):
+            list(iter_json_array(io.StringIO('{"name": "A"}')))
+        with pytest.raises(json.JSONDecodeError):
+            list(iter_json_array(io.StringIO('[{"name": "A"},')))
+    
+    def test_load_scryfall_data_filtered(self, tmp_path):
+        """Test loading only selected sets and fields from the Scryfall file"""
+        cards = [
+            {"name": "SLD Card", "set": "sld", "collector_number": "1", "lang": "en", "oracle_text": "..."},
+            {"name": "Other Card", "set": "eld", "collector_number": "1", "lang": "en"}
+        ]
+        filepath = tmp_path / "scryfall_data.json"
+        filepath.write_text(json.dumps(cards), encoding='utf-8')
+        
+        result = load_scryfall_data(str(filepath),
+                                    predicate=set_code_predicate({"SLD"}),
+                                    fields=("name", "set", "collector_number"))
+        
+        assert result == [{"name": "SLD Card", "set": "sld", "collector_number": "1"}]
+    
+    def test_load_scryfall_data_gzip(self, tmp_path):
+        """Test that a gzip-compressed Scryfall file is decompressed while streaming"""
+        import gzip
+        cards = [{"name": "SLD Card", "set": "sld", "collector_number": "1"}]
+        filepath = tmp_path / "scryfall_data.json.gz"
+        filepath.write_bytes(gzip.compress(json.dumps(cards).encode('utf-8')))
+        
+        assert load_scryfall_data(str(filepath)) == cards
+    
+    def test_load_scryfall_data_missing_file(self, tmp_path):
+        """Test loading a missing Scryfall file"""
+        assert load_scryfall_data(str(tmp_path / "missing.json")) is None
+    
     def test_find_matching_cards(self):
         """Test finding matching cards from Scryfall data"""
         # Sample Scryfall data
@@ -92,6 +185,156 @@ class TestScrapeSL:
         assert result[0]["name"] == "Test Card 1"
         assert result[1]["name"] == "Test Card 2"
     
+    def test_find_matching_cards_with_index(self):
+        """Test finding matching cards through a prebuilt CardIndex"""
+        from scripts.card_index import CardIndex
+        index = CardIndex([
+            {"name": "Test Card 1a", "set": "sld", "collector_number": "123a"},
+            {"name": "Test Card 1", "set": "sld", "collector_number": "123"},
+            {"name": "Test Card 3", "set": "sld", "collector_number": "125"}
+        ])
+        card_range = {'type': 'list', 'set': 'SLD', 'numbers': [123, 124]}
+        
+        result = find_matching_cards(index, card_range)
+        
+        assert [card["name"] for card in result] == ["Test Card 1", "Test Card 1a"]
+    
+    def test_find_matching_cards_variants_and_promo_sets(self):
+        """Test that listed variants match only their exact collector number, across sets"""
+        scryfall_data = [
+            {"name": "Star", "set": "sld", "collector_number": "123★"},
+            {"name": "Plain", "set": "sld", "collector_number": "123"},
+            {"name": "Other Variant", "set": "sld", "collector_number": "123a"},
+            {"name": "Range", "set": "sld", "collector_number": "2"},
+            {"name": "Promo", "set": "slp", "collector_number": "12"},
+            {"name": "List", "set": "plst", "collector_number": "SLD-4"}
+        ]
+        card_range = parse_card_number_range("SLD-123★, SLD-1 - SLD-3, SLP-12, PLST-SLD-4")
+        
+        result = find_matching_cards(scryfall_data, card_range)
+        
+        assert [card["name"] for card in result] == ["Range", "Star", "Promo", "List"]
+    
+    def test_card_range_predicate(self):
+        """Test that the predicate keeps only cards listed by one of the ranges"""
+        predicate = card_range_predicate([parse_card_number_range("SLD-1 - SLD-3, SLD-10★"),
+                                          parse_card_number_range("SLD-5, SLP-7"),
+                                          {'type': 'list', 'set': 'SLD', 'numbers': [20]}])
+        
+        assert predicate({"set": "sld", "collector_number": "2"})
+        assert predicate({"set": "sld", "collector_number": "2a"})
+        assert predicate({"set": "sld", "collector_number": "5"})
+        assert predicate({"set": "sld", "collector_number": "20"})
+        assert predicate({"set": "sld", "collector_number": "10★"})
+        assert predicate({"set": "slp", "collector_number": "7"})
+        assert not predicate({"set": "sld", "collector_number": "4"})
+        assert not predicate({"set": "sld", "collector_number": "10"})
+        assert not predicate({"set": "eld", "collector_number": "2"})
+        assert not predicate({"set": "sld", "collector_number": "★"})
+    
+    def test_card_range_predicate_builds_each_set_once(self):
+        """Test that the intervals of many ranges are merged into one IntervalSet per set in one pass"""
+        ranges = [parse_card_number_range(f"SLD-{n} - SLD-{n + 1}") for n in range(0, 2000, 3)]
+        with patch.object(scraper, 'IntervalSet', wraps=IntervalSet) as interval_set:
+            predicate = card_range_predicate(ranges)
+        
+        assert interval_set.call_count == 1
+        assert predicate({"set": "sld", "collector_number": "1999"})
+        assert not predicate({"set": "sld", "collector_number": "1997"})
+    
+    def test_find_incomplete_drops(self):
+        """Test that drops with unmatched collector numbers are reported"""
+        complete = {"drop_number": "1", "name": "Complete", "card_numbers": "SLD-1 - SLD-2",
+                    "cards": [{"set": "sld", "collector_number": "1"}, {"set": "sld", "collector_number": "2★"}]}
+        incomplete = {"drop_number": "2", "name": "Incomplete", "card_numbers": "SLD-3 - SLD-5",
+                      "cards": [{"set": "sld", "collector_number": "4"}]}
+        unparsed = {"drop_number": "3", "name": "Unparsed", "card_numbers": "TBA"}
+        
+        result = find_incomplete_drops([complete, incomplete, unparsed])
+        
+        assert result == [(incomplete, ["SLD-3", "SLD-5"])]
+    
+    def write_scryfall_file(self, tmp_path, cards):
+        """Write a Scryfall bulk data file and return its path"""
+        filepath = tmp_path / "scryfall_data.json"
+        filepath.write_text(json.dumps(cards), encoding='utf-8')
+        return str(filepath)
+    
+    def test_match_secret_lairs_reuses_unchanged_drops(self, tmp_path):
+        """Test that unchanged complete drops keep their cards and only get fresh prices"""
+        previous = [
+            {"drop_number": "1", "name": "Unchanged", "card_numbers": "SLD-1",
+             "cards": [{"name": "Old Name", "collector_number": "1", "set": "sld", "id": "a",
+                        "image_uri": "", "prices": {"usd": "1.00"}}]},
+            {"drop_number": "2", "name": "Renamed Before", "card_numbers": "SLD-2",
+             "cards": [{"name": "Card B", "collector_number": "2", "set": "sld", "id": "b",
+                        "image_uri": "", "prices": {"usd": "2.00"}}]},
+            {"drop_number": "3", "name": "Incomplete", "card_numbers": "SLD-3 - SLD-4",
+             "cards": [{"name": "Card C", "collector_number": "3", "set": "sld", "id": "c",
+                        "image_uri": "", "prices": {"usd": "3.00"}}]}
+        ]
+        scryfall_filepath = self.write_scryfall_file(tmp_path, [
+            {"name": "New Name", "collector_number": "1", "set": "sld", "id": "a", "prices": {"usd": "1.50"}},
+            {"name": "Card B", "collector_number": "2", "set": "sld", "id": "b", "prices": {"usd": "2.50"}},
+            {"name": "Card C", "collector_number": "3", "set": "sld", "id": "c", "prices": {"usd": "3.50"}},
+            {"name": "Card D", "collector_number": "4", "set": "sld", "id": "d", "prices": {"usd": "4.50"}}
+        ])
+        secret_lairs = [
+            {"drop_number": "1", "name": "Unchanged", "card_numbers": "SLD-1"},
+            {"drop_number": "2", "name": "Renamed After", "card_numbers": "SLD-2"},
+            {"drop_number": "3", "name": "Incomplete", "card_numbers": "SLD-3 - SLD-4"}
+        ]
+        
+        with patch('scripts.scrape_secret_lairs.find_matching_cards', wraps=find_matching_cards) as mock_find:
+            result = match_secret_lairs(secret_lairs, scryfall_filepath, previous=previous)
+        
+        # Only the changed and the incomplete drop were matched again
+        assert [list(call.args[1]['sets']['SLD']) for call in mock_find.call_args_list] == [[2], [3, 4]]
+        assert result[0]["cards"][0]["name"] == "Old Name"
+        assert result[0]["cards"][0]["prices"]["usd"] == "1.50"
+        assert result[0]["totals"]["usd"] == 1.5
+        assert [card["id"] for card in result[2]["cards"]] == ["c", "d"]
+    
+    def test_match_secret_lairs_keeps_reused_cards_without_scryfall_data(self, tmp_path):
+        """Test that reused drops keep their previous cards when the Scryfall file is missing"""
+        cards = [{"name": "Card A", "collector_number": "1", "set": "sld", "id": "a", "prices": {"usd": "1.00"}}]
+        previous = [{"drop_number": "1", "name": "Unchanged", "card_numbers": "SLD-1", "cards": cards}]
+        secret_lairs = [{"drop_number": "1", "name": "Unchanged", "card_numbers": "SLD-1"},
+                        {"drop_number": "2", "name": "New", "card_numbers": "SLD-2"}]
+        
+        result = match_secret_lairs(secret_lairs, str(tmp_path / "missing.json"), previous=previous)
+        
+        assert result[0]["cards"] == cards
+        assert "cards" not in result[1]
+    
+    def test_refresh_prices(self, tmp_path):
+        """Test that only the prices of stored cards are replaced and totals recomputed"""
+        secret_lairs = [{"drop_number": "1", "name": "Drop", "card_numbers": "SLD-1 - SLD-2", "cards": [
+            {"name": "Card A", "collector_number": "1", "set": "sld", "id": "a", "prices": {"usd": "1.00"}},
+            {"name": "Card B", "collector_number": "2", "set": "sld", "id": "b", "prices": {"usd": "2.00"}}
+        ]}]
+        scryfall_filepath = self.write_scryfall_file(tmp_path, [
+            {"name": "Renamed A", "collector_number": "1", "set": "sld", "id": "a",
+             "prices": {"usd": "1.25", "usd_foil": "3.00"}},
+            {"name": "Other", "collector_number": "9", "set": "sld", "id": "z", "prices": {"usd": "99.00"}}
+        ])
+        
+        updated = refresh_prices(secret_lairs, scryfall_filepath)
+        
+        assert updated == 1
+        cards = secret_lairs[0]["cards"]
+        assert cards[0]["name"] == "Card A"
+        assert cards[0]["prices"] == {"usd": "1.25", "usd_foil": "3.00", "eur": None, "eur_foil": None, "tix": None}
+        assert cards[1]["prices"] == {"usd": "2.00"}
+        assert secret_lairs[0]["totals"]["usd"] == 3.25
+    
+    def test_refresh_prices_missing_file(self, tmp_path):
+        """Test that a missing Scryfall file leaves the prices untouched"""
+        secret_lairs = [{"drop_number": "1", "cards": [{"id": "a", "prices": {"usd": "1.00"}}]}]
+        
+        assert refresh_prices(secret_lairs, str(tmp_path / "missing.json")) is None
+        assert secret_lairs[0]["cards"][0]["prices"] == {"usd": "1.00"}
+    
     def test_find_matching_cards_no_matches(self):
         """Test finding matching cards with no matches"""
         # Sample Scryfall data
@@ -167,6 +410,55 @@ class TestScrapeSL:
         assert result[1]["name"] == "Another Secret Lair"
         assert result[1]["card_numbers"] == "SLD-130, SLD-131"
     
+    @pytest.mark.parametrize("backend", HTML_BACKENDS)
+    def test_parse_secret_lair_table_fixture(self, backend):
+        """Test that every backend extracts the same drops from the saved wiki page"""
+        with open(FIXTURE_PATH, encoding='utf-8') as f:
+            html = f.read()
+        
+        soup = BeautifulSoup(html, 'html.parser')
+        expected = [[td.text.strip() for td in row.find_all('td')[:3]]
+                    for row in soup.find_all('table', class_='wikitable')[0].find_all('tr')[1:]]
+        
+        result = parse_secret_lair_table(html, backend)
+        
+        assert [[drop["drop_number"], drop["name"], drop["card_numbers"]] for drop in result] == expected
+    
+    @pytest.mark.parametrize("backend", HTML_BACKENDS)
+    def test_parse_secret_lair_table_markup(self, backend):
+        """Test that only the first wikitable is read, with entities decoded and nested markup flattened"""
+        html = """
+        <table class="infobox"><tr><td>1</td><td>Not a drop</td><td>SLD-1</td></tr></table>
+        <table class="wikitable sortable">
+            <tr><th>Drop #</th><th>Name</th><th>Cards</th></tr>
+            <tr><td>7</td><td><a href="/page/x"><i>Bitterblossom</i> &amp; Friends</a></td><td>SLD-7 - SLD-9</td></tr>
+            <tr><td>8</td><td>Only two columns</td></tr>
+        </table>
+        <table class="wikitable"><tr><th>#</th></tr><tr><td>9</td><td>Superdrop</td><td>SLD-99</td></tr></table>
+        """
+        
+        result = parse_secret_lair_table(html, backend)
+        
+        assert result == [{"drop_number": "7", "name": "Bitterblossom & Friends", "card_numbers": "SLD-7 - SLD-9"}]
+    
+    @pytest.mark.parametrize("backend", HTML_BACKENDS)
+    def test_parse_secret_lair_table_no_table(self, backend):
+        """Test that a page without a wikitable is reported as None"""
+        assert parse_secret_lair_table("<html><body><p>Moved</p></body></html>", backend) is None
+        assert parse_secret_lair_table("", backend) is None
+    
+    def test_parse_secret_lair_table_fallback(self):
+        """Test that the backends are tried fastest first and the strainer only when the others find nothing"""
+        html = '<table class="wikitable"><tr><th>#</th></tr><tr><td>1</td><td>Drop</td><td>SLD-1</td></tr></table>'
+        assert scraper.HTML_BACKEND_ORDER[-2:] == ('stream', 'bs4')
+        
+        with patch.dict(scraper.HTML_BACKENDS, {'bs4': MagicMock(side_effect=AssertionError("strainer used"))}):
+            assert parse_secret_lair_table(html)[0]["name"] == "Drop"
+        
+        with patch.dict(scraper.HTML_BACKENDS, {'lxml': MagicMock(return_value=None),
+                                                'stream': MagicMock(return_value=None)}):
+            assert parse_secret_lair_table(html)[0]["name"] == "Drop"
+    
     @patch('os.makedirs')
     @patch('builtins.open', new_callable=mock_open)
     def test_save_to_json(self, mock_file_open, mock_makedirs):
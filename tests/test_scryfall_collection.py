@@ -0,0 +1,152 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+import pytest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Add project root to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from unittest.mock import patch
+from scripts.scryfall_collection import fetch_cards_by_id, refresh_prices_from_api, batches, RateLimiter
+
+class StubScryfall(ThreadingHTTPServer):
+    """Local stand-in for Scryfall's /cards/collection endpoint"""
+    
+    def __init__(self, responses=()):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        # Statuses (or raw bodies, served with status 200) to answer with before serving cards normally
+        self.responses = list(responses)
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+    
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}/cards/collection"
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with server.lock:
+            server.requests.append((time.monotonic(), body, dict(self.headers)))
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            status = server.responses.pop(0) if server.responses else 200
+        time.sleep(0.02)
+        
+        ids = [identifier["id"] for identifier in body["identifiers"]]
+        if isinstance(status, bytes):
+            data, status = status, 200
+        elif status == 200:
+            payload = {"object": "list",
+                       "not_found": [{"id": card_id} for card_id in ids if card_id.startswith("missing")],
+                       "data": [{"object": "card", "id": card_id, "prices": {"usd": "2.50", "usd_foil": "5.00"}}
+                                for card_id in ids if not card_id.startswith("missing")]}
+            data = json.dumps(payload).encode('utf-8')
+        else:
+            data = json.dumps({"object": "error", "status": status}).encode('utf-8')
+        with server.lock:
+            server.in_flight -= 1
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        if status == 429:
+            self.send_header('Retry-After', '0')
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def stub():
+    """Start a stub Scryfall server; tests queue error statuses on stub.responses"""
+    server = StubScryfall()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+class TestScryfallCollection:
+    """Tests for the scryfall_collection module"""
+    
+    def test_batches(self):
+        """Test splitting identifiers into batches of at most 75"""
+        assert [len(batch) for batch in batches(list(range(160)))] == [75, 75, 10]
+        assert batches([]) == []
+    
+    def test_fetch_cards_in_rate_limited_batches(self, stub):
+        """Test that ids are fetched once, in batches, with spaced requests and bounded concurrency"""
+        card_ids = [f"id-{i}" for i in range(200)] + ["id-0", "missing-1"]
+        starts = []
+        wait = RateLimiter.wait
+        
+        async def record_start(limiter):
+            starts.append(await wait(limiter))
+        
+        with patch.object(RateLimiter, 'wait', autospec=True, side_effect=record_start):
+            cards, failed = asyncio.run(fetch_cards_by_id(card_ids, url=stub.url, concurrency=2, interval=0.05))
+        
+        assert failed == 0
+        assert set(cards) == {f"id-{i}" for i in range(200)}
+        assert sorted(len(body["identifiers"]) for _, body, _ in stub.requests) == [51, 75, 75]
+        # The limiter schedules request starts at least one interval apart
+        assert len(starts) == 3
+        assert all(later >= earlier + 0.05 for earlier, later in zip(starts, starts[1:]))
+        assert stub.max_in_flight <= 2
+        assert all(headers['User-Agent'] and headers['Accept'] == 'application/json'
+                   for _, _, headers in stub.requests)
+    
+    def test_retries_rate_limited_and_failing_requests(self, stub):
+        """Test that 429 and 5xx responses are retried and client errors are not"""
+        stub.responses = [429, 503]
+        cards, failed = asyncio.run(fetch_cards_by_id(["a"], url=stub.url, interval=0, backoff=0))
+        assert set(cards) == {"a"}
+        assert failed == 0
+        assert len(stub.requests) == 3
+        
+        stub.responses = [400]
+        cards, failed = asyncio.run(fetch_cards_by_id(["a"], url=stub.url, interval=0))
+        assert cards == {}
+        assert failed == 1
+        assert len(stub.requests) == 4
+    
+    def test_retries_invalid_json(self, stub):
+        """Test that a response body that is not valid JSON is retried like a server error"""
+        stub.responses = [b'{"object": "list", "data": [']
+        cards, failed = asyncio.run(fetch_cards_by_id(["a"], url=stub.url, interval=0, backoff=0))
+        assert set(cards) == {"a"}
+        assert failed == 0
+        assert len(stub.requests) == 2
+    
+    def test_refresh_prices_from_api(self, stub):
+        """Test that only the saved cards are requested and their prices and totals updated"""
+        secret_lairs = [
+            {"drop_number": "1", "name": "Drop", "cards": [
+                {"name": "Card A", "id": "a", "prices": {"usd": "1.00"}},
+                {"name": "Gone", "id": "missing-b", "prices": {"usd": "9.00"}}
+            ]},
+            {"drop_number": "2", "name": "Unmatched"}
+        ]
+        
+        updated = refresh_prices_from_api(secret_lairs, url=stub.url, interval=0)
+        
+        assert updated == 1
+        assert secret_lairs[0]["cards"][0]["prices"]["usd"] == "2.50"
+        assert secret_lairs[0]["cards"][1]["prices"]["usd"] == "9.00"
+        assert secret_lairs[0]["totals"]["usd"] == 11.5
+        assert [[identifier["id"] for identifier in body["identifiers"]] for _, body, _ in stub.requests] == [
+            ["a", "missing-b"]]
+    
+    def test_refresh_prices_from_api_unreachable(self, stub):
+        """Test that nothing is updated when no card could be fetched"""
+        stub.responses = [404]
+        secret_lairs = [{"drop_number": "1", "cards": [{"id": "a", "prices": {"usd": "1.00"}}]}]
+        
+        assert refresh_prices_from_api(secret_lairs, url=stub.url, interval=0) is None
+        assert secret_lairs[0]["cards"][0]["prices"]["usd"] == "1.00"
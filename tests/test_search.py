@@ -0,0 +1,72 @@
+import os
+import sys
+import pytest
+
+# Add project root to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from web.search import SearchIndex, normalize, tokenize
+
+SAMPLE_DROPS = [
+    {"drop_number": "1", "name": "Lórien's Elves", "cards": [
+        {"name": "Galadriel, Light of Valinor", "set": "sld", "collector_number": "1", "id": "a"},
+        {"name": "Elvish Mystic", "set": "sld", "collector_number": "2", "id": "b"}
+    ]},
+    {"drop_number": "2", "name": "Dragon Week", "cards": [
+        {"name": "Shivan Dragon", "set": "sld", "collector_number": "3", "id": "c"},
+        {"name": "Elvish Mystic", "set": "sld", "collector_number": "4", "id": "d"}
+    ]},
+    {"drop_number": "3", "name": "Upcoming Drop"}
+]
+
+class TestSearchIndex:
+    """Tests for the card and drop name search index"""
+    
+    def test_normalize(self):
+        """Test case and accent folding"""
+        assert normalize("Lórien's") == "loriens"
+        assert tokenize("Galadriel, Light of Valinor") == ["galadriel", "light", "of", "valinor"]
+    
+    def test_prefix_search(self):
+        """Test that query tokens match the start of words, case- and accent-insensitively"""
+        index = SearchIndex(SAMPLE_DROPS)
+        
+        assert [(r["type"], r["drop_number"]) for r in index.search("LORIEN")] == [("drop", "1")]
+        assert [r["name"] for r in index.search("gal li")] == ["Galadriel, Light of Valinor"]
+    
+    def test_cards_carry_their_drop(self):
+        """Test that a card in several drops is returned once per drop"""
+        results = SearchIndex(SAMPLE_DROPS).search("elvish myst")
+        
+        assert [(r["drop_number"], r["id"]) for r in results] == [("1", "b"), ("2", "d")]
+        assert results[0]["drop_name"] == "Lórien's Elves"
+    
+    def test_ranking_and_limit(self):
+        """Test that shorter names rank first and the limit is applied"""
+        index = SearchIndex(SAMPLE_DROPS)
+        
+        assert [r["name"] for r in index.search("dragon")] == ["Dragon Week", "Shivan Dragon"]
+        assert len(index.search("e", limit=2)) == 2
+    
+    def test_substring_fallback(self):
+        """Test that a token found in no word prefix matches inside words"""
+        assert [r["name"] for r in SearchIndex(SAMPLE_DROPS).search("adriel")] == ["Galadriel, Light of Valinor"]
+    
+    def test_prefix_matches_exclude_infix(self):
+        """Test that a token with prefix matches does not also match inside words"""
+        index = SearchIndex([{"drop_number": "1", "name": "Bolts", "cards": [
+            {"name": "Lightning Bolt", "id": "a"},
+            {"name": "Thunderbolt Lightning", "id": "b"}
+        ]}])
+        
+        assert [r["name"] for r in index.search("bolt")] == ["Bolts", "Lightning Bolt"]
+        assert [r["name"] for r in index.search("lightning bolt")] == ["Lightning Bolt"]
+        # Without any word starting with it, the token still matches inside words
+        assert [r["name"] for r in index.search("underbolt")] == ["Thunderbolt Lightning"]
+    
+    def test_no_matches(self):
+        """Test queries without results"""
+        index = SearchIndex(SAMPLE_DROPS)
+        
+        assert index.search("zzz") == []
+        assert index.search("  ,, ") == []
+        assert SearchIndex([]).search("dragon") == []
@@ -0,0 +1,76 @@
+import os
+import gc
+import json
+import pytest
+from unittest.mock import MagicMock
+
+# Add project root to path for imports
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from web.app import app, repository
+from web import server
+from web.server import server_options, preload_dataset, reload_dataset
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """Point the app at a temporary data directory with one drop"""
+    (tmp_path / "secret_lairs.json").write_text(json.dumps([
+        {"drop_number": "1", "name": "Test Drop", "card_numbers": "SLD-1",
+         "cards": [{"name": "Test Card", "collector_number": "1", "set": "sld", "id": "a",
+                    "prices": {"usd": "1.00"}}]}
+    ]))
+    original = app.config['DATA_DIR']
+    app.config['DATA_DIR'] = str(tmp_path)
+    yield tmp_path
+    app.config['DATA_DIR'] = original
+    app.config['BINARY_SNAPSHOT'] = False
+    repository.invalidate()
+    gc.unfreeze()
+
+class TestServer:
+    """Tests for the production server"""
+    
+    def test_server_options(self):
+        """Test that the server preloads the app and reloads the dataset on SIGHUP"""
+        options = server_options('0.0.0.0', 8000, workers=4, threads=8, keepalive=10, timeout=60)
+        
+        assert options['bind'] == '0.0.0.0:8000'
+        assert options['workers'] == 4
+        assert options['threads'] == 8
+        assert options['keepalive'] == 10
+        assert options['graceful_timeout'] == 60
+        assert options['preload_app'] is True
+        assert options['on_reload'] is reload_dataset
+    
+    def test_preload_dataset(self, data_dir):
+        """Test that the dataset and its indexes are built before the workers fork"""
+        assert preload_dataset() is app
+        
+        snapshot = repository.snapshot()
+        assert len(snapshot.secret_lairs) == 1
+        assert set(snapshot._derived) == {'analytics', 'search'}
+        assert gc.get_freeze_count() > 0
+        # Workers share the memory-mapped snapshot when one is written
+        assert app.config['BINARY_SNAPSHOT'] is True
+    
+    def test_reload_dataset(self, data_dir):
+        """Test that SIGHUP picks up a rebuilt data file in the master process"""
+        preload_dataset()
+        (data_dir / "secret_lairs.json").write_text(json.dumps([
+            {"drop_number": "1", "name": "Test Drop", "card_numbers": "SLD-1"},
+            {"drop_number": "2", "name": "New Drop", "card_numbers": "SLD-2 - SLD-3"}
+        ]))
+        
+        reload_dataset(MagicMock())
+        
+        assert len(repository.snapshot().secret_lairs) == 2
+        assert 'search' in repository.snapshot()._derived
+    
+    def test_production_server_config(self):
+        """Test that the gunicorn application applies the settings"""
+        pytest.importorskip("gunicorn")
+        application = server.ProductionServer(server_options('127.0.0.1', 8001, workers=3))
+        
+        assert application.cfg.workers == 3
+        assert application.cfg.preload_app is True
+        assert application.cfg.address == [('127.0.0.1', 8001)]
@@ -0,0 +1,98 @@
+import os
+import gzip
+import json
+import pytest
+from unittest.mock import patch
+
+# Add project root to path for imports
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from web.app import app
+from web.static_export import export_routes, write_file, export_static_site, MIN_COMPRESS_SIZE
+
+DROPS = [
+    {"drop_number": "1", "name": "First Drop", "card_numbers": "SLD-1",
+     "cards": [{"name": "Test Card", "collector_number": "1", "set": "sld", "id": "a",
+                "image_uri": "https://example.com/a.jpg", "prices": {"usd": "1.00", "usd_foil": "2.00"}}]},
+    {"drop_number": "2", "name": "Second Drop", "card_numbers": "SLD-2",
+     "cards": [{"name": "Other Card", "collector_number": "2", "set": "sld", "id": "b",
+                "image_uri": "https://example.com/b.jpg", "prices": {"usd": "3.00", "usd_foil": None}}]}
+]
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """Create a data directory with two drops"""
+    directory = tmp_path / "data"
+    directory.mkdir()
+    (directory / "secret_lairs.json").write_text(json.dumps(DROPS))
+    return directory
+
+class TestStaticExport:
+    """Tests for the static site export"""
+
+    def test_export_routes(self):
+        """Test that pages get directory index files and API responses .json files"""
+        routes = dict(export_routes(["7", "Promo A", "../x"]))
+
+        assert routes['/'] == 'index.html'
+        assert routes['/secret-lair/7'] == 'secret-lair/7/index.html'
+        assert routes['/api/secret-lair/7'] == 'api/secret-lair/7.json'
+        assert routes['/api/analytics/drops/7'] == 'api/analytics/drops/7.json'
+        assert routes['/secret-lair/Promo%20A'] == 'secret-lair/Promo A/index.html'
+        # Drop numbers that would escape their directory are not exported
+        assert not any('..' in filename for filename in routes.values())
+
+    def test_write_file_compresses(self, tmp_path):
+        """Test that large files get a gzip sibling and small ones are written as is"""
+        body = b'<html>' + b'x' * MIN_COMPRESS_SIZE + b'</html>'
+        written = write_file(body, str(tmp_path / "page" / "index.html"))
+
+        assert str(tmp_path / "page" / "index.html.gz") in written
+        assert gzip.decompress((tmp_path / "page" / "index.html.gz").read_bytes()) == body
+        assert write_file(b'{}', str(tmp_path / "small.json")) == [str(tmp_path / "small.json")]
+
+    def test_export_static_site(self, data_dir, tmp_path):
+        """Test that every page and API response matches what the app serves"""
+        output_dir = tmp_path / "site"
+        result = export_static_site(str(output_dir), str(data_dir), processes=1)
+
+        assert result['routes'] == 4 + 3 * len(DROPS)
+        assert "Second Drop" in (output_dir / "secret-lair" / "2" / "index.html").read_text()
+        assert json.loads((output_dir / "api" / "secret-lair" / "1.json").read_text())["name"] == "First Drop"
+        assert len(json.loads((output_dir / "api" / "secret-lairs.json").read_text())) == 2
+        assert (output_dir / "index.html.gz").exists()
+        assert (output_dir / "404.html").exists()
+        assert (output_dir / "static" / "css" / "style.css").exists()
+        manifest = json.loads((output_dir / "manifest.json").read_text())
+        assert manifest["routes"]["/api/analytics/summary"] == "api/analytics/summary.json"
+        # The app is left pointing at its own data directory
+        assert app.config['DATA_DIR'] != str(data_dir)
+
+    def test_export_static_site_in_processes(self, data_dir, tmp_path):
+        """Test that renders split across worker processes produce the same files"""
+        inline = tmp_path / "inline"
+        parallel = tmp_path / "parallel"
+        export_static_site(str(inline), str(data_dir), processes=1)
+        export_static_site(str(parallel), str(data_dir), processes=2, chunk_size=2)
+
+        for path in ("index.html", "secret-lair/1/index.html", "api/analytics/drops.json"):
+            assert (inline / path).read_bytes() == (parallel / path).read_bytes()
+
+    def test_export_replaces_previous_export(self, data_dir, tmp_path):
+        """Test that a new export replaces the old one and a failed export leaves it intact"""
+        output_dir = tmp_path / "site"
+        output_dir.mkdir()
+        (output_dir / "stale.html").write_text("old")
+        export_static_site(str(output_dir), str(data_dir), processes=1)
+        assert not (output_dir / "stale.html").exists()
+
+        with patch('web.static_export.render_routes', side_effect=RuntimeError("render failed")):
+            with pytest.raises(RuntimeError):
+                export_static_site(str(output_dir), str(data_dir), processes=1)
+        assert (output_dir / "index.html").exists()
+        assert not (tmp_path / "site.tmp").exists()
+
+    def test_export_without_data(self, tmp_path):
+        """Test that exporting an empty data directory fails"""
+        with pytest.raises(RuntimeError):
+            export_static_site(str(tmp_path / "site"), str(tmp_path), processes=1)
@@ -6,14 +6,21 @@ from unittest.mock import patch, mock_open
 # Add project root to path for imports
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from web.app import app
+from web.app import app, response_cache
 
 @pytest.fixture
-def client():
+def client(tmp_path):
     """Create a test client for the Flask application"""
     app.config['TESTING'] = True
+    # Point the app at an empty data directory so tests never read real data files
+    data_dir = app.config['DATA_DIR']
+    app.config['DATA_DIR'] = str(tmp_path)
+    # Views are mocked per test, so responses cached by other tests must not be served
+    response_cache.clear()
     with app.test_client() as client:
         yield client
+    app.config['DATA_DIR'] = data_dir
+    response_cache.clear()
 
 class TestWebApp:
     """Tests for the Flask web application"""
@@ -49,7 +56,25 @@ class TestWebApp:
         assert b'Test Secret Lair' in response.data
     
     @patch('web.app.load_secret_lairs')
-    def test_detail_route(self, mock_load_secret_lairs, client):
+    def test_index_route_uses_precomputed_totals(self, mock_load_secret_lairs, client):
+        """Test that the index page shows the drop totals computed by the pipeline"""
+        mock_load_secret_lairs.return_value = [
+            {
+                "drop_number": "123",
+                "name": "Test Secret Lair",
+                "card_numbers": "SLD-123",
+                "cards": [{"name": "Test Card 1", "prices": {"usd": "1.00", "usd_foil": "2.00"}}],
+                "totals": {"card_count": 1, "usd": 42.5, "usd_foil": 99.25}
+            }
+        ]
+        
+        response = client.get('/')
+        
+        assert b'$99.25' in response.data
+        assert b'$42.50' in response.data
+    
+    @patch('web.app.load_secret_lair')
+    def test_detail_route(self, mock_load_secret_lair, client):
         """Test the secret lair detail route"""
         # Mock the secret lairs data
         mock_secret_lairs = [
@@ -68,7 +93,7 @@ class TestWebApp:
                 ]
             }
         ]
-        mock_load_secret_lairs.return_value = mock_secret_lairs
+        mock_load_secret_lair.return_value = mock_secret_lairs[0]
         
         # Make a request to the detail route
         response = client.get('/secret-lair/123')
@@ -78,11 +103,11 @@ class TestWebApp:
         assert b'Test Secret Lair' in response.data
         assert b'Test Card 1' in response.data
     
-    @patch('web.app.load_secret_lairs')
-    def test_detail_route_not_found(self, mock_load_secret_lairs, client):
+    @patch('web.app.load_secret_lair')
+    def test_detail_route_not_found(self, mock_load_secret_lair, client):
         """Test the detail route with a non-existent drop number"""
         # Mock the secret lairs data
-        mock_load_secret_lairs.return_value = []
+        mock_load_secret_lair.return_value = None
         
         # Make a request to a non-existent detail route
         response = client.get('/secret-lair/999')
@@ -112,8 +137,8 @@ class TestWebApp:
         assert data[0]["drop_number"] == "123"
         assert data[0]["name"] == "Test Secret Lair"
     
-    @patch('web.app.load_secret_lairs')
-    def test_api_secret_lair_detail(self, mock_load_secret_lairs, client):
+    @patch('web.app.load_secret_lair')
+    def test_api_secret_lair_detail(self, mock_load_secret_lair, client):
         """Test the API endpoint for a specific secret lair"""
         # Mock the secret lairs data
         mock_secret_lairs = [
@@ -123,7 +148,7 @@ class TestWebApp:
                 "cards": [{"name": "Test Card"}]
             }
         ]
-        mock_load_secret_lairs.return_value = mock_secret_lairs
+        mock_load_secret_lair.return_value = mock_secret_lairs[0]
         
         # Make a request to the API detail route
         response = client.get('/api/secret-lair/123')
@@ -135,11 +160,11 @@ class TestWebApp:
         assert data["name"] == "Test Secret Lair"
         assert len(data["cards"]) == 1
     
-    @patch('web.app.load_secret_lairs')
-    def test_api_secret_lair_detail_not_found(self, mock_load_secret_lairs, client):
+    @patch('web.app.load_secret_lair')
+    def test_api_secret_lair_detail_not_found(self, mock_load_secret_lair, client):
         """Test the API detail route with a non-existent drop number"""
         # Mock the secret lairs data
-        mock_load_secret_lairs.return_value = []
+        mock_load_secret_lair.return_value = None
         
         # Make a request to a non-existent API detail route
         response = client.get('/api/secret-lair/999')
@@ -156,6 +181,278 @@ class TestWebApp:
         assert response.status_code == 404
         assert b'Page Not Found' in response.data
 
+    def test_routes_use_card_database(self, client, tmp_path):
+        """Test that routes read from the SQLite database when it exists"""
+        from scripts.card_store import save_to_sqlite
+        save_to_sqlite([
+            {
+                "drop_number": "123",
+                "name": "Database Secret Lair",
+                "card_numbers": "SLD-123",
+                "cards": [
+                    {
+                        "name": "Database Card",
+                        "collector_number": "123",
+                        "set": "sld",
+                        "id": "abc",
+                        "image_uri": "https://example.com/image1.jpg",
+                        "prices": {"usd": "10.99", "usd_foil": "20.99"}
+                    }
+                ]
+            }
+        ], directory=str(tmp_path))
+        
+        # Drop pages read the one drop with an indexed query instead of loading every drop
+        with patch('web.app.CardStore.list_drops', side_effect=AssertionError("loaded every drop")):
+            response = client.get('/secret-lair/123')
+            assert response.status_code == 200
+            assert b'Database Card' in response.data
+            assert json.loads(client.get('/api/secret-lair/123').data)["cards"][0]["name"] == "Database Card"
+        
+        data = json.loads(client.get('/api/secret-lairs').data)
+        assert data[0]["name"] == "Database Secret Lair"
+        assert data[0]["cards"][0]["prices"]["usd"] == "10.99"
+        
+        assert client.get('/api/secret-lair/999').status_code == 404
+    
+    def test_routes_use_binary_snapshot(self, client, tmp_path):
+        """Test that routes read from the memory-mapped snapshot when it exists"""
+        from scripts.binary_snapshot import save_to_snapshot
+        from web.app import repository
+        (tmp_path / "secret_lairs.json").write_text(json.dumps([{"drop_number": "1", "name": "JSON Drop"}]))
+        save_to_snapshot([
+            {"drop_number": "2", "name": "Cheap Drop", "card_numbers": "SLD-2",
+             "cards": [{"name": "Cheap Card", "collector_number": "2", "set": "sld", "id": "b",
+                        "prices": {"usd": "1.00"}}]},
+            {"drop_number": "10", "name": "Snapshot Drop", "card_numbers": "SLD-10",
+             "cards": [{"name": "Snapshot Card", "collector_number": "10", "set": "sld", "id": "a",
+                        "prices": {"usd": "10.99"}}]}
+        ], directory=str(tmp_path))
+        
+        # The snapshot is only read when enabled, as the production server does
+        assert json.loads(client.get('/api/secret-lairs').data)[0]["name"] == "JSON Drop"
+        app.config['BINARY_SNAPSHOT'] = True
+        repository.invalidate()
+        response_cache.clear()
+        try:
+            self.check_binary_snapshot_routes(client)
+        finally:
+            app.config['BINARY_SNAPSHOT'] = False
+            repository.invalidate()
+    
+    def check_binary_snapshot_routes(self, client):
+        """Check that routes serve the drops of the binary snapshot written by test_routes_use_binary_snapshot"""
+        from web.app import repository
+        response = client.get('/secret-lair/10')
+        assert response.status_code == 200
+        assert b'Snapshot Card' in response.data
+        assert client.get('/secret-lair/1').status_code == 404
+        
+        # The home page decodes only the cards it previews, and counts the rest from the totals
+        with patch('web.app.PREVIEW_CARD_COUNT', 0):
+            page = client.get('/').data
+        assert b'Snapshot Drop' in page and b'Snapshot Card' not in page
+        assert b'<strong>Cards:</strong> 1' in page
+        
+        data = json.loads(client.get('/api/secret-lairs').data)
+        assert [drop["name"] for drop in data] == ["Cheap Drop", "Snapshot Drop"]
+        
+        # Sort orders over a snapshot keep positions instead of decoded drops
+        page = json.loads(client.get('/api/secret-lairs?sort=-value&limit=1').data)
+        assert [drop["name"] for drop in page["items"]] == ["Snapshot Drop"]
+        assert type(repository.snapshot().sort_order('value', None, reverse=True)).__name__ == 'OrderedView'
+        
+        results = json.loads(client.get('/api/search?q=snap').data)["results"]
+        assert [result["name"] for result in results] == ["Snapshot Card", "Snapshot Drop"]
+    
+    def test_repository_reloads_when_file_changes(self, client, tmp_path):
+        """Test that data is cached until the source file changes"""
+        from web.app import repository
+        repository.invalidate()
+        data_file = tmp_path / "secret_lairs.json"
+        data_file.write_text(json.dumps([{"drop_number": "1", "name": "Original Drop"}]))
+        
+        stats = repository.stats()
+        assert json.loads(client.get('/api/secret-lair/1').data)["name"] == "Original Drop"
+        assert json.loads(client.get('/api/secret-lair/1').data)["name"] == "Original Drop"
+        
+        # Rewrite with a different size and mtime so the change is always detected
+        data_file.write_text(json.dumps([{"drop_number": "1", "name": "Updated Drop"}, {"drop_number": "2", "name": "New"}]))
+        os.utime(data_file, ns=(0, 0))
+        assert json.loads(client.get('/api/secret-lair/1').data)["name"] == "Updated Drop"
+        
+        counters = json.loads(client.get('/api/cache-stats').data)
+        assert counters["misses"] - stats["misses"] == 2
+        assert counters["reloads"] - stats["reloads"] == 1
+        assert counters["hits"] - stats["hits"] == 1
+        assert counters["drops"] == 2
+    
+    def write_drops(self, tmp_path, count):
+        """Write a secret_lairs.json with ``count`` drops to the test data directory"""
+        from web.app import repository
+        repository.invalidate()
+        drops = [
+            {
+                "drop_number": str(number),
+                "name": f"Drop {'Even' if number % 2 == 0 else 'Odd'} {number}",
+                "card_numbers": f"SLD-{number}",
+                "cards": [{"name": f"Card {number}", "prices": {"usd": str(number), "usd_foil": None}}]
+            }
+            for number in range(1, count + 1)
+        ]
+        (tmp_path / "secret_lairs.json").write_text(json.dumps(drops))
+    
+    def test_api_secret_lairs_cursor_pagination(self, client, tmp_path):
+        """Test walking the drop listing page by page with cursors"""
+        self.write_drops(tmp_path, 12)
+        
+        seen = []
+        cursor = None
+        while True:
+            url = '/api/secret-lairs?limit=5&fields=drop_number'
+            if cursor:
+                url += f'&cursor={cursor}'
+            page = json.loads(client.get(url).data)
+            assert page["total"] == 12
+            seen.extend(item["drop_number"] for item in page["items"])
+            assert all(list(item) == ["drop_number"] for item in page["items"])
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+        
+        # Drop numbers use natural ordering, so "10" comes after "9"
+        assert seen == [str(number) for number in range(1, 13)]
+    
+    def test_api_secret_lairs_sort_and_filter(self, client, tmp_path):
+        """Test sorting and filtering the drop listing"""
+        self.write_drops(tmp_path, 10)
+        
+        data = json.loads(client.get('/api/secret-lairs?sort=-value&q=even&min_value=3&max_value=8').data)
+        assert [drop["drop_number"] for drop in data] == ["8", "6", "4"]
+        assert data[0]["totals"]["usd"] == 8.0
+        
+        page = json.loads(client.get('/api/secret-lairs?sort=name&q=odd&limit=2&page=2').data)
+        assert [item["name"] for item in page["items"]] == ["Drop Odd 5", "Drop Odd 7"]
+        assert "total" not in page
+    
+    def test_api_secret_lairs_invalid_parameters(self, client, tmp_path):
+        """Test that invalid query parameters are rejected"""
+        self.write_drops(tmp_path, 3)
+        
+        assert client.get('/api/secret-lairs?sort=unknown').status_code == 400
+        assert client.get('/api/secret-lairs?limit=0').status_code == 400
+        assert client.get('/api/secret-lairs?min_value=abc').status_code == 400
+        assert client.get('/api/secret-lairs?min_value=nan').status_code == 400
+        assert client.get('/api/secret-lairs?max_value=-inf').status_code == 400
+        assert client.get('/api/secret-lairs?cursor=not-a-cursor').status_code == 400
+        
+        # Cursors are tied to the sort order they were issued for
+        cursor = json.loads(client.get('/api/secret-lairs?limit=1').data)["next_cursor"]
+        assert client.get(f'/api/secret-lairs?sort=name&cursor={cursor}').status_code == 400
+    
+    def test_conditional_get(self, client, tmp_path):
+        """Test ETag and Last-Modified handling on JSON and HTML routes"""
+        self.write_drops(tmp_path, 2)
+        
+        for url in ['/', '/secret-lair/1', '/api/secret-lairs', '/api/secret-lair/1', '/api/secret-lairs?limit=1']:
+            response = client.get(url)
+            assert response.status_code == 200
+            etag = response.headers['ETag']
+            last_modified = response.headers['Last-Modified']
+            
+            assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+            assert client.get(url, headers={'If-Modified-Since': last_modified}).status_code == 304
+            assert client.get(url, headers={'If-None-Match': '"stale"'}).status_code == 200
+        
+        # A weak validator from a compressing proxy still matches
+        assert client.get(url, headers={'If-None-Match': f'W/{etag}'}).status_code == 304
+        
+        # Not found responses and invalid requests are never conditional
+        assert client.get('/secret-lair/999', headers={'If-None-Match': etag}).status_code == 404
+        assert client.get('/api/secret-lairs?sort=bogus', headers={'If-None-Match': etag}).status_code == 400
+        assert client.get('/api/search?q=', headers={'If-None-Match': etag}).status_code == 400
+        
+        # Rebuilding the data with different content changes the ETag
+        self.write_drops(tmp_path, 3)
+        response = client.get('/api/secret-lairs', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+
+    def test_response_cache(self, client, tmp_path):
+        """Test that rendered responses are reused until the data changes"""
+        from web.app import response_cache
+        self.write_drops(tmp_path, 2)
+        hits = response_cache.hits
+        first = client.get('/')
+
+        with patch('web.app.render_template', side_effect=AssertionError("view ran again")):
+            cached = client.get('/')
+        assert cached.data == first.data
+        assert cached.headers['ETag'] == first.headers['ETag']
+        assert cached.mimetype == 'text/html'
+
+        # Query arguments are part of the key
+        assert len(json.loads(client.get('/api/secret-lairs?limit=1').data)["items"]) == 1
+        assert len(json.loads(client.get('/api/secret-lairs?limit=2').data)["items"]) == 2
+
+        # A data reload invalidates every cached response
+        self.write_drops(tmp_path, 3)
+        assert b'Drop Odd 3' in client.get('/').data
+        counters = json.loads(client.get('/api/cache-stats').data)["responses"]
+        assert counters["hits"] - hits == 1
+        assert counters["entries"] == 1
+
+        # An encoded "&" is part of the value, not a second cached argument
+        assert client.get('/api/secret-lairs?limit=2&sort=name').status_code == 200
+        assert client.get('/api/secret-lairs?limit=2%26sort%3Dname').status_code == 400
+
+    def test_response_cache_tracks_settings(self, client, tmp_path):
+        """Test that responses cached or revalidated with other retail prices are not served"""
+        self.write_drops(tmp_path, 1)
+        retail_price = app.config['DROP_RETAIL_PRICE']
+        try:
+            app.config['DROP_RETAIL_PRICE'] = 1.0
+            response = client.get('/api/analytics/drops/1')
+            assert json.loads(response.data)["roi"]["usd"] == 0.0
+            app.config['DROP_RETAIL_PRICE'] = 0.5
+            # A client holding the response rendered with the old price must not get a 304
+            response = client.get('/api/analytics/drops/1', headers={'If-None-Match': response.headers['ETag']})
+            assert response.status_code == 200
+            assert json.loads(response.data)["roi"]["usd"] == 1.0
+        finally:
+            app.config['DROP_RETAIL_PRICE'] = retail_price
+
+    def test_api_analytics(self, client, tmp_path):
+        """Test the drop analytics endpoints"""
+        self.write_drops(tmp_path, 3)
+        
+        drops = json.loads(client.get('/api/analytics/drops').data)
+        assert [drop["prices"]["usd"]["total"] for drop in drops] == [1.0, 2.0, 3.0]
+        
+        drop = json.loads(client.get('/api/analytics/drops/2?retail=4').data)
+        assert drop["roi"]["usd"] == -0.5
+        assert client.get('/api/analytics/drops/99').status_code == 404
+        
+        summary = json.loads(client.get('/api/analytics/summary?top=1&retail=1').data)
+        assert summary["cards"] == 3
+        assert [drop["drop_number"] for drop in summary["top_roi"]["usd"]] == ["3"]
+        
+        assert client.get('/api/analytics/drops?retail=0').status_code == 400
+        assert client.get('/api/analytics/summary?top=x').status_code == 400
+    
+    def test_api_search(self, client, tmp_path):
+        """Test the card and drop name search endpoint"""
+        self.write_drops(tmp_path, 12)
+        
+        response = client.get('/api/search?q=card 1')
+        assert response.status_code == 200
+        results = json.loads(response.data)["results"]
+        assert [(r["name"], r["drop_number"]) for r in results][:2] == [("Card 1", "1"), ("Card 10", "10")]
+        
+        assert len(json.loads(client.get('/api/search?q=drop&limit=3').data)["results"]) == 3
+        assert client.get('/api/search').status_code == 400
+        assert client.get('/api/search?q=card&limit=0').status_code == 400
+    
     def test_format_price_utility(self):
         """Test the format_price utility function"""
         # Import the function directly from the app
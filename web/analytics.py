@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import numpy as np
+
+# Add the project root to the path so we can import from scripts
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.drop_totals import parse_price, TOTAL_PRICE_FIELDS
+
+# Retail prices drops are valued against unless configured otherwise, in USD
+DEFAULT_RETAIL_PRICE = 29.99
+DEFAULT_FOIL_RETAIL_PRICE = 39.99
+
+def _price_column(values):
+    """
+    Convert Scryfall price strings to a float array, with NaN for missing or invalid prices
+
+    Missing prices are replaced first so NumPy can convert the column in one
+    call; only a column holding an unparseable price falls back to parsing
+    each value on its own.
+    """
+    column = [np.nan if value is None or value == "" else value for value in values]
+    try:
+        return np.array(column, dtype=np.float64)
+    except (ValueError, TypeError):
+        return np.array([np.nan if price is None else price for price in map(parse_price, values)],
+                        dtype=np.float64)
+
+def _value(value):
+    """Convert a NumPy scalar to a JSON-friendly float, with None for NaN"""
+    value = float(value)
+    return None if np.isnan(value) else round(value, 2)
+
+class DropAnalytics:
+    """
+    Card prices of every drop as NumPy arrays, with per-drop statistics computed in bulk
+
+    Cards are laid out drop after drop, so each drop is a contiguous segment
+    of the price arrays and ``drop_index`` maps every card to its drop. Totals,
+    missing-price counts, min/max and medians for all drops are each computed
+    with a handful of vectorized reductions instead of a loop per drop.
+    """
+
+    def __init__(self, secret_lairs):
+        self.secret_lairs = secret_lairs
+        self.card_counts = np.array([len(drop.get('cards') or []) for drop in secret_lairs], dtype=np.int64)
+        self.starts = np.cumsum(self.card_counts) - self.card_counts
+        self.drop_index = np.repeat(np.arange(len(secret_lairs)), self.card_counts)
+
+        # One row per price field, NaN where a card has no price; each row is
+        # converted by NumPy in one call
+        card_prices = [card.get('prices') or {} for drop in secret_lairs for card in drop.get('cards') or []]
+        self.prices = np.empty((len(TOTAL_PRICE_FIELDS), len(card_prices)))
+        for row, field in enumerate(TOTAL_PRICE_FIELDS):
+            self.prices[row] = _price_column([prices.get(field) for prices in card_prices])
+
+        self.stats = {field: self._field_stats(self.prices[row]) for row, field in enumerate(TOTAL_PRICE_FIELDS)}
+        self.positions = {drop.get('drop_number'): i for i, drop in reversed(list(enumerate(secret_lairs)))}
+
+    def _field_stats(self, values):
+        count = len(self.secret_lairs)
+        valid = ~np.isnan(values)
+        priced = np.bincount(self.drop_index[valid], minlength=count)
+        stats = {
+            "total": np.bincount(self.drop_index, weights=np.where(valid, values, 0.0), minlength=count),
+            "missing": self.card_counts - priced,
+            "min": np.full(count, np.nan),
+            "max": np.full(count, np.nan),
+            "median": np.full(count, np.nan)
+        }
+
+        # Min and max reduce each drop's segment; empty drops have no segment
+        non_empty = self.card_counts > 0
+        if non_empty.any():
+            segment_starts = self.starts[non_empty]
+            lows = np.minimum.reduceat(np.where(valid, values, np.inf), segment_starts)
+            highs = np.maximum.reduceat(np.where(valid, values, -np.inf), segment_starts)
+            stats["min"][non_empty] = np.where(np.isinf(lows), np.nan, lows)
+            stats["max"][non_empty] = np.where(np.isinf(highs), np.nan, highs)
+
+        # Sorting by drop, then value, puts each drop's prices in order with NaNs last,
+        # so the median is the middle of the first ``priced`` values of the segment
+        has_prices = priced > 0
+        if has_prices.any():
+            ordered = values[np.lexsort((values, self.drop_index))]
+            starts = self.starts[has_prices]
+            lower = ordered[starts + (priced[has_prices] - 1) // 2]
+            upper = ordered[starts + priced[has_prices] // 2]
+            stats["median"][has_prices] = (lower + upper) / 2
+        return stats
+
+    def roi(self, retail_price=DEFAULT_RETAIL_PRICE, foil_retail_price=DEFAULT_FOIL_RETAIL_PRICE):
+        """
+        Get every drop's return on investment against its retail price
+
+        Args:
+            retail_price (float): Price of a non-foil drop, compared with the usd total
+            foil_retail_price (float): Price of a foil drop, compared with the usd_foil total
+
+        Returns:
+            dict: Arrays of ROI ratios for "usd" and "usd_foil", NaN for drops without cards
+        """
+        with np.errstate(invalid='ignore'):
+            no_cards = self.card_counts == 0
+            return {
+                "usd": np.where(no_cards, np.nan, (self.stats["usd"]["total"] - retail_price) / retail_price),
+                "usd_foil": np.where(no_cards, np.nan,
+                                     (self.stats["usd_foil"]["total"] - foil_retail_price) / foil_retail_price)
+            }
+
+    def _drop_dict(self, i, roi):
+        drop = self.secret_lairs[i]
+        return {
+            "drop_number": drop.get('drop_number'),
+            "name": drop.get('name'),
+            "card_count": int(self.card_counts[i]),
+            "prices": {
+                field: {
+                    "total": _value(stats["total"][i]),
+                    "median": _value(stats["median"][i]),
+                    "min": _value(stats["min"][i]),
+                    "max": _value(stats["max"][i]),
+                    "missing": int(stats["missing"][i])
+                }
+                for field, stats in self.stats.items()
+            },
+            "roi": {field: _value(values[i]) for field, values in roi.items()}
+        }
+
+    def drops(self, retail_price=DEFAULT_RETAIL_PRICE, foil_retail_price=DEFAULT_FOIL_RETAIL_PRICE):
+        """Get the statistics and ROI of every drop, in source order"""
+        roi = self.roi(retail_price, foil_retail_price)
+        return [self._drop_dict(i, roi) for i in range(len(self.secret_lairs))]
+
+    def drop(self, drop_number, retail_price=DEFAULT_RETAIL_PRICE, foil_retail_price=DEFAULT_FOIL_RETAIL_PRICE):
+        """Get the statistics and ROI of a single drop, or None if there is no such drop"""
+        i = self.positions.get(drop_number)
+        if i is None:
+            return None
+        return self._drop_dict(i, self.roi(retail_price, foil_retail_price))
+
+    def summary(self, retail_price=DEFAULT_RETAIL_PRICE, foil_retail_price=DEFAULT_FOIL_RETAIL_PRICE, top=10):
+        """
+        Get totals over all drops and the drops with the best ROI
+
+        Args:
+            retail_price (float): Price of a non-foil drop
+            foil_retail_price (float): Price of a foil drop
+            top (int): Number of drops to list by ROI
+
+        Returns:
+            dict: Drop and card counts, per-field value totals and missing counts, and the
+                top drops by non-foil and foil ROI
+        """
+        roi = self.roi(retail_price, foil_retail_price)
+        best = {}
+        for field, values in roi.items():
+            # NaN sorts last, so drops without cards are never listed ahead of valued ones
+            order = np.argsort(-values, kind='stable')[:top]
+            best[field] = [self._drop_dict(int(i), roi) for i in order if not np.isnan(values[i])]
+        return {
+            "drops": len(self.secret_lairs),
+            "cards": int(self.card_counts.sum()),
+            "retail_price": retail_price,
+            "foil_retail_price": foil_retail_price,
+            "prices": {
+                field: {"total": _value(stats["total"].sum()), "missing": int(stats["missing"].sum())}
+                for field, stats in self.stats.items()
+            },
+            "top_roi": best
+        }
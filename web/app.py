@@ -2,40 +2,222 @@
 
 import os
 import json
+import sqlite3
 import sys
-from flask import Flask, render_template, abort, request, jsonify
+import hashlib
+import functools
+from flask import Flask, render_template, abort, request, jsonify, make_response, g, has_request_context
 
 # Add the project root to the path so we can import from scripts
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.card_store import CardStore, DEFAULT_DB_FILENAME
+from scripts.binary_snapshot import BinarySnapshot, DEFAULT_SNAPSHOT_FILENAME
+from scripts.drop_totals import add_drop_totals
+from web.repository import SecretLairRepository
+from web.drop_query import SORT_KEYS, parse_drop_query, run_drop_query
+from web.analytics import DropAnalytics, DEFAULT_RETAIL_PRICE, DEFAULT_FOIL_RETAIL_PRICE
+from web.search import SearchIndex, DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT
+from web.response_cache import ResponseCache, cache_key, DEFAULT_MAX_BYTES
 
 app = Flask(__name__)
 
 # Configure the app
 app.config['SECRET_KEY'] = 'mtg-inventory-manager-secret'
 app.config['DATA_DIR'] = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+# Retail prices used for ROI analytics, overridable per request with ?retail= and ?foil_retail=
+app.config['DROP_RETAIL_PRICE'] = DEFAULT_RETAIL_PRICE
+app.config['DROP_FOIL_RETAIL_PRICE'] = DEFAULT_FOIL_RETAIL_PRICE
+# Serve from the memory-mapped binary snapshot (enabled by the production server unless BINARY_SNAPSHOT=0)
+app.config['BINARY_SNAPSHOT'] = os.environ.get('BINARY_SNAPSHOT') == '1'
+# Memory budget of the rendered response cache, and an optional directory that persists it across restarts
+app.config['RESPONSE_CACHE_MAX_BYTES'] = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+app.config['RESPONSE_CACHE_DIR'] = os.environ.get('RESPONSE_CACHE_DIR') or None
 
-def load_secret_lairs():
-    """Load Secret Lair data from JSON file"""
+def secret_lairs_source():
+    """
+    Path of the file Secret Lair data is loaded from
+    
+    The database is preferred over the JSON file. With the BINARY_SNAPSHOT
+    setting the binary snapshot is preferred over both: it keeps each worker's
+    memory flat, but decodes drops on every access, so it is only worth it
+    for the multi-worker production server.
+    """
+    filenames = (DEFAULT_DB_FILENAME,)
+    if app.config['BINARY_SNAPSHOT']:
+        filenames = (DEFAULT_SNAPSHOT_FILENAME,) + filenames
+    for filename in filenames:
+        path = os.path.join(app.config['DATA_DIR'], filename)
+        if os.path.exists(path):
+            return path
+    return os.path.join(app.config['DATA_DIR'], 'secret_lairs.json')
+
+def read_secret_lairs(path):
+    """
+    Read Secret Lair data from the binary snapshot, SQLite database or JSON file at the given path
+    
+    A binary snapshot is memory-mapped rather than parsed: drops are decoded as
+    they are accessed, so worker processes serving the same file share it.
+    """
     try:
-        with open(os.path.join(app.config['DATA_DIR'], 'secret_lairs.json'), 'r') as file:
-            return json.load(file)
-    except (FileNotFoundError, json.JSONDecodeError) as e:
+        if path.endswith('.snapshot'):
+            return BinarySnapshot(path)
+        if path.endswith('.db'):
+            with CardStore(path) as store:
+                return store.list_drops()
+        with open(path, 'r') as file:
+            # Files written before totals were precomputed get them once, at load time
+            return add_drop_totals(json.load(file))
+    except (OSError, ValueError, sqlite3.Error) as e:
         app.logger.error(f"Failed to load Secret Lair data: {e}")
         return []
 
+def secret_lair_reader(path):
+    """
+    Get a function reading a single drop by drop number from the data file at the given path
+    
+    Only the SQLite database has an index to read one drop from; other sources
+    return None and drops are looked up in the fully loaded list.
+    """
+    if not path.endswith('.db'):
+        return None
+    return functools.partial(read_secret_lair, path)
+
+def read_secret_lair(path, drop_number):
+    """Read a single Secret Lair drop from the SQLite database at the given path, or None"""
+    try:
+        with CardStore(path) as store:
+            return store.get_drop(drop_number)
+    except sqlite3.Error as e:
+        app.logger.error(f"Failed to load Secret Lair drop {drop_number}: {e}")
+        return None
+
+# Parsed data is cached in-process and reloaded only when the source file changes
+repository = SecretLairRepository(secret_lairs_source, read_secret_lairs, secret_lair_reader)
+
+# Rendered responses are cached per dataset version and dropped when the data reloads
+response_cache = ResponseCache(app.config['RESPONSE_CACHE_MAX_BYTES'], app.config['RESPONSE_CACHE_DIR'])
+
+# Cards shown for each drop on the home page
+PREVIEW_CARD_COUNT = 3
+
+# App settings that change rendered responses, and so are part of their cache version
+RESPONSE_CONFIG_KEYS = ('DROP_RETAIL_PRICE', 'DROP_FOIL_RETAIL_PRICE')
+
+def current_snapshot():
+    """
+    Get the dataset snapshot for the current request
+    
+    The source file is checked once per request, so every lookup made while
+    handling it (and its ETag) sees the same version of the data.
+    """
+    if not has_request_context():
+        return repository.snapshot()
+    if 'secret_lairs_snapshot' not in g:
+        g.secret_lairs_snapshot = repository.snapshot()
+    return g.secret_lairs_snapshot
+
+def load_secret_lairs():
+    """Load all Secret Lair drops"""
+    return current_snapshot().secret_lairs
+
+def load_secret_lair_previews():
+    """
+    Load all Secret Lair drops for a listing showing PREVIEW_CARD_COUNT cards of each
+    
+    Sources that decode drops on demand (such as a BinarySnapshot) then only
+    decode the previewed cards rather than every card of every drop.
+    """
+    secret_lairs = load_secret_lairs()
+    previews = getattr(secret_lairs, 'previews', None)
+    return previews(PREVIEW_CARD_COUNT) if previews else secret_lairs
+
+def load_secret_lair(drop_number):
+    """Load a single Secret Lair drop, or None if there is no drop with that number"""
+    return current_snapshot().get_drop(drop_number)
+
+def is_not_modified(snapshot):
+    """Check the request's conditional headers against the loaded dataset and response settings"""
+    # If-None-Match takes precedence over If-Modified-Since (RFC 9110)
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(response_version(snapshot))
+    if request.if_modified_since and snapshot.last_modified:
+        return snapshot.last_modified <= request.if_modified_since
+    return False
+
+def conditional(view):
+    """
+    Add ETag and Last-Modified headers derived from the loaded dataset to a view
+    
+    Every response is a function of the dataset and the response settings, so
+    a client that already holds the current version gets a 304. The view still
+    runs first, normally answered from the response cache, so a request with
+    invalid arguments or naming a missing drop gets its error instead.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        snapshot = current_snapshot()
+        response = make_response(view(*args, **kwargs))
+        if response.status_code != 200:
+            return response
+        if is_not_modified(snapshot):
+            response = app.response_class(status=304)
+        
+        response.set_etag(response_version(snapshot))
+        if snapshot.last_modified:
+            response.last_modified = snapshot.last_modified
+        # Clients may cache responses but must revalidate, since data can change at any time
+        response.cache_control.no_cache = True
+        return response
+    return wrapper
+
+def response_version(snapshot):
+    """
+    Get the cache version of responses rendered from a snapshot with the current settings
+    
+    Responses persisted on disk outlive the process, so a settings change
+    between restarts must not serve responses rendered with the old settings.
+    """
+    settings = repr([app.config[key] for key in RESPONSE_CONFIG_KEYS]).encode('utf-8')
+    return f"{snapshot.version}-{hashlib.sha256(settings).hexdigest()[:16]}"
+
+def cached(view):
+    """
+    Serve a view's successful responses from the response cache
+    
+    Responses are keyed on the dataset version (with the settings in
+    RESPONSE_CONFIG_KEYS), the path and the query arguments, so a repeated request is answered with a dictionary lookup
+    instead of running the view, and a data reload misses every old entry.
+    Apply it below ``conditional``, which still adds the validators.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        version = response_version(current_snapshot())
+        key = cache_key(request.path, request.args)
+        entry = response_cache.get(version, key)
+        if entry is not None:
+            body, mimetype = entry
+            return app.response_class(body, mimetype=mimetype)
+        
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200 and not response.is_streamed:
+            response_cache.put(version, key, response.get_data(), response.mimetype)
+        return response
+    return wrapper
+
 @app.route('/')
+@conditional
+@cached
 def index():
     """Home page"""
-    secret_lairs = load_secret_lairs()
-    return render_template('index.html', secret_lairs=secret_lairs)
+    secret_lairs = load_secret_lair_previews()
+    return render_template('index.html', secret_lairs=secret_lairs, preview_card_count=PREVIEW_CARD_COUNT)
 
 @app.route('/secret-lair/<drop_number>')
+@conditional
+@cached
 def secret_lair_detail(drop_number):
     """Detail page for a specific Secret Lair drop"""
-    secret_lairs = load_secret_lairs()
-    
-    # Find the Secret Lair drop with the given drop number
-    secret_lair = next((drop for drop in secret_lairs if drop['drop_number'] == drop_number), None)
+    secret_lair = load_secret_lair(drop_number)
     
     if not secret_lair:
         abort(404)
@@ -43,24 +225,145 @@ def secret_lair_detail(drop_number):
     return render_template('detail.html', secret_lair=secret_lair)
 
 @app.route('/api/secret-lairs')
+@conditional
+@cached
 def api_secret_lairs():
-    """API endpoint for Secret Lair data"""
-    secret_lairs = load_secret_lairs()
-    return jsonify(secret_lairs)
+    """
+    API endpoint for Secret Lair data
+    
+    Without query parameters the full list is returned. Supported parameters:
+    sort (drop_number, name, card_count, value, foil_value; prefix "-" for
+    descending), q (name substring), min_value/max_value (total usd value),
+    fields (comma-separated top-level fields to include) and limit/cursor/page,
+    which switch the response to a page object with a next_cursor.
+    """
+    if not request.args:
+        return jsonify(list(load_secret_lairs()))
+    
+    try:
+        query = parse_drop_query(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    # Sort orders are computed once per loaded dataset and reused by every request
+    ordered = current_snapshot().sort_order(query.sort, SORT_KEYS[query.sort], reverse=query.descending)
+    return jsonify(run_drop_query(ordered, query))
 
 @app.route('/api/secret-lair/<drop_number>')
+@conditional
+@cached
 def api_secret_lair_detail(drop_number):
     """API endpoint for a specific Secret Lair drop"""
-    secret_lairs = load_secret_lairs()
-    
-    # Find the Secret Lair drop with the given drop number
-    secret_lair = next((drop for drop in secret_lairs if drop['drop_number'] == drop_number), None)
+    secret_lair = load_secret_lair(drop_number)
     
     if not secret_lair:
         abort(404)
     
     return jsonify(secret_lair)
 
+def current_analytics():
+    """Get the analytics arrays for the current dataset, built once per loaded snapshot"""
+    return current_snapshot().derived('analytics', DropAnalytics)
+
+def preload():
+    """
+    Load the current dataset and build its derived indexes ahead of the first request
+    
+    Used by the production server to build everything once in the master
+    process, so the forked workers share it instead of each building a copy.
+    """
+    snapshot = repository.snapshot()
+    snapshot.derived('analytics', DropAnalytics)
+    snapshot.derived('search', SearchIndex)
+    return snapshot
+
+def retail_prices():
+    """
+    Get the non-foil and foil retail prices for ROI from the request or the app config
+    
+    Raises:
+        ValueError: If a given price is not a positive number
+    """
+    prices = []
+    for name, config_key in (('retail', 'DROP_RETAIL_PRICE'), ('foil_retail', 'DROP_FOIL_RETAIL_PRICE')):
+        value = request.args.get(name)
+        if value is None:
+            prices.append(app.config[config_key])
+            continue
+        try:
+            price = float(value)
+        except ValueError:
+            price = 0
+        if not price > 0:
+            raise ValueError(f"'{name}' must be a positive number")
+        prices.append(price)
+    return prices
+
+@app.route('/api/analytics/drops')
+@conditional
+@cached
+def api_analytics_drops():
+    """API endpoint with value statistics and ROI of every drop"""
+    try:
+        retail_price, foil_retail_price = retail_prices()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(current_analytics().drops(retail_price, foil_retail_price))
+
+@app.route('/api/analytics/drops/<drop_number>')
+@conditional
+@cached
+def api_analytics_drop(drop_number):
+    """API endpoint with value statistics and ROI of a specific drop"""
+    try:
+        retail_price, foil_retail_price = retail_prices()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    stats = current_analytics().drop(drop_number, retail_price, foil_retail_price)
+    if stats is None:
+        abort(404)
+    return jsonify(stats)
+
+@app.route('/api/analytics/summary')
+@conditional
+@cached
+def api_analytics_summary():
+    """API endpoint with totals over all drops and the best drops by ROI (?top=, default 10)"""
+    top = request.args.get('top', '10')
+    if not top.isdigit() or int(top) < 1:
+        return jsonify({"error": "'top' must be a positive integer"}), 400
+    try:
+        retail_price, foil_retail_price = retail_prices()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(current_analytics().summary(retail_price, foil_retail_price, top=int(top)))
+
+@app.route('/api/search')
+@conditional
+@cached
+def api_search():
+    """
+    API endpoint searching card and drop names for typeahead
+    
+    Parameters: q (the search text, matched case- and accent-insensitively
+    against the start of words) and limit (default 20, at most 100).
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "'q' is required"}), 400
+    limit = request.args.get('limit', str(DEFAULT_SEARCH_LIMIT))
+    if not limit.isdigit() or int(limit) < 1:
+        return jsonify({"error": "'limit' must be a positive integer"}), 400
+    
+    # The index is built once per loaded dataset
+    index = current_snapshot().derived('search', SearchIndex)
+    return jsonify({"query": query, "results": index.search(query, min(int(limit), MAX_SEARCH_LIMIT))})
+
+@app.route('/api/cache-stats')
+def api_cache_stats():
+    """API endpoint exposing data and response cache counters for monitoring"""
+    return jsonify({**repository.stats(), "responses": response_cache.stats()})
+
 @app.errorhandler(404)
 def page_not_found(e):
     """Handle 404 errors"""
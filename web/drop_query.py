@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+
+import re
+import math
+import base64
+import binascii
+
+# Default and maximum page sizes for paginated drop listings
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+_DIGITS = re.compile(r'(\d+)')
+
+def _totals(drop):
+    return drop.get('totals') or {}
+
+def drop_number_key(drop):
+    """Natural sort key for drop numbers, so "9" sorts before "10" and "10a" after "10" """
+    parts = _DIGITS.split(str(drop.get('drop_number', '')))
+    return [(0, int(part), '') if part.isdigit() else (1, 0, part.casefold()) for part in parts if part]
+
+# Sort orders supported by the drop listing API, by the name used in ?sort=
+SORT_KEYS = {
+    'drop_number': drop_number_key,
+    'name': lambda drop: drop.get('name', '').casefold(),
+    'card_count': lambda drop: _totals(drop).get('card_count', len(drop.get('cards') or [])),
+    'value': lambda drop: _totals(drop).get('usd', 0),
+    'foil_value': lambda drop: _totals(drop).get('usd_foil', 0),
+}
+
+class DropQuery:
+    """Sorting, filtering, pagination and projection options for a drop listing"""
+
+    def __init__(self, sort='drop_number', descending=False, name=None, min_value=None, max_value=None,
+                 fields=None, limit=None, cursor=None, page=None):
+        self.sort = sort
+        self.descending = descending
+        self.name = name.casefold() if name else None
+        self.min_value = min_value
+        self.max_value = max_value
+        self.fields = fields
+        self.limit = limit
+        self.cursor = cursor
+        self.page = page
+
+    @property
+    def paginated(self):
+        """Whether the listing should be returned one page at a time"""
+        return self.limit is not None or self.cursor is not None or self.page is not None
+
+    @property
+    def filtered(self):
+        """Whether any filter narrows down the drops"""
+        return self.name is not None or self.min_value is not None or self.max_value is not None
+
+    @property
+    def order_name(self):
+        """Sort order as given in ?sort=, including the "-" prefix for descending orders"""
+        return ('-' if self.descending else '') + self.sort
+
+    def matches(self, drop):
+        """Check whether a drop passes all filters"""
+        if self.name is not None and self.name not in drop.get('name', '').casefold():
+            return False
+        value = _totals(drop).get('usd', 0)
+        if self.min_value is not None and value < self.min_value:
+            return False
+        if self.max_value is not None and value > self.max_value:
+            return False
+        return True
+
+    def project(self, drop):
+        """Keep only the requested top-level fields of a drop"""
+        if self.fields is None:
+            return drop
+        return {field: drop[field] for field in self.fields if field in drop}
+
+def _parse_float(args, name):
+    value = args.get(name)
+    if value is None:
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be a number")
+    # float() also accepts "nan" and "inf", which no drop value compares sensibly with
+    if not math.isfinite(number):
+        raise ValueError(f"'{name}' must be a number")
+    return number
+
+def _parse_positive_int(args, name):
+    value = args.get(name)
+    if value is None:
+        return None
+    if not value.isdigit() or int(value) < 1:
+        raise ValueError(f"'{name}' must be a positive integer")
+    return int(value)
+
+def parse_drop_query(args):
+    """
+    Build a DropQuery from request query parameters
+
+    Args:
+        args (Mapping): Query parameters (e.g. Flask's request.args)
+
+    Returns:
+        DropQuery: The parsed options
+
+    Raises:
+        ValueError: If a parameter is invalid
+    """
+    sort = args.get('sort', 'drop_number')
+    descending = sort.startswith('-')
+    sort = sort.lstrip('-')
+    if sort not in SORT_KEYS:
+        raise ValueError(f"'sort' must be one of: {', '.join(SORT_KEYS)}")
+
+    limit = _parse_positive_int(args, 'limit')
+    if limit is not None:
+        limit = min(limit, MAX_LIMIT)
+
+    fields = args.get('fields')
+    if fields is not None:
+        fields = [field.strip() for field in fields.split(',') if field.strip()]
+
+    query = DropQuery(
+        sort=sort,
+        descending=descending,
+        name=args.get('q'),
+        min_value=_parse_float(args, 'min_value'),
+        max_value=_parse_float(args, 'max_value'),
+        fields=fields,
+        limit=limit,
+        page=_parse_positive_int(args, 'page')
+    )
+
+    cursor = args.get('cursor')
+    if cursor is not None:
+        query.cursor = decode_cursor(cursor, query.order_name)
+    return query
+
+def encode_cursor(order_name, position):
+    """Encode a resume position in a sort order as an opaque cursor string"""
+    return base64.urlsafe_b64encode(f"{order_name}:{position}".encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor, order_name):
+    """
+    Decode a cursor produced by encode_cursor
+
+    Raises:
+        ValueError: If the cursor is malformed or belongs to a different sort order
+    """
+    try:
+        cursor_order, position = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').rsplit(':', 1)
+        position = int(position)
+    except (ValueError, UnicodeError, binascii.Error):
+        raise ValueError("'cursor' is invalid")
+    if cursor_order != order_name or position < 0:
+        raise ValueError("'cursor' does not match the requested sort order")
+    return position
+
+def run_drop_query(ordered, query):
+    """
+    Apply a DropQuery to drops that are already in the requested sort order
+
+    Pages are read by scanning forward from the cursor position, so without
+    filters a page costs O(limit) regardless of how many drops there are.
+
+    Args:
+        ordered (list): Drops in the query's sort order
+        query (DropQuery): The options to apply
+
+    Returns:
+        list or dict: A plain list of drops when the query is not paginated, otherwise
+            a dict with "items", "next_cursor" and, for unfiltered queries, "total"
+    """
+    if not query.paginated:
+        return [query.project(drop) for drop in ordered if query.matches(drop)]
+
+    limit = query.limit or DEFAULT_LIMIT
+    position = query.cursor or 0
+    skip = 0
+    if query.page is not None and query.cursor is None:
+        # Without filters a page starts at a known position; with filters the
+        # matches on earlier pages have to be skipped
+        if query.filtered:
+            skip = (query.page - 1) * limit
+        else:
+            position = (query.page - 1) * limit
+
+    items = []
+    while position < len(ordered) and len(items) < limit:
+        drop = ordered[position]
+        position += 1
+        if not query.matches(drop):
+            continue
+        if skip:
+            skip -= 1
+            continue
+        items.append(query.project(drop))
+
+    page = {
+        "items": items,
+        "next_cursor": encode_cursor(query.order_name, position) if position < len(ordered) else None
+    }
+    if not query.filtered:
+        page["total"] = len(ordered)
+    return page
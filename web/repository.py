@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+
+import os
+import hashlib
+import functools
+import threading
+import logging
+from array import array
+from collections.abc import Sequence
+from datetime import datetime, timezone
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+def file_signature(path):
+    """
+    Get a signature identifying the current version of a file
+
+    Args:
+        path (str): Path to the file
+
+    Returns:
+        tuple: (path, inode, size, mtime in nanoseconds), or None if the file does not exist
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (path, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """Get the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class Snapshot:
+    """
+    A version of the Secret Lair data
+
+    The drops are loaded in full the first time the whole list is needed.
+    Until then, sources with an indexed single-drop lookup (the SQLite
+    database) answer ``get_drop`` by reading only that drop, so a drop page
+    served by a freshly started or reloaded process does not parse the
+    whole dataset.
+    """
+
+    def __init__(self, signature, load, version="empty", load_drop=None):
+        """
+        Args:
+            signature (tuple): Signature of the source file, or None if it does not exist
+            load (callable): Returns the list of Secret Lair drops
+            version (str): Content hash of the source file
+            load_drop (callable): Takes a drop number and reads that drop from the source,
+                or None to look drops up in the loaded list
+        """
+        self.signature = signature
+        self._load = load
+        self._load_drop = load_drop
+        self._secret_lairs = None
+        self._by_drop_number = None
+        self._lock = threading.Lock()
+        # Content hash of the source file; identical rebuilds keep the same version
+        self.version = version
+        # Build time of the data, truncated to the one second resolution of HTTP dates
+        self.last_modified = None
+        if signature is not None:
+            self.last_modified = datetime.fromtimestamp(signature[3] // 1_000_000_000, tz=timezone.utc)
+        self._sort_orders = {}
+        self._derived = {}
+
+    def _ensure_loaded(self):
+        if self._secret_lairs is None:
+            with self._lock:
+                if self._secret_lairs is None:
+                    secret_lairs = self._load()
+                    self._by_drop_number = self._index(secret_lairs)
+                    self._secret_lairs = secret_lairs
+
+    @property
+    def secret_lairs(self):
+        """All drops, in source order, loaded on first access"""
+        self._ensure_loaded()
+        return self._secret_lairs
+
+    @property
+    def by_drop_number(self):
+        """Mapping of drop numbers to drops, built when the drops are loaded"""
+        self._ensure_loaded()
+        return self._by_drop_number
+
+    @staticmethod
+    def _index(secret_lairs):
+        # Sources that decode drops on demand (such as a BinarySnapshot) bring their
+        # own drop number lookup, so the drops are not all decoded up front
+        by_drop_number = getattr(secret_lairs, 'by_drop_number', None)
+        if by_drop_number is None:
+            # The first drop wins when the wiki lists a drop number more than once
+            by_drop_number = {}
+            for drop in secret_lairs:
+                by_drop_number.setdefault(drop.get('drop_number'), drop)
+        return by_drop_number
+
+    def get_drop(self, drop_number):
+        """Get a drop by drop number, or None if there is no such drop"""
+        if self._secret_lairs is None and self._load_drop is not None:
+            return self._load_drop(drop_number)
+        return self.by_drop_number.get(drop_number)
+
+    def derived(self, name, build):
+        """Get ``build(secret_lairs)``, computed once per snapshot and cached under ``name``"""
+        value = self._derived.get(name)
+        if value is None:
+            value = build(self.secret_lairs)
+            self._derived[name] = value
+        return value
+
+    def sort_order(self, name, key, reverse=False):
+        """Get the drops sorted by ``key``, computed once per snapshot and cached under ``name``"""
+        order = self._sort_orders.get((name, reverse))
+        if order is None:
+            if isinstance(self.secret_lairs, list):
+                order = sorted(self.secret_lairs, key=key, reverse=reverse)
+            else:
+                # Keep only the positions for sources that decode drops on demand
+                keys = [key(drop) for drop in self.secret_lairs]
+                positions = sorted(range(len(keys)), key=keys.__getitem__, reverse=reverse)
+                order = OrderedView(self.secret_lairs, array('I', positions))
+            self._sort_orders[(name, reverse)] = order
+        return order
+
+class OrderedView(Sequence):
+    """The drops of a sequence in the order given by a list of positions"""
+
+    def __init__(self, drops, positions):
+        self._drops = drops
+        self._positions = positions
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._drops[position] for position in self._positions[index]]
+        return self._drops[self._positions[index]]
+
+class SecretLairRepository:
+    """
+    In-process cache of the Secret Lair data, keyed by drop number
+
+    The source file is parsed once, on first use, and kept in memory. Every access compares the
+    file's inode, size and mtime against the loaded snapshot and reloads only when
+    they differ, so a new data build is picked up without restarting the app.
+    Reloads build a new Snapshot and swap it in with a single assignment, so
+    concurrent readers always see a complete dataset.
+    """
+
+    def __init__(self, source_path, loader, drop_loader=None):
+        """
+        Args:
+            source_path (callable): Returns the path of the file to load data from
+            loader (callable): Takes that path and returns the list of Secret Lair drops
+            drop_loader (callable): Takes that path and returns a function reading a single
+                drop by drop number from it, or None if the file has no index to read from
+        """
+        self._source_path = source_path
+        self._loader = loader
+        self._drop_loader = drop_loader
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def snapshot(self):
+        """Get the current Snapshot, reloading it first if the source file has changed"""
+        path = self._source_path()
+        signature = file_signature(path)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.signature == signature:
+            self.hits += 1
+            return snapshot
+
+        with self._lock:
+            # Another thread may have reloaded while we were waiting for the lock
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.signature == signature:
+                self.hits += 1
+                return snapshot
+
+            self.misses += 1
+            if snapshot is not None:
+                self.reloads += 1
+                logger.info(f"Secret Lair data changed, reloading from {path}")
+            # A missing source file loads as an empty dataset until it appears
+            if signature is None:
+                self._snapshot = Snapshot(None, list)
+            else:
+                try:
+                    version = file_digest(path)[:32]
+                except OSError:
+                    version = "unreadable"
+                load_drop = self._drop_loader(path) if self._drop_loader else None
+                self._snapshot = Snapshot(signature, functools.partial(self._loader, path), version, load_drop)
+            return self._snapshot
+
+    def invalidate(self):
+        """Drop the loaded snapshot so the next access reloads from disk"""
+        with self._lock:
+            self._snapshot = None
+
+    def stats(self):
+        """Get cache counters for monitoring"""
+        snapshot = self._snapshot
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+            "drops": len(snapshot.secret_lairs) if snapshot else 0,
+            "version": snapshot.version if snapshot else None,
+            "source": snapshot.signature[0] if snapshot and snapshot.signature else None
+        }
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+
+import os
+import shutil
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Default memory budget of the cached response bodies
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Subdirectory of the cache directory holding the entries; nothing outside it is ever removed
+CACHE_SUBDIRECTORY = "response-cache"
+
+def cache_key(path, args):
+    """
+    Build the cache key of a request from its path and query arguments
+
+    Arguments are sorted, so the same query written in a different order
+    shares an entry, and percent-encoded, so an argument value containing
+    "&" or "=" cannot produce the key of a different query.
+
+    Args:
+        path (str): Request path
+        args (MultiDict): Query arguments
+
+    Returns:
+        str: The cache key
+    """
+    items = sorted(args.items(multi=True))
+    if not items:
+        return path
+    return path + '?' + urlencode(items)
+
+class ResponseCache:
+    """
+    LRU cache of rendered response bodies for one dataset version at a time
+
+    Entries are looked up by the dataset version and a request key. When a
+    new version is seen the entries of the previous one are dropped, so a data
+    reload invalidates the whole cache. Memory use is bounded by the total
+    size of the cached bodies; the least recently used entries are evicted
+    first. With a ``directory``, entries are also written to disk under its
+    response-cache subdirectory, one subdirectory per version, so restarted
+    workers start with a warm cache.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, directory=None):
+        """
+        Args:
+            max_bytes (int): Memory budget of the cached bodies; 0 disables the cache
+            directory (str): Directory to persist entries in, or None to keep them in memory only
+        """
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self._entries = OrderedDict()
+        self._version = None
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _switch_version(self, version):
+        """Drop the entries of the previous dataset version; call with the lock held"""
+        if version == self._version:
+            return
+        if self._version is not None:
+            logger.info(f"Dataset version changed, dropping {len(self._entries)} cached responses")
+        self._entries.clear()
+        self._size = 0
+        self._version = version
+        self._remove_stale_directories(version)
+
+    def _cache_root(self):
+        return os.path.join(self.directory, CACHE_SUBDIRECTORY)
+
+    def _remove_stale_directories(self, version):
+        if not self.directory or not os.path.isdir(self._cache_root()):
+            return
+        for name in os.listdir(self._cache_root()):
+            if name != version:
+                shutil.rmtree(os.path.join(self._cache_root(), name), ignore_errors=True)
+
+    def _disk_path(self, version, key):
+        return os.path.join(self._cache_root(), version, hashlib.sha256(key.encode('utf-8')).hexdigest())
+
+    def _read_disk(self, version, key):
+        try:
+            with open(self._disk_path(version, key), 'rb') as f:
+                mimetype, _, body = f.read().partition(b'\n')
+        except OSError:
+            return None
+        return body, mimetype.decode('utf-8')
+
+    def _write_disk(self, version, key, body, mimetype):
+        path = self._disk_path(version, key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temp_path, 'wb') as f:
+                f.write(mimetype.encode('utf-8') + b'\n' + body)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write cached response to {path}: {e}")
+
+    def _store(self, key, entry):
+        """Add an entry to memory and evict down to the budget; call with the lock held"""
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size -= len(previous[0])
+        self._entries[key] = entry
+        self._size += len(entry[0])
+        while self._size > self.max_bytes:
+            _, (body, _) = self._entries.popitem(last=False)
+            self._size -= len(body)
+            self.evictions += 1
+
+    def get(self, version, key):
+        """
+        Get a cached response
+
+        Args:
+            version (str): Version of the dataset the response must have been rendered from
+            key (str): Request key built by cache_key
+
+        Returns:
+            tuple: (body bytes, mimetype), or None if the response is not cached
+        """
+        if self.max_bytes <= 0:
+            return None
+        with self._lock:
+            self._switch_version(version)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        entry = self._read_disk(version, key) if self.directory else None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            if version == self._version and len(entry[0]) <= self.max_bytes:
+                self._store(key, entry)
+        return entry
+
+    def put(self, version, key, body, mimetype):
+        """
+        Cache a rendered response
+
+        Bodies larger than the whole memory budget are not cached.
+
+        Args:
+            version (str): Version of the dataset the response was rendered from
+            key (str): Request key built by cache_key
+            body (bytes): Response body
+            mimetype (str): Response mimetype
+        """
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            self._switch_version(version)
+            self._store(key, (body, mimetype))
+        if self.directory:
+            self._write_disk(version, key, body, mimetype)
+
+    def clear(self):
+        """Drop every cached response, in memory and on disk"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self._version = None
+            if self.directory:
+                shutil.rmtree(self._cache_root(), ignore_errors=True)
+
+    def stats(self):
+        """Get cache counters for monitoring"""
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._size,
+            "max_bytes": self.max_bytes
+        }
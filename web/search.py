@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+import re
+import unicodedata
+
+# Default and maximum number of search results
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+# Prefixes longer than this are looked up by their first MAX_PREFIX characters and verified
+MAX_PREFIX = 12
+
+_TOKEN = re.compile(r'\w+')
+_APOSTROPHES = re.compile(r"['’]")
+
+def normalize(text):
+    """Case- and accent-fold text for searching, e.g. "Lórien's" -> "loriens" """
+    decomposed = unicodedata.normalize('NFKD', _APOSTROPHES.sub('', text or ''))
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+def tokenize(text):
+    """Split text into normalized search tokens"""
+    return _TOKEN.findall(normalize(text))
+
+def _trigrams(token):
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+class SearchIndex:
+    """
+    Inverted index over card names and drop names
+
+    Every card and drop is a document. Documents are numbered in rank order
+    (shorter names first, then alphabetically), and every token prefix maps to
+    the sorted list of documents containing a token with that prefix. A query
+    reads the list of its most selective token and stops after ``limit``
+    results, so its cost does not grow with the size of the dataset.
+    Only tokens that match no prefix fall back to a trigram index over the
+    vocabulary, which finds them inside longer words.
+    """
+
+    def __init__(self, secret_lairs):
+        documents = []
+        for drop in secret_lairs:
+            documents.append({
+                "type": "drop",
+                "name": drop.get("name", ""),
+                "drop_number": drop.get("drop_number"),
+                "drop_name": drop.get("name", "")
+            })
+            for card in drop.get("cards") or []:
+                documents.append({
+                    "type": "card",
+                    "name": card.get("name", ""),
+                    "drop_number": drop.get("drop_number"),
+                    "drop_name": drop.get("name", ""),
+                    "set": card.get("set"),
+                    "collector_number": card.get("collector_number"),
+                    "id": card.get("id")
+                })
+        documents.sort(key=lambda document: (len(document["name"]), normalize(document["name"]),
+                                             document["type"] != "card"))
+        self.documents = documents
+
+        self._tokens = [set(tokenize(document["name"])) for document in documents]
+        self._prefixes = {}
+        self._postings = {}
+        for doc_id, tokens in enumerate(self._tokens):
+            prefixes = set()
+            for token in tokens:
+                self._postings.setdefault(token, []).append(doc_id)
+                prefixes.update(token[:length] for length in range(1, min(len(token), MAX_PREFIX) + 1))
+            for prefix in prefixes:
+                self._prefixes.setdefault(prefix, []).append(doc_id)
+
+        self._trigrams = {}
+        for token in self._postings:
+            for trigram in _trigrams(token):
+                self._trigrams.setdefault(trigram, set()).add(token)
+
+    def __len__(self):
+        return len(self.documents)
+
+    def _candidates(self, token):
+        """Get the sorted ids of documents with a token starting with, or else containing, ``token``"""
+        candidates = self._prefixes.get(token[:MAX_PREFIX])
+        if candidates:
+            return candidates
+        if len(token) < 3:
+            return []
+        words = set.intersection(*(self._trigrams.get(trigram, set()) for trigram in _trigrams(token)))
+        return sorted({doc_id for word in words if token in word for doc_id in self._postings[word]})
+
+    def _is_prefix(self, token):
+        """Whether some word in the index starts with ``token``, so it only matches word starts"""
+        return token[:MAX_PREFIX] in self._prefixes
+
+    def _matches(self, doc_id, token, prefix):
+        if prefix:
+            return any(word.startswith(token) for word in self._tokens[doc_id])
+        return len(token) >= 3 and any(token in word for word in self._tokens[doc_id])
+
+    def search(self, query, limit=DEFAULT_SEARCH_LIMIT):
+        """
+        Find cards and drops whose names contain every token of the query
+
+        Each query token matches the start of a word in the name. Only when no
+        word in the index starts with it does a token of three or more
+        characters match inside words instead.
+
+        Args:
+            query (str): The search text
+            limit (int): Maximum number of results
+
+        Returns:
+            list: Matching card and drop documents, best matches first
+        """
+        tokens = set(tokenize(query))
+        if not tokens:
+            return []
+
+        # Walk the candidates of the most selective token in rank order and
+        # check the remaining tokens against each candidate's words
+        candidates = min((self._candidates(token) for token in tokens), key=len)
+        modes = [(token, self._is_prefix(token)) for token in tokens]
+        results = []
+        for doc_id in candidates:
+            if all(self._matches(doc_id, token, prefix) for token, prefix in modes):
+                results.append(self.documents[doc_id])
+                if len(results) >= limit:
+                    break
+        return results
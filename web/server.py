@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+import gc
+import os
+import sys
+import logging
+
+# gunicorn is only needed for the production server and does not run on Windows
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:
+    BaseApplication = object
+    gunicorn_available = False
+else:
+    gunicorn_available = True
+
+# Add the project root to the path so we can import the app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Defaults for the production server
+DEFAULT_THREADS = 4
+DEFAULT_KEEPALIVE = 5
+DEFAULT_TIMEOUT = 30
+
+def preload_dataset():
+    """
+    Load the Flask app and its dataset before the workers are forked
+
+    The snapshot and the indexes derived from it are built once in the master
+    process. Workers inherit them copy-on-write, and gc.freeze() moves them out
+    of the collector's generations so garbage collection in the workers does not
+    write to (and so copy) the shared pages.
+
+    Workers read the memory-mapped binary snapshot when it exists, so their
+    memory does not grow with the dataset; set BINARY_SNAPSHOT=0 to serve the
+    decoded data instead.
+
+    Returns:
+        Flask: The app to serve
+    """
+    from web.app import app, preload
+    app.config['BINARY_SNAPSHOT'] = os.environ.get('BINARY_SNAPSHOT', '1') == '1'
+    snapshot = preload()
+    gc.freeze()
+    logger.info(f"Preloaded {len(snapshot.secret_lairs)} Secret Lair drops (version {snapshot.version})")
+    return app
+
+def reload_dataset(arbiter):
+    """gunicorn on_reload hook: refresh the preloaded dataset before SIGHUP spawns new workers"""
+    from web.app import preload
+    gc.unfreeze()
+    snapshot = preload()
+    gc.freeze()
+    arbiter.log.info(f"Reloaded {len(snapshot.secret_lairs)} Secret Lair drops (version {snapshot.version})")
+
+def server_options(host, port, workers, threads=DEFAULT_THREADS, keepalive=DEFAULT_KEEPALIVE, timeout=DEFAULT_TIMEOUT):
+    """
+    Build the gunicorn settings for serving the web UI
+
+    Args:
+        host (str): Host to bind to
+        port (int): Port to bind to
+        workers (int): Number of worker processes
+        threads (int): Number of request threads per worker
+        keepalive (int): Seconds to keep idle client connections open
+        timeout (int): Seconds before a silent worker is restarted, and the grace period for
+            workers to finish their requests on reload or shutdown
+
+    Returns:
+        dict: gunicorn settings
+    """
+    return {
+        'bind': f"{host}:{port}",
+        'workers': workers,
+        'threads': threads,
+        'worker_class': 'gthread',
+        'keepalive': keepalive,
+        'timeout': timeout,
+        'graceful_timeout': timeout,
+        'preload_app': True,
+        'on_reload': reload_dataset,
+        'accesslog': '-'
+    }
+
+class ProductionServer(BaseApplication):
+    """
+    Pre-fork gunicorn server for the web UI
+
+    The app and dataset are loaded once in the master process, which forks the
+    workers. Sending the master SIGHUP reloads the dataset and replaces the
+    workers gracefully: new workers start before the old ones finish their
+    requests and exit.
+    """
+
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return preload_dataset()
+
+def run_production_server(host='127.0.0.1', port=5000, workers=2, threads=DEFAULT_THREADS,
+                          keepalive=DEFAULT_KEEPALIVE, timeout=DEFAULT_TIMEOUT):
+    """
+    Serve the web UI with gunicorn until the server is shut down
+
+    Returns:
+        int: Exit code - 0 on success, 1 if gunicorn is not available
+    """
+    if not gunicorn_available:
+        print("The production server requires gunicorn, which is not installed or not supported on this platform:")
+        print("pip install -r requirements.txt")
+        return 1
+    print(f"Starting MTG Inventory Manager Web UI at http://{host}:{port} with {workers} workers")
+    ProductionServer(server_options(host, port, workers, threads, keepalive, timeout)).run()
+    return 0
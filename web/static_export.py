@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import gzip
+import json
+import time
+import shutil
+import logging
+from urllib.parse import quote
+from concurrent.futures import ProcessPoolExecutor
+
+# brotli is optional: without it only .gz siblings are written
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Add the project root to the path so we can import the app
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Default directory the static site is exported to, inside the data directory
+DEFAULT_EXPORT_DIRNAME = "static"
+
+# Manifest mapping every exported URL path to its file, for rewrite rules
+MANIFEST_FILENAME = "manifest.json"
+
+# Smallest file that gets precompressed siblings; below this the headers outweigh the savings
+MIN_COMPRESS_SIZE = 256
+
+# Pages rendered per task handed to a worker process
+DEFAULT_CHUNK_SIZE = 64
+
+def export_routes(drop_numbers):
+    """
+    List the URL paths to export and the file each is written to
+
+    Pages are written as index.html in a directory named after the path, so
+    static servers answer the extension-less URL; API responses get a .json
+    extension so they are served with the right content type. Drop numbers
+    that cannot be a file name (or, containing "/", a route) are skipped.
+
+    Args:
+        drop_numbers (iterable): Drop numbers to render detail pages and API responses for
+
+    Returns:
+        list: (URL path, relative file path) tuples
+    """
+    routes = [
+        ('/', 'index.html'),
+        ('/api/secret-lairs', 'api/secret-lairs.json'),
+        ('/api/analytics/drops', 'api/analytics/drops.json'),
+        ('/api/analytics/summary', 'api/analytics/summary.json')
+    ]
+    for drop_number in drop_numbers:
+        if not drop_number or drop_number in ('.', '..') or '/' in drop_number or '\0' in drop_number:
+            logger.warning(f"Skipping drop number {drop_number!r}, which cannot be exported to a file")
+            continue
+        path = quote(drop_number)
+        routes.append((f'/secret-lair/{path}', f'secret-lair/{drop_number}/index.html'))
+        routes.append((f'/api/secret-lair/{path}', f'api/secret-lair/{drop_number}.json'))
+        routes.append((f'/api/analytics/drops/{path}', f'api/analytics/drops/{drop_number}.json'))
+    return routes
+
+def write_file(body, filepath, compress=True):
+    """
+    Write a rendered response, with .gz and (if brotli is installed) .br siblings
+
+    Compressed files are written at the highest level, since they are built once
+    and served many times, and gzip files carry no timestamp so unchanged
+    content produces identical files.
+
+    Returns:
+        list: Paths of the written files
+    """
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    with open(filepath, 'wb') as f:
+        f.write(body)
+    written = [filepath]
+    if not compress or len(body) < MIN_COMPRESS_SIZE:
+        return written
+
+    with open(filepath + '.gz', 'wb') as f:
+        f.write(gzip.compress(body, compresslevel=9, mtime=0))
+    written.append(filepath + '.gz')
+    if brotli is not None:
+        with open(filepath + '.br', 'wb') as f:
+            f.write(brotli.compress(body, quality=11))
+        written.append(filepath + '.br')
+    return written
+
+_client = None
+
+def _init_worker(data_dir):
+    """Point the app in a worker process at the data directory being exported"""
+    global _client
+    from web.app import app
+    app.config['DATA_DIR'] = data_dir
+    _client = app.test_client()
+
+def render_routes(routes, output_dir, compress=True):
+    """
+    Render URL paths through the Flask app and write their responses to the output directory
+
+    Runs in the worker processes after _init_worker, or in-process when the
+    export is not parallelized.
+
+    Args:
+        routes (list): (URL path, relative file path) tuples
+        output_dir (str): Directory to write to
+        compress (bool): Whether to write precompressed siblings
+
+    Returns:
+        int: Number of files written
+
+    Raises:
+        RuntimeError: If a route does not render successfully
+    """
+    count = 0
+    for path, filename in routes:
+        response = _client.get(path)
+        if response.status_code != 200:
+            raise RuntimeError(f"Rendering {path} failed with status code {response.status_code}")
+        count += len(write_file(response.get_data(), os.path.join(output_dir, filename), compress))
+    return count
+
+def render_not_found(output_dir, compress=True):
+    """Render the 404 page to 404.html, which most static hosts serve for missing files"""
+    from flask import render_template
+    from web.app import app
+    with app.test_request_context('/404.html'):
+        body = render_template('404.html').encode('utf-8')
+    return len(write_file(body, os.path.join(output_dir, '404.html'), compress))
+
+def _replace_directory(source, target):
+    """Move a finished export into place, removing the previous one"""
+    previous = target + '.old'
+    if os.path.exists(target):
+        shutil.rmtree(previous, ignore_errors=True)
+        os.replace(target, previous)
+    os.replace(source, target)
+    shutil.rmtree(previous, ignore_errors=True)
+
+def export_static_site(output_dir=None, data_dir=None, processes=None, compress=True, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Render the web UI and the JSON API to static files
+
+    Writes the home page, every drop's detail page and the API responses that
+    take no query parameters, plus 404.html, the static assets and a manifest.
+    Detail pages are rendered in chunks across worker processes, each of which
+    loads the dataset once. The export is built in a temporary directory and
+    moved into place when complete, so a server reading the previous export
+    never sees a partial one.
+
+    Args:
+        output_dir (str): Directory to export to (default: data/static)
+        data_dir (str): Data directory to read the dataset from (default: the app's)
+        processes (int): Number of worker processes (default: one per CPU); 1 renders in-process
+        compress (bool): Whether to write .gz and .br siblings
+        chunk_size (int): Routes rendered per worker task
+
+    Returns:
+        dict: Export summary with the output directory, route and file counts and duration
+    """
+    from web.app import app, repository
+    data_dir = os.path.abspath(data_dir or app.config['DATA_DIR'])
+    output_dir = os.path.abspath(output_dir or os.path.join(data_dir, DEFAULT_EXPORT_DIRNAME))
+    start_time = time.time()
+
+    original_data_dir = app.config['DATA_DIR']
+    _init_worker(data_dir)
+    temp_dir = output_dir + '.tmp'
+    try:
+        snapshot = repository.snapshot()
+        if not snapshot.secret_lairs:
+            raise RuntimeError(f"No Secret Lair data found in {data_dir}")
+        routes = export_routes(snapshot.by_drop_number)
+        chunks = [routes[i:i + chunk_size] for i in range(0, len(routes), chunk_size)]
+        processes = processes or os.cpu_count() or 1
+        logger.info(f"Exporting {len(routes)} pages and API responses to {output_dir} with {processes} processes")
+
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        os.makedirs(temp_dir)
+        file_count = render_not_found(temp_dir, compress)
+        if processes == 1:
+            file_count += sum(render_routes(chunk, temp_dir, compress) for chunk in chunks)
+        else:
+            with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                     initargs=(data_dir,)) as executor:
+                file_count += sum(executor.map(render_routes, chunks, [temp_dir] * len(chunks),
+                                               [compress] * len(chunks)))
+
+        shutil.copytree(app.static_folder, os.path.join(temp_dir, 'static'))
+        with open(os.path.join(temp_dir, MANIFEST_FILENAME), 'w') as f:
+            json.dump({"version": snapshot.version, "routes": dict(routes)}, f, indent=2)
+        _replace_directory(temp_dir, output_dir)
+    except BaseException:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise
+    finally:
+        app.config['DATA_DIR'] = original_data_dir
+        repository.invalidate()
+
+    duration = time.time() - start_time
+    logger.info(f"Exported {len(routes)} routes ({file_count} files) in {duration:.1f}s")
+    return {"output_dir": output_dir, "routes": len(routes), "files": file_count, "duration": duration}